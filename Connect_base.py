@@ -1,26 +1,263 @@
+import os
+import time
+import threading
+from decimal import Decimal, InvalidOperation
+from collections import deque
+from contextlib import contextmanager
 import psycopg2
+import psycopg2.extensions
 from psycopg2 import sql
-import bcrypt
-from pathlib import Path
+from metrics import timed
+from image_index import get_image_index
+from password_hashing import get_hashing_pool, HashingBusy
+from search_index import get_search_index, PER_PAGE
+
+DB_CONFIG = {
+    "dbname": "Arcade_Checkpoint",
+    "host": "localhost",
+    "user": "postgres",
+    "password": "#Gabriel19",
+    "port": "5432",
+}
+
+# Pool settings (override with environment variables)
+POOL_MIN = int(os.environ.get("ARCADE_POOL_MIN", 1))
+POOL_MAX = int(os.environ.get("ARCADE_POOL_MAX", 10))
+POOL_TIMEOUT = float(os.environ.get("ARCADE_POOL_TIMEOUT", 5.0))      # seconds waiting for a free connection
+POOL_MAX_AGE = float(os.environ.get("ARCADE_POOL_MAX_AGE", 1800.0))   # seconds before a connection is recycled
+POOL_CHECK_IDLE = float(os.environ.get("ARCADE_POOL_CHECK_IDLE", 30.0))  # idle seconds before a health check
+
+EXPORT_CHUNK = 2000   # rows per round trip of the server-side cursor used for exports
+
+class TimedCursor(psycopg2.extensions.cursor):
+    """Cursor that reports query time to the metrics module"""
+
+    def execute(self, query, vars=None):
+        with timed("db_query"):
+            return super().execute(query, vars)
+
+    def executemany(self, query, vars_list):
+        with timed("db_query"):
+            return super().executemany(query, vars_list)
+
+    def copy_expert(self, sql, file, size=8192):
+        with timed("db_query"):
+            return super().copy_expert(sql, file, size)
+
+    def fetchall(self):
+        with timed("db_query"):
+            return super().fetchall()
+
+    def fetchmany(self, size=None):
+        with timed("db_query"):
+            return super().fetchmany(size) if size is not None else super().fetchmany()
 
 def Connect_Base():
     try:
-        conection = psycopg2.connect(dbname="Arcade_Checkpoint",
-                                   host="localhost",
-                                   user="postgres",
-                                   password="#Gabriel19",
-                                   port="5432")
+        conection = psycopg2.connect(**DB_CONFIG)
         print("Connetion succeded.")
         return conection
     except psycopg2.OperationalError as e:
         print(f"Error connecting to data base: {e}")
         return None
 
+class PoolTimeout(Exception):
+    """No connection became available before the checkout timeout."""
+
+class ConnectionPool:
+    """Thread-safe pool of psycopg2 connections shared by the data functions."""
+
+    def __init__(self, minconn=POOL_MIN, maxconn=POOL_MAX, timeout=POOL_TIMEOUT,
+                 max_age=POOL_MAX_AGE, check_idle=POOL_CHECK_IDLE, **conn_kwargs):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError("Invalid pool size")
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.max_age = max_age
+        self.check_idle = check_idle
+        self.conn_kwargs = conn_kwargs or dict(DB_CONFIG, cursor_factory=TimedCursor)
+
+        self._lock = threading.Condition()
+        self._idle = deque()        # (conn, created_at, returned_at)
+        self._created = {}          # id(conn) -> created_at, for every open connection
+        self._in_use = 0
+        self._connecting = 0
+        self._closed = False
+        self._stats = {
+            "checkouts": 0,
+            "timeouts": 0,
+            "connections_created": 0,
+            "connections_discarded": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+        }
+
+        for _ in range(minconn):
+            conn = self._connect()
+            now = time.monotonic()
+            self._idle.append((conn, self._created[id(conn)], now))
+
+    def _connect(self):
+        conn = psycopg2.connect(**self.conn_kwargs)
+        self._created[id(conn)] = time.monotonic()
+        self._stats["connections_created"] += 1
+        return conn
+
+    def _discard(self, conn):
+        self._created.pop(id(conn), None)
+        self._stats["connections_discarded"] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _healthy(self, conn, created_at, returned_at, now):
+        if conn.closed:
+            return False
+        if now - created_at > self.max_age:
+            return False
+        if now - returned_at > self.check_idle:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+                conn.rollback()
+            except psycopg2.Error:
+                return False
+        return True
+
+    def getconn(self, timeout=None):
+        with timed("db_connect"):
+            return self._getconn(timeout)
+
+    def _getconn(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+
+        while True:
+            candidate = None
+            with self._lock:
+                while candidate is None:
+                    if self._closed:
+                        raise psycopg2.InterfaceError("Connection pool is closed")
+                    if self._idle:
+                        candidate = self._idle.pop()
+                    elif len(self._created) + self._connecting < self.maxconn:
+                        # reserve the slot before releasing the lock for the handshake
+                        self._connecting += 1
+                        break
+                    else:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._stats["timeouts"] += 1
+                            raise PoolTimeout(f"No database connection available after {timeout}s")
+                        self._lock.wait(remaining)
+                self._in_use += 1
+
+            if candidate is None:
+                try:
+                    conn = psycopg2.connect(**self.conn_kwargs)
+                except Exception:
+                    with self._lock:
+                        self._connecting -= 1
+                        self._in_use -= 1
+                        self._lock.notify()
+                    raise
+                with self._lock:
+                    self._connecting -= 1
+                    self._created[id(conn)] = time.monotonic()
+                    self._stats["connections_created"] += 1
+                    return self._checked_out(conn, start)
+
+            # health check runs outside the lock so other threads are not blocked
+            conn, created_at, returned_at = candidate
+            if self._healthy(conn, created_at, returned_at, time.monotonic()):
+                with self._lock:
+                    return self._checked_out(conn, start)
+            with self._lock:
+                self._in_use -= 1
+                self._discard(conn)
+                self._lock.notify()
+
+    def _checked_out(self, conn, start):
+        waited = time.monotonic() - start
+        self._stats["checkouts"] += 1
+        self._stats["wait_time_total"] += waited
+        self._stats["wait_time_max"] = max(self._stats["wait_time_max"], waited)
+        return conn
+
+    def putconn(self, conn, broken=False):
+        if not broken and not conn.closed:
+            try:
+                # never hand out a connection with an open transaction
+                if conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                broken = True
+
+        with self._lock:
+            self._in_use -= 1
+            now = time.monotonic()
+            created_at = self._created.get(id(conn), now)
+            if (broken or conn.closed or self._closed
+                    or now - created_at > self.max_age):
+                self._discard(conn)
+            else:
+                self._idle.append((conn, created_at, now))
+            self._lock.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        conn = self.getconn(timeout)
+        broken = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            self.putconn(conn, broken=broken)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_use"] = self._in_use
+            stats["idle"] = len(self._idle)
+            stats["open"] = len(self._created)
+            stats["wait_time_avg"] = (stats["wait_time_total"] / stats["checkouts"]
+                                      if stats["checkouts"] else 0.0)
+            return stats
+
+    def closeall(self):
+        with self._lock:
+            self._closed = True
+            while self._idle:
+                conn, _, _ = self._idle.pop()
+                self._discard(conn)
+            self._lock.notify_all()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+def pool_stats():
+    return get_pool().stats()
+
 def all_games(filtros=None):
-    conn = Connect_Base()
+    """Rated products named in `filtros` (or every rated product, in one list).
 
+    For listing the whole catalog use catalog_page() or iter_catalog().
+    """
     try:
-        with conn.cursor() as cur:
+        with get_pool().connection() as conn, conn.cursor() as cur:
             if filtros and len(filtros) > 0:
                 query = sql.SQL("""
                     SELECT 
@@ -30,11 +267,10 @@ def all_games(filtros=None):
                         p.PLATFORM,
                         p.GAME_MODE,
                         p.PRICE,
-                        ROUND(AVG(r.RATING), 2) AS average_rating
+                        ROUND(s.RATING_SUM::NUMERIC / s.RATING_COUNT, 2) AS average_rating
                     FROM PRODUCT p
-                    JOIN RATING r ON p.ID_PRODUCT = r.ID_PRODUCT
-                    WHERE p.NAME_PRODUCT = ANY(%s)
-                    GROUP BY p.ID_PRODUCT, p.NAME_PRODUCT, p.GENRE, p.PLATFORM, p.GAME_MODE, p.PRICE
+                    JOIN PRODUCT_RATING_STATS s ON p.ID_PRODUCT = s.ID_PRODUCT
+                    WHERE p.NAME_PRODUCT = ANY(%s) AND s.RATING_COUNT > 0
                     ORDER BY average_rating DESC;
                 """)
                 cur.execute(query, (filtros,))
@@ -47,10 +283,10 @@ def all_games(filtros=None):
                         p.PLATFORM,
                         p.GAME_MODE,
                         p.PRICE,
-                        ROUND(AVG(r.RATING), 2) AS average_rating
+                        ROUND(s.RATING_SUM::NUMERIC / s.RATING_COUNT, 2) AS average_rating
                     FROM PRODUCT p
-                    JOIN RATING r ON p.ID_PRODUCT = r.ID_PRODUCT
-                    GROUP BY p.ID_PRODUCT, p.NAME_PRODUCT, p.GENRE, p.PLATFORM, p.GAME_MODE, p.PRICE
+                    JOIN PRODUCT_RATING_STATS s ON p.ID_PRODUCT = s.ID_PRODUCT
+                    WHERE s.RATING_COUNT > 0
                     ORDER BY average_rating DESC;
                 """)
                 cur.execute(query)
@@ -62,28 +298,49 @@ def all_games(filtros=None):
         print(f"❌ Erro ao buscar jogos: {e}")
         return [], []
 
-    finally:
-        conn.close()
+    game_titles = get_image_index().lookup_many(names)
 
-    base = Path("C:\\Users\\faust\\Desktop\\Sistema de Recomendação\\static")
-    game_titles = []
+    return result, game_titles
 
-    for name in names:
-        name_lower = name.lower()
-        for file in base.iterdir():
-            if name_lower in file.stem.lower():
-                game_titles.append(file.name)
-                break
-        else:
-            game_titles.append("default.jpg")
+def games_by_ids(ids):
+    """Product rows for `ids`, in the same order as `ids` (primary key lookups)"""
+    if not ids:
+        return [], []
+    try:
+        with get_pool().connection() as conn, conn.cursor() as cur:
+            query = sql.SQL("""
+                SELECT 
+                    p.ID_PRODUCT,
+                    p.NAME_PRODUCT,
+                    p.GENRE,
+                    p.PLATFORM,
+                    p.GAME_MODE,
+                    p.PRICE,
+                    ROUND(s.RATING_SUM::NUMERIC / NULLIF(s.RATING_COUNT, 0), 2) AS average_rating
+                FROM UNNEST(%s::INT[]) WITH ORDINALITY AS k(ID_PRODUCT, position)
+                JOIN PRODUCT p ON p.ID_PRODUCT = k.ID_PRODUCT
+                LEFT JOIN PRODUCT_RATING_STATS s ON s.ID_PRODUCT = p.ID_PRODUCT
+                ORDER BY k.position;
+            """)
+            cur.execute(query, (list(ids),))
+            result = cur.fetchall()
 
+    except Exception as e:
+        print(f"❌ Erro ao buscar jogos: {e}")
+        return [], []
+
+    game_titles = get_image_index().lookup_many([row[1] for row in result])
     return result, game_titles
 
-def User_Login(Username, Password):
-    conn = Connect_Base()
+def product_ids():
+    """(ID_PRODUCT, NAME_PRODUCT, PRICE) rows used to bind the recommender to the database"""
+    with get_pool().connection() as conn, conn.cursor() as cur:
+        cur.execute("SELECT ID_PRODUCT, NAME_PRODUCT, PRICE FROM PRODUCT ORDER BY ID_PRODUCT")
+        return cur.fetchall()
 
+def User_Login(Username, Password):
     try:
-        with conn.cursor() as cur:
+        with get_pool().connection() as conn, conn.cursor() as cur:
             query = sql.SQL("""
                 SELECT c.USERNAME, c.PASSWORD_HASH
                 FROM CLIENT c
@@ -93,126 +350,236 @@ def User_Login(Username, Password):
             cur.execute(query, (Username,))
             result = cur.fetchone()
 
-            if result:
-                stored_username, stored_password = result
+        # the connection goes back to the pool before the (slow) bcrypt check
+        if result:
+            stored_username, stored_password = result
 
-                if bcrypt.checkpw(Password.encode('utf-8'), stored_password.encode('utf-8')):
-                    print("Login suceded")
-                    return True, stored_username  
-                else:
-                    print("Wrong Password")
-                    return False, None
-                
+            ok, new_hash = get_hashing_pool().verify_password(Password, stored_password)
+            if ok:
+                if new_hash:
+                    update_password_hash(stored_username, new_hash)
+                print("Login suceded")
+                return True, stored_username  
             else:
-                print("Username not found")
+                print("Wrong Password")
                 return False, None
             
+        else:
+            print("Username not found")
+            return False, None
+
+    except HashingBusy:
+        raise
+            
     except Exception as e:
         print(f"Error trying to Log in: {e}")
         return False, None
-    
-    finally:
-        conn.close()
+
+def update_password_hash(Username, Password_hash):
+    try:
+        with get_pool().connection() as conn, conn.cursor() as cur:
+            cur.execute("UPDATE CLIENT SET PASSWORD_HASH = %s WHERE USERNAME = %s",
+                        (Password_hash, Username))
+            conn.commit()
+    except Exception as e:
+        print(f"Error updating password hash: {e}")
 
 def Signing_up(Username, Password):
-    conn = Connect_Base()
     try:
-        with conn.cursor() as cur:
-            Password_hash = bcrypt.hashpw(Password.encode('utf-8'), bcrypt.gensalt())
+        Password_hash = get_hashing_pool().hash_password(Password)
+        with get_pool().connection() as conn, conn.cursor() as cur:
             query = sql.SQL("""INSERT INTO CLIENT(USERNAME, PASSWORD_HASH)
                     VALUES(%s, %s)""")
             
-            cur.execute(query, (Username, Password_hash.decode('utf-8')))
+            cur.execute(query, (Username, Password_hash))
 
             conn.commit()
             return "Sucessfully Signed up User!"
+
+    except HashingBusy:
+        raise
             
     except Exception as e:
         return (f"Error SIgning up User!{e}")
-        
-    finally:
-        conn.close()
 
-def find_prod(product_id):
-    conn = Connect_Base()
-    product = None
+def user_ratings(Username):
+    """Ratings of one user as {product name: rating}"""
     try:
-        with conn.cursor() as cur:
+        with get_pool().connection() as conn, conn.cursor() as cur:
             query = sql.SQL("""
-                SELECT 
-                    p.ID_PRODUCT,
-                    p.NAME_PRODUCT,
-                    p.GENRE,
-                    p.PLATFORM,
-                    p.GAME_MODE,
-                    p.PRICE,
-                    ROUND(AVG(r.RATING), 2) AS average_rating
-                FROM PRODUCT p
-                LEFT JOIN RATING r ON p.ID_PRODUCT = r.ID_PRODUCT
-                WHERE p.ID_PRODUCT = %s
-                GROUP BY p.ID_PRODUCT, p.NAME_PRODUCT, p.GENRE, p.PLATFORM, p.GAME_MODE, p.PRICE
+                SELECT p.NAME_PRODUCT, r.RATING
+                FROM RATING r
+                JOIN CLIENT c ON r.ID_CLIENT = c.ID_CLIENT
+                JOIN PRODUCT p ON r.ID_PRODUCT = p.ID_PRODUCT
+                WHERE c.USERNAME = %s
             """)
-            cur.execute(query, (product_id,))
-            product = cur.fetchone()
-    finally:
-        conn.close()
+            cur.execute(query, (Username,))
+            return {name: rating for name, rating in cur.fetchall()}
+
+    except Exception as e:
+        print(f"Error fetching ratings: {e}")
+        return {}
+
+DATA_VERSION_TTL = 2.0   # seconds a fetched data version is reused
+_data_version = (None, 0.0)
+
+# PRODUCT statements bump the version through a trigger; rating writers run this
+# once per batch (a per-statement trigger on RATING would serialize them on one row)
+BUMP_DATA_VERSION = "UPDATE DATA_VERSION SET VERSION = VERSION + 1 WHERE ID = 1"
+
+def data_version():
+    """Catalog/ratings version kept in DATA_VERSION (cached briefly)"""
+    global _data_version
+    version, fetched_at = _data_version
+    if version is not None and time.monotonic() - fetched_at < DATA_VERSION_TTL:
+        return version
+    try:
+        with get_pool().connection() as conn, conn.cursor() as cur:
+            cur.execute("SELECT VERSION FROM DATA_VERSION WHERE ID = 1")
+            row = cur.fetchone()
+            conn.rollback()
+        version = row[0] if row else 0
+    except Exception as e:
+        print(f"Error reading data version: {e}")
+        # keep serving with the last known version; None disables caching
+        return version
+    _data_version = (version, time.monotonic())
+    return version
+
+def find_prod(product_id):
+    product = None
+    with get_pool().connection() as conn, conn.cursor() as cur:
+        query = sql.SQL("""
+            SELECT 
+                p.ID_PRODUCT,
+                p.NAME_PRODUCT,
+                p.GENRE,
+                p.PLATFORM,
+                p.GAME_MODE,
+                p.PRICE,
+                ROUND(s.RATING_SUM::NUMERIC / NULLIF(s.RATING_COUNT, 0), 2) AS average_rating
+            FROM PRODUCT p
+            LEFT JOIN PRODUCT_RATING_STATS s ON p.ID_PRODUCT = s.ID_PRODUCT
+            WHERE p.ID_PRODUCT = %s
+        """)
+        cur.execute(query, (product_id,))
+        product = cur.fetchone()
 
     if not product:
         return "Produto não encontrado", 404
     
-    base = Path("C:\\Users\\faust\\Desktop\\Sistema de Recomendação\\static")
-    game_name = product[1].lower()
-    game_title = None
+    game_title = get_image_index().lookup(product[1])
 
-    for file in base.iterdir():
-        if game_name in file.stem.lower(): 
-            game_title = file.name
-            break  
+    return product, game_title
 
-    if not game_title:
-        game_title = "default.jpg"  
+def catalog_rows():
+    with get_pool().connection() as conn, conn.cursor() as cur:
+        cur.execute("""
+            SELECT
+                id_product,
+                name_product,
+                genre,
+                platform,
+                game_mode,
+                price
+            FROM product
+            ORDER BY id_product;
+        """)
+        return cur.fetchall()
 
-    return product, game_title
+# Catalog listing: rated products by average rating, ties broken by ID, so the
+# order is total and a page can start right after the last row of the previous one
+CATALOG_QUERY = """
+    SELECT
+        p.ID_PRODUCT,
+        p.NAME_PRODUCT,
+        p.GENRE,
+        p.PLATFORM,
+        p.GAME_MODE,
+        p.PRICE,
+        s.AVERAGE_RATING
+    FROM PRODUCT p
+    JOIN PRODUCT_RATING_STATS s ON p.ID_PRODUCT = s.ID_PRODUCT
+    WHERE s.RATING_COUNT > 0 {after}
+    ORDER BY s.AVERAGE_RATING DESC, s.ID_PRODUCT
+"""
+# The leading "AVERAGE_RATING <= %s" is implied by the OR but gives the planner an
+# Index Cond on product_rating_stats_catalog_order, so the scan starts at the cursor
+CATALOG_AFTER = """
+    AND s.AVERAGE_RATING <= %s
+    AND (s.AVERAGE_RATING < %s OR (s.AVERAGE_RATING = %s AND s.ID_PRODUCT > %s))
+"""
 
-def search_games(term):
-    conn = Connect_Base()
+def catalog_cursor(row):
+    """Opaque position of `row` in the catalog order ("<average>_<id>")"""
+    return f"{row[6]}_{row[0]}"
+
+def parse_catalog_cursor(token):
     try:
-        with conn.cursor() as cur:
-            query = sql.SQL("""
-                SELECT 
-                    id_product,
-                    name_product,
-                    genre,
-                    platform,
-                    game_mode,
-                    price
-                FROM product
-                WHERE LOWER(name_product) LIKE LOWER(%s)
-                OR LOWER(genre) LIKE LOWER(%s)
-                OR LOWER(platform) LIKE LOWER(%s)
-                ORDER BY name_product;
-            """)
-            cur.execute(query, (f"%{term}%", f"%{term}%", f"%{term}%"))
-            results = cur.fetchall()
-            names = [row[1] for row in results]
+        average, id_product = token.split("_")
+        return Decimal(average), int(id_product)
+    except (AttributeError, ValueError, InvalidOperation):
+        return None
+
+def catalog_page(after=None, per_page=PER_PAGE):
+    """One page of the catalog listing (keyset pagination).
+
+    `after` is the cursor returned with the previous page; the query seeks
+    straight to it through the catalog order index instead of skipping rows
+    with OFFSET. Returns (rows, image names, cursor of the next page or None).
+    """
+    position = parse_catalog_cursor(after) if after else None
+    try:
+        with get_pool().connection() as conn, conn.cursor() as cur:
+            if position is None:
+                cur.execute(CATALOG_QUERY.format(after="") + " LIMIT %s", (per_page + 1,))
+            else:
+                average, id_product = position
+                cur.execute(CATALOG_QUERY.format(after=CATALOG_AFTER) + " LIMIT %s",
+                            (average, average, average, id_product, per_page + 1))
+            rows = cur.fetchall()
 
+    except Exception as e:
+        print(f"❌ Erro ao buscar jogos: {e}")
+        return [], [], None
+
+    next_cursor = catalog_cursor(rows[per_page - 1]) if len(rows) > per_page else None
+    rows = rows[:per_page]
+    return rows, get_image_index().lookup_many([row[1] for row in rows]), next_cursor
+
+def iter_catalog(chunk_size=EXPORT_CHUNK):
+    """The whole catalog listing in chunks of rows, read through a server-side cursor.
+
+    Only one chunk is held in memory at a time; the connection goes back to
+    the pool when the generator finishes or is closed.
+    """
+    with get_pool().connection() as conn:
+        with conn.cursor(name="catalog_export") as cur:
+            cur.itersize = chunk_size
+            cur.execute(CATALOG_QUERY.format(after=""))
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        conn.commit()
+
+def search_games(term, page=1, per_page=PER_PAGE):
+    try:
+        results, total = get_search_index(catalog_rows).search(term, page, per_page)
 
     except Exception as e:
         print(f"Erro ao buscar: {e}")
-        results = []
-    finally:
-        conn.close()
-
-    base = Path("C:\\Users\\faust\\Desktop\\Sistema de Recomendação\\static")
-    game_titles = []
-
-    for name in names:
-        name_lower = name.lower()
-        for file in base.iterdir():
-            if name_lower in file.stem.lower(): 
-                game_titles.append(file.name)
-                break
-        else:
-            game_titles.append("default.jpg")
+        results, total = [], 0
+
+    names = [row[1] for row in results]
+    game_titles = get_image_index().lookup_many(names)
+
+    return results, game_titles, total
 
-    return results, game_titles
\ No newline at end of file
+def autocomplete_games(prefix, limit=8):
+    try:
+        return get_search_index(catalog_rows).autocomplete(prefix, limit)
+    except Exception as e:
+        print(f"Erro ao buscar: {e}")
+        return []
@@ -1,17 +1,126 @@
-from flask import Flask, render_template, request, redirect, url_for, send_file, jsonify, session
+from flask import Flask, request, redirect, url_for, send_file, jsonify, session, make_response, g, Response, send_from_directory, abort, stream_with_context
+from flask import render_template as flask_render_template
 import psycopg2
 from psycopg2 import sql
 import io
+import csv
 from io import BytesIO
 from Connect_base import *
 from pathlib import Path
 from recomendador_tfidf import *
+from recomendador_colab import inicializar_colaborativo
+from page_cache import TTLCache, fingerprint
+from search_index import invalidate_search_index
+from publicacao import ModeloPublicado
+from despacho import DespachoRecomendacoes
+import async_base
+import os
+import time
+import threading
+import metrics
+from password_hashing import get_hashing_pool
+from image_assets import DERIVED_DIR, IMAGE_SUFFIXES, get_asset_manifest
 
 app = Flask(__name__)
 
 app.secret_key = '#G@br!el19'
 
-sistema = inicializar_sistema()
+colaborativo = inicializar_colaborativo()
+home_cache = TTLCache()
+
+def invalidar_caches():
+    """Chamar quando o catálogo ou as avaliações mudarem por fora dos triggers"""
+    home_cache.invalidate()
+    invalidate_search_index()
+
+# o recomendador em uso; rotas leem modelo.atual uma vez por requisição
+modelo = ModeloPublicado(inicializar_sistema(), ao_publicar=lambda novo: home_cache.invalidate())
+ADMIN_TOKEN = os.environ.get('ARCADE_ADMIN_TOKEN')
+# junta as recomendações de requisições simultâneas em um só produto de matrizes
+despacho = DespachoRecomendacoes()
+
+# segundos entre tentativas de ligar os IDs depois de uma falha no banco
+INTERVALO_VINCULO = float(os.environ.get('ARCADE_VINCULO_INTERVALO', 30.0))
+_vinculo_lock = threading.Lock()
+_vinculo_falhou_em = None
+
+def sistema_vinculado():
+    """Recomendador em uso, ligado aos IDs do banco na primeira vez que é preciso.
+
+    O sistema publicado não é alterado: a versão com IDs é publicada por
+    modelo.aplicar. Só uma requisição consulta o banco por vez (as outras
+    seguem com o sistema atual) e, depois de uma falha, a próxima tentativa
+    espera INTERVALO_VINCULO segundos.
+    """
+    global _vinculo_falhou_em
+    sistema = modelo.atual
+    if sistema.ids_vinculados or not _vinculo_lock.acquire(blocking=False):
+        return sistema
+    try:
+        sistema = modelo.atual
+        if sistema.ids_vinculados:
+            return sistema
+        if _vinculo_falhou_em is not None and time.monotonic() - _vinculo_falhou_em < INTERVALO_VINCULO:
+            return sistema
+        try:
+            produtos = product_ids()
+        except Exception as e:
+            print("Erro ao vincular IDs dos produtos:", e)
+            _vinculo_falhou_em = time.monotonic()
+            return sistema
+        _vinculo_falhou_em = None
+
+        def vincular(atual):
+            novo, sem_id = atual.vincular_ids(produtos)
+            if sem_id:
+                print("Jogos do CSV sem produto no banco:", sem_id)
+            return novo
+
+        return modelo.aplicar(vincular)
+    finally:
+        _vinculo_lock.release()
+
+def chave_home(preferencias_usuario, usuario, sistema):
+    versao = data_version()
+    if versao is None:
+        return None
+    # a ordem das escolhas é mantida: ela muda os bigramas do perfil TF-IDF
+    preferencias = {
+        campo: [str(valor).strip() for valor in preferencias_usuario.get(campo, [])]
+        for campo in ('generos', 'plataformas', 'modos_jogo')
+    }
+    preferencias['filtros'] = preferencias_usuario.get('filtros')
+    return fingerprint(preferencias, usuario, versao, sistema.versao, sistema.alteracoes,
+                       colaborativo.versao)
+
+def render_template(*args, **kwargs):
+    with metrics.timed("template_render"):
+        return flask_render_template(*args, **kwargs)
+
+@app.before_request
+def iniciar_medicao():
+    g.medicao = metrics.start_request()
+
+@app.after_request
+def finalizar_medicao(resposta):
+    medicao = g.pop('medicao', None)
+    if medicao is not None:
+        tempos, total = metrics.finish_request(medicao, request.endpoint)
+        resposta.headers['Server-Timing'] = metrics.server_timing(tempos, total)
+    return resposta
+
+@app.template_global()
+def image_url(image, variant):
+    """URL of the pre-generated variant ('thumb' or 'detail'), or of the original image"""
+    file_name = get_asset_manifest().variant(image, variant)
+    if file_name:
+        return url_for('asset', filename=file_name)
+    return url_for('static', filename=image)
+
+def busy(template):
+    """503 with Retry-After when the password hashing pool is saturated"""
+    mensagem = 'Server is busy, please try again in a moment'
+    return render_template(template, mensagem=mensagem), 503, {'Retry-After': '1'}
 
 # Original Route
 @app.route("/")
@@ -26,21 +135,49 @@ def home_page():
         if not preferencias_usuario:
             print("Nenhuma preferência encontrada. Redirecionando...")
             return redirect(url_for('index'))  
-        resultado = gerar_recomendacoes(sistema, preferencias_usuario, num_recomendacoes=10)
+        usuario = session.get('logged_in_user')
+        sistema = sistema_vinculado()
+
+        chave = chave_home(preferencias_usuario, usuario, sistema)
+        etag = f"home-{chave}" if chave else None
+        if etag and request.if_none_match.contains(etag):
+            resposta = make_response('', 304)
+            resposta.set_etag(etag)
+            return resposta
+
+        pagina = home_cache.get(chave) if chave else None
+        if pagina is None:
+            avaliacoes = user_ratings(usuario) if usuario else None
+            resultado = gerar_recomendacoes(despacho.para(sistema), preferencias_usuario, num_recomendacoes=10,
+                                            colaborativo=colaborativo, avaliacoes_usuario=avaliacoes)
 
-        if not resultado["sucesso"]:
-            return render_template("Home_page.html", erro=resultado["erro"])
+            if not resultado["sucesso"]:
+                return render_template("Home_page.html", erro=resultado["erro"])
 
-        nomes_recomendados = [rec["nome"] for rec in resultado["recomendacoes"]]
-        print("Jogos recomendados:", nomes_recomendados)
+            recomendacoes = resultado["recomendacoes"]
+            ids_recomendados = [rec["id_product"] for rec in recomendacoes]
+            print("Jogos recomendados:", [rec["nome"] for rec in recomendacoes])
 
-        jogos_banco, imagens = all_games(filtros=nomes_recomendados)
+            if all(id_product >= 0 for id_product in ids_recomendados):
+                # busca por chave primária, mantendo a ordem do recomendador
+                jogos_banco, imagens = games_by_ids(ids_recomendados)
+            else:
+                jogos_banco, imagens = all_games(filtros=[rec["nome"] for rec in recomendacoes])
 
-        combined = list(zip(jogos_banco, imagens))
+            pagina = {
+                'recomendacoes': resultado["recomendacoes"],
+                'combined': list(zip(jogos_banco, imagens))
+            }
+            if chave:
+                home_cache.set(chave, pagina)
 
-        return render_template('Home_page.html',
-                               recomendacoes=resultado["recomendacoes"],
-                               combined=combined)
+        resposta = make_response(render_template('Home_page.html',
+                                                 recomendacoes=pagina['recomendacoes'],
+                                                 combined=pagina['combined']))
+        if etag:
+            resposta.set_etag(etag)
+            resposta.headers['Cache-Control'] = 'private, no-cache'
+        return resposta
 
     except Exception as e:
         print("Erro ao processar home:", e)
@@ -56,6 +193,9 @@ def Sign_up():
         try:
             Signing_up(Username, Password)
             return redirect(url_for('Test'))
+
+        except HashingBusy:
+            return busy('Sign_up.html')
         
         except Exception as e:
             mensagem = f'Error Signing up user: {e}'
@@ -82,6 +222,8 @@ def login():
                 return redirect(url_for('home_page'))  
             else:
                 mensagem = 'Invalid Username or Password'
+        except HashingBusy:
+            return busy('Log_in.html')
         except Exception as e:
             mensagem = f'Error trying to log in: {e}'
         
@@ -93,7 +235,9 @@ def login():
 @app.route('/product/<int:product_id>')
 def product_page(product_id):
     product, game_title = find_prod(product_id)
-    return render_template("Product_page.html", product=product, game_title=game_title)
+    similares = sistema_vinculado().jogos_similares(product[1], top_n=4) if game_title != 404 else []
+    return render_template("Product_page.html", product=product, game_title=game_title,
+                           similares=similares)
 
 
 # Test Route
@@ -105,14 +249,152 @@ def Test():
 @app.route('/search')
 def search():
     term = request.args.get("q", "").strip()
+    page = request.args.get("page", 1, type=int)
 
     if not term:
         return render_template("Search_results.html", results=[], query=term)
 
-    results, game_titles = search_games(term)
+    results, game_titles, total = search_games(term, page=page)
     combined = list(zip(results, game_titles))
+    pages = max(1, -(-total // PER_PAGE))
     
-    return render_template("Search_results.html", results=combined, query=term)
+    return render_template("Search_results.html", results=combined, query=term,
+                           page=page, pages=pages, total=total)
+
+# Catalog listing Route (keyset pagination: ?after=<cursor of the last game shown>)
+@app.route('/catalogo')
+def catalogo():
+    after = request.args.get("after")
+    results, game_titles, next_cursor = catalog_page(after)
+    return render_template("Search_results.html", results=list(zip(results, game_titles)),
+                           catalogo=True, first_page=not after, next_cursor=next_cursor)
+
+# Catalog export Route (streamed CSV, read through a server-side cursor)
+@app.route('/catalogo.csv')
+def catalogo_csv():
+    def linhas():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(["id_product", "name", "genre", "platform", "game_mode", "price", "average_rating"])
+        for chunk in iter_catalog():
+            writer.writerows(chunk)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    return Response(stream_with_context(linhas()), mimetype='text/csv',
+                    headers={'Content-Disposition': 'attachment; filename=catalogo.csv'})
+
+# Autocomplete Route
+@app.route('/autocomplete')
+def autocomplete():
+    prefix = request.args.get("q", "").strip()
+    return jsonify(autocomplete_games(prefix))
+
+# Catalog admin Route (only enabled when ARCADE_ADMIN_TOKEN is set)
+@app.route('/admin/catalogo', methods=['POST'])
+def admin_catalogo():
+    if not ADMIN_TOKEN or request.headers.get('X-Admin-Token') != ADMIN_TOKEN:
+        return jsonify({"erro": "not found"}), 404
+
+    alteracoes = request.get_json() or {}
+    try:
+        def aplicar(sistema):
+            if alteracoes.get('remover'):
+                sistema = sistema.remover(alteracoes['remover'])
+            if alteracoes.get('atualizar'):
+                sistema = sistema.atualizar(alteracoes['atualizar'])
+            if alteracoes.get('adicionar'):
+                sistema = sistema.adicionar(alteracoes['adicionar'])
+            return sistema
+
+        novo = modelo.aplicar(aplicar)
+        if alteracoes.get('reconstruir'):
+            modelo.reconstruir()
+        invalidate_search_index()
+        return jsonify({"sucesso": True, "info_sistema": novo.get_info_sistema()})
+
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({"erro": str(e)}), 400
+
+# Image variants Route (content-hashed names, so they never change)
+@app.route('/assets/<path:filename>')
+def asset(filename):
+    if Path(filename).suffix.lower() not in IMAGE_SUFFIXES:
+        abort(404)
+    resposta = send_from_directory(DERIVED_DIR, filename, max_age=31536000)
+    resposta.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return resposta
+
+# Metrics Route (Prometheus text format)
+@app.route('/metrics')
+def metrics_endpoint():
+    gauges = {
+        'arcade_home_cache': {(('stat', k),): v for k, v in home_cache.stats().items()},
+        'arcade_password_hashing': {(('stat', k),): v for k, v in get_hashing_pool().stats().items()},
+        'arcade_batch_dispatcher': {(('stat', k),): v for k, v in despacho.stats().items()},
+    }
+    try:
+        gauges['arcade_db_pool'] = {(('stat', k),): v for k, v in pool_stats().items()}
+    except Exception as e:
+        print("Erro ao ler estatísticas do pool:", e)
+    return Response(metrics.prometheus_text(gauges), mimetype='text/plain; version=0.0.4')
+
+# Cache stats Route
+@app.route('/cache_stats')
+def cache_stats():
+    stats = {'home': home_cache.stats(), 'pool': None}
+    try:
+        stats['pool'] = pool_stats()
+    except Exception as e:
+        print("Erro ao ler estatísticas do pool:", e)
+        stats['pool_erro'] = str(e)
+    return jsonify(stats)
+
+# Async routes: same pages, queries on the asyncpg pool (only with asyncpg + flask[async])
+if async_base.available():
+    async_db = async_base.get_async_db()
+
+    @app.route('/async/product/<int:product_id>')
+    async def product_page_async(product_id):
+        product, game_title = await async_db.run(async_base.find_prod(product_id))
+        similares = sistema_vinculado().jogos_similares(product[1], top_n=4) if game_title != 404 else []
+        return render_template("Product_page.html", product=product, game_title=game_title,
+                               similares=similares)
+
+    @app.route('/async/search')
+    async def search_async():
+        term = request.args.get("q", "").strip()
+        page = request.args.get("page", 1, type=int)
+
+        if not term:
+            return render_template("Search_results.html", results=[], query=term)
+
+        results, game_titles, total = await async_db.run(async_base.search_games(term, page=page))
+        pages = max(1, -(-total // PER_PAGE))
+
+        return render_template("Search_results.html", results=list(zip(results, game_titles)),
+                               query=term, page=page, pages=pages, total=total)
+
+    @app.route('/async/Log_in', methods=['POST'])
+    async def login_async():
+        try:
+            sucesso, stored_username = await async_db.run(
+                async_base.User_Login(request.form['Username'], request.form['Password']),
+                stage="login")
+            if sucesso:
+                session['logged_in_user'] = stored_username
+                return redirect(url_for('home_page'))
+            mensagem = 'Invalid Username or Password'
+        except HashingBusy:
+            return busy('Log_in.html')
+        except Exception as e:
+            mensagem = f'Error trying to log in: {e}'
+
+        return render_template('Log_in.html', mensagem=mensagem)
+else:
+    print("asyncpg/flask[async] não instalados: rotas /async desativadas")
 
 # Form Route
 @app.route('/salvar_respostas', methods=['POST'])
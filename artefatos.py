@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Artefatos do modelo TF-IDF salvos em disco
+
+Cada artefato é um diretório versionado pelo formato e pelo checksum do CSV
+de origem. As matrizes e colunas ficam em arquivos .npy carregados com
+mmap, então o processo sobe sem refazer o treino e workers criados por fork
+compartilham as mesmas páginas de memória.
+
+Uso: python artefatos.py [caminho_do_csv]
+"""
+
+import os
+import sys
+import json
+import shutil
+import hashlib
+import tempfile
+from pathlib import Path
+import numpy as np
+from scipy import sparse
+
+FORMATO = 2
+ARTEFATOS_DIR = Path(os.environ.get("ARCADE_ARTEFATOS_DIR", Path(__file__).resolve().parent / "artefatos"))
+
+def checksum_arquivo(caminho, tamanho_bloco=1024 * 1024):
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+def diretorio_artefato(checksum, base=ARTEFATOS_DIR):
+    return Path(base) / f"v{FORMATO}-{checksum[:16]}"
+
+def _salvar_array(destino, nome, array):
+    np.save(destino / f"{nome}.npy", np.ascontiguousarray(array), allow_pickle=False)
+
+def _carregar_array(origem, nome):
+    return np.load(origem / f"{nome}.npy", mmap_mode="r", allow_pickle=False)
+
+def salvar_artefato(destino, vocabulario, idf, tfidf_matrix, colunas, meta):
+    """Grava o artefato em um diretório temporário e o publica com um rename atômico.
+
+    `vocabulario` é a lista de termos na ordem das colunas da matriz e
+    `colunas` um dicionário nome -> array com os dados do catálogo.
+    """
+    destino = Path(destino)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=destino.name + ".", dir=destino.parent))
+    try:
+        matriz = sparse.csr_matrix(tfidf_matrix)
+        _salvar_array(tmp, "tfidf_data", matriz.data.astype(np.float64))
+        # mesmo tipo de índice que o scipy escolheria, senão ele copia ao carregar
+        tipo_indice = np.int32 if max(matriz.nnz, *matriz.shape) < np.iinfo(np.int32).max else np.int64
+        _salvar_array(tmp, "tfidf_indices", matriz.indices.astype(tipo_indice))
+        _salvar_array(tmp, "tfidf_indptr", matriz.indptr.astype(tipo_indice))
+        _salvar_array(tmp, "idf", np.asarray(idf, dtype=np.float64))
+        for nome, valores in colunas.items():
+            valores = np.asarray(valores)
+            if valores.dtype.kind not in "biuf":
+                # strings de tamanho fixo ('U') podem ser mapeadas sem pickle
+                valores = valores.astype(str)
+            _salvar_array(tmp, f"col_{nome}", valores)
+
+        with open(tmp / "vocabulario.json", "w", encoding="utf-8") as f:
+            json.dump(list(vocabulario), f, ensure_ascii=False)
+
+        meta = dict(meta, formato=FORMATO, forma_matriz=list(matriz.shape),
+                    colunas=list(colunas))
+        with open(tmp / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+
+        try:
+            os.rename(tmp, destino)
+        except OSError:
+            # outro processo publicou o mesmo artefato primeiro
+            if not (destino / "meta.json").exists():
+                raise
+            shutil.rmtree(tmp, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return destino
+
+def carregar_artefato(origem):
+    origem = Path(origem)
+    with open(origem / "meta.json", encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("formato") != FORMATO:
+        raise ValueError(f"Formato de artefato incompatível em {origem}: {meta.get('formato')}")
+
+    with open(origem / "vocabulario.json", encoding="utf-8") as f:
+        vocabulario = json.load(f)
+
+    tfidf_matrix = sparse.csr_matrix(
+        (
+            _carregar_array(origem, "tfidf_data"),
+            _carregar_array(origem, "tfidf_indices"),
+            _carregar_array(origem, "tfidf_indptr"),
+        ),
+        shape=tuple(meta["forma_matriz"]),
+        copy=False,
+    )
+    colunas = {nome: _carregar_array(origem, f"col_{nome}") for nome in meta["colunas"]}
+
+    return {
+        "meta": meta,
+        "vocabulario": vocabulario,
+        "idf": _carregar_array(origem, "idf"),
+        "tfidf_matrix": tfidf_matrix,
+        "colunas": colunas,
+    }
+
+def construir(caminho_csv=None, base=ARTEFATOS_DIR):
+    from recomendador_tfidf import CSV_JOGOS, SistemaRecomendacao
+
+    caminho_csv = caminho_csv or CSV_JOGOS
+    checksum = checksum_arquivo(caminho_csv)
+    destino = diretorio_artefato(checksum, base)
+    if (destino / "meta.json").exists():
+        print(f"Artefato já existe: {destino}")
+        return destino
+
+    sistema = SistemaRecomendacao(caminho_csv=caminho_csv)
+    sistema.salvar(destino, checksum)
+    print(f"Artefato salvo em {destino} ({sistema.tfidf_matrix.shape[0]} jogos)")
+    return destino
+
+if __name__ == "__main__":
+    construir(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,209 @@
+"""
+Asyncio versions of the Connect_base queries (asyncpg, optional).
+
+The asyncpg pool belongs to one event loop, which runs on its own thread; the
+coroutines below are scheduled there with `run()` (from async code, e.g. an
+async Flask view, whatever loop it is on) or `run_sync()` (from plain threads).
+Independent queries are started together with asyncio.gather, so a single
+worker keeps several round trips in flight instead of waiting for each one.
+
+Needs `pip install asyncpg` (and `flask[async]` for the async routes); without
+them `available()` is False and the app simply does not register /async.
+"""
+
+import os
+import asyncio
+import logging
+import threading
+from password_hashing import get_hashing_pool, HashingBusy
+from image_index import get_image_index
+from search_index import get_search_index, PER_PAGE
+from Connect_base import DB_CONFIG
+from metrics import timed
+
+try:
+    import asyncpg
+except ImportError:
+    asyncpg = None
+
+try:
+    import asgiref  # noqa: F401  (Flask runs async views through it)
+except ImportError:
+    asgiref = None
+
+ASYNC_POOL_MIN = int(os.environ.get("ARCADE_ASYNC_POOL_MIN", 2))
+ASYNC_POOL_MAX = int(os.environ.get("ARCADE_ASYNC_POOL_MAX", 20))
+
+log = logging.getLogger(__name__)
+
+def available():
+    return asyncpg is not None and asgiref is not None
+
+class AsyncDatabase:
+    """asyncpg pool living on a dedicated event loop thread"""
+
+    def __init__(self, min_size=ASYNC_POOL_MIN, max_size=ASYNC_POOL_MAX, **conn_kwargs):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.conn_kwargs = conn_kwargs or {
+            "database": DB_CONFIG["dbname"],
+            "host": DB_CONFIG["host"],
+            "user": DB_CONFIG["user"],
+            "password": DB_CONFIG["password"],
+            "port": int(DB_CONFIG["port"]),
+        }
+        self._loop = None
+        self._pool = None
+        self._lock = threading.Lock()
+        self._pool_lock = None
+
+    def _start(self):
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    thread = threading.Thread(target=loop.run_forever, name="async-db", daemon=True)
+                    thread.start()
+                    self._loop = loop
+        return self._loop
+
+    async def pool(self):
+        """The asyncpg pool (only valid on the database loop)"""
+        if self._pool is None:
+            if self._pool_lock is None:
+                self._pool_lock = asyncio.Lock()
+            async with self._pool_lock:
+                if self._pool is None:
+                    self._pool = await asyncpg.create_pool(min_size=self.min_size,
+                                                           max_size=self.max_size,
+                                                           **self.conn_kwargs)
+        return self._pool
+
+    def submit(self, coro):
+        """Schedules `coro` on the database loop; returns a concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self._start())
+
+    # The coroutines run in the loop thread's context, where no request is being
+    # timed, so the wait is measured here, on the caller's side, and lands in the
+    # request's Server-Timing breakdown.
+    async def run(self, coro, stage="db_query"):
+        """Awaits `coro` on the database loop from any other event loop"""
+        with timed(stage):
+            return await asyncio.wrap_future(self.submit(coro))
+
+    def run_sync(self, coro, timeout=None, stage="db_query"):
+        with timed(stage):
+            return self.submit(coro).result(timeout)
+
+    async def fetch(self, query, *args):
+        async with (await self.pool()).acquire() as conn:
+            return await conn.fetch(query, *args)
+
+    async def fetchrow(self, query, *args):
+        async with (await self.pool()).acquire() as conn:
+            return await conn.fetchrow(query, *args)
+
+    async def execute(self, query, *args):
+        async with (await self.pool()).acquire() as conn:
+            return await conn.execute(query, *args)
+
+    def close(self):
+        if self._loop is None:
+            return
+        if self._pool is not None:
+            self.run_sync(self._pool.close())
+            self._pool = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+
+_db = None
+_db_lock = threading.Lock()
+
+def get_async_db():
+    global _db
+    if _db is None:
+        with _db_lock:
+            if _db is None:
+                _db = AsyncDatabase()
+    return _db
+
+# Queries. Rows come back as tuples so templates index them like the psycopg2 rows.
+
+async def find_prod(product_id):
+    """Product row and image; the row and its rating are fetched concurrently"""
+    db = get_async_db()
+    product, rating = await asyncio.gather(
+        db.fetchrow("""
+            SELECT ID_PRODUCT, NAME_PRODUCT, GENRE, PLATFORM, GAME_MODE, PRICE
+            FROM PRODUCT
+            WHERE ID_PRODUCT = $1
+        """, product_id),
+        db.fetchrow("""
+            SELECT ROUND(RATING_SUM::NUMERIC / NULLIF(RATING_COUNT, 0), 2)
+            FROM PRODUCT_RATING_STATS
+            WHERE ID_PRODUCT = $1
+        """, product_id),
+    )
+    if not product:
+        return "Produto não encontrado", 404
+
+    product = tuple(product) + (rating[0] if rating else None,)
+    return product, get_image_index().lookup(product[1])
+
+async def catalog_rows():
+    rows = await get_async_db().fetch("""
+        SELECT id_product, name_product, genre, platform, game_mode, price
+        FROM product
+        ORDER BY id_product
+    """)
+    return [tuple(row) for row in rows]
+
+async def search_games(term, page=1, per_page=PER_PAGE):
+    db = get_async_db()
+
+    def search():
+        # the in-process index is CPU work; (re)loading it goes back to the database loop
+        index = get_search_index(lambda: db.run_sync(catalog_rows()))
+        return index.search(term, page, per_page)
+
+    try:
+        results, total = await asyncio.to_thread(search)
+
+    except Exception:
+        log.exception("Search failed for %r", term)
+        results, total = [], 0
+
+    return results, get_image_index().lookup_many([row[1] for row in results]), total
+
+async def User_Login(Username, Password):
+    db = get_async_db()
+    try:
+        result = await db.fetchrow(
+            "SELECT USERNAME, PASSWORD_HASH FROM CLIENT WHERE USERNAME = $1", Username)
+        if not result:
+            return False, None
+
+        stored_username, stored_password = result
+        # bcrypt runs on the hashing pool; the loop only waits for it
+        ok, new_hash = await asyncio.to_thread(
+            get_hashing_pool().verify_password, Password, stored_password)
+        if not ok:
+            return False, None
+        if new_hash:
+            await update_password_hash(stored_username, new_hash)
+        return True, stored_username
+
+    except HashingBusy:
+        raise
+
+    except Exception:
+        log.exception("Error trying to log in")
+        return False, None
+
+async def update_password_hash(Username, Password_hash):
+    """Stores a rehashed password; a failure only costs the rehash, not the login"""
+    try:
+        await get_async_db().execute(
+            "UPDATE CLIENT SET PASSWORD_HASH = $1 WHERE USERNAME = $2", Password_hash, Username)
+    except Exception:
+        log.exception("Error updating password hash")
@@ -0,0 +1,85 @@
+"""
+Login throughput/latency benchmark for the bcrypt hashing pool.
+
+Simulates concurrent logins verifying a bcrypt hash, either through the
+process pool (default) or inline on the calling threads (--inline), and
+reports throughput, latency percentiles and rejected requests.
+
+Usage (from the project root):
+    python -m benchmarks.bench_login --clients 16 --logins 200 --rounds 12
+"""
+
+import time
+import argparse
+import threading
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+from password_hashing import HashingPool, HashingBusy, _verify
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+def run(clients, logins, rounds, inline, max_pending, stored_rounds):
+    password = "senha-benchmark"
+    stored = bcrypt.hashpw(password.encode(), bcrypt.gensalt(stored_rounds)).decode()
+    pool = None if inline else HashingPool(max_pending=max_pending, rounds=rounds)
+    if pool:
+        pool.verify_password(password, stored)  # start the worker processes
+
+    latencies = []
+    rejected = 0
+    lock = threading.Lock()
+
+    def login(_):
+        nonlocal rejected
+        start = time.perf_counter()
+        try:
+            if pool:
+                pool.verify_password(password, stored)
+            else:
+                _verify(password, stored, rounds)
+        except HashingBusy:
+            with lock:
+                rejected += 1
+            return
+        with lock:
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        list(executor.map(login, range(logins)))
+    elapsed = time.perf_counter() - start
+
+    mode = "inline" if inline else f"pool ({pool.workers} workers, max {max_pending} pending)"
+    print(f"Mode: {mode}, cost {stored_rounds} -> {rounds}, {clients} concurrent clients")
+    print(f"Completed: {len(latencies)}  Rejected (503): {rejected}  Time: {elapsed:.2f}s")
+    print(f"Throughput: {len(latencies) / elapsed:.1f} logins/s")
+    if latencies:
+        print("Latency ms: "
+              f"p50 {percentile(latencies, 50) * 1000:.1f}  "
+              f"p95 {percentile(latencies, 95) * 1000:.1f}  "
+              f"p99 {percentile(latencies, 99) * 1000:.1f}  "
+              f"mean {statistics.mean(latencies) * 1000:.1f}")
+    if pool:
+        print(f"Pool stats: {pool.stats()}")
+        pool.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=12, help="configured bcrypt cost")
+    parser.add_argument("--stored-rounds", type=int, default=None,
+                        help="cost of the stored hash (lower than --rounds exercises rehash)")
+    parser.add_argument("--max-pending", type=int, default=64)
+    parser.add_argument("--inline", action="store_true", help="hash on the client threads (old behaviour)")
+    args = parser.parse_args()
+    run(args.clients, args.logins, args.rounds, args.inline, args.max_pending,
+        args.stored_rounds or args.rounds)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Cold start of a serving process: import time, time until the first
+recommendation, resident memory and which heavy libraries got imported.
+
+Each scenario runs in a fresh interpreter, the way a new web worker starts:
+
+  recomendador  import recomendador_tfidf, load the artifact, one gerar_recomendacoes
+  app           import app (recommender + collaborative model), one /Home_page
+                through the in-process database stand-in
+
+The model artifacts (TF-IDF and the collaborative model the app loads) are
+built first when missing, so the numbers are about loading them, not
+training. Serving must not import pandas or scikit-learn; the command exits
+with status 1 when a scenario does.
+
+Usage (from the project root):
+    python -m benchmarks.cold_start
+    python -m benchmarks.cold_start --csv /tmp/catalogo/jogos_carac.csv --runs 5
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import statistics
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+PESADOS = ["pandas", "sklearn", "scipy", "numpy"]
+# só o treino pode importar estes
+SO_TREINO = {"pandas", "sklearn"}
+
+_PREPARAR = """
+import os, subprocess, sys
+import artefatos
+import recomendador_colab as colab
+import fatoracao
+
+artefatos.construir()
+checksum = artefatos.checksum_arquivo(colab.CSV_COLAB)
+if os.environ.get("ARCADE_COLAB_MODELO", "").lower() == "als":
+    if not (fatoracao.caminho_fatoracao(checksum).exists() or fatoracao.caminho_fatoracao_banco().exists()):
+        subprocess.run([sys.executable, "fatoracao.py", "treinar"], check=True)
+elif not (colab.caminho_colaborativo(checksum).exists() or colab.caminho_colaborativo_banco().exists()):
+    subprocess.run([sys.executable, "recomendador_colab.py"], check=True)
+"""
+
+_MEDIR = r"""
+import sys, time, json
+inicio = time.perf_counter()
+{importar}
+importado = time.perf_counter()
+{primeira}
+pronto = time.perf_counter()
+memoria = {{}}
+with open("/proc/self/status") as f:
+    for linha in f:
+        if linha.startswith(("VmRSS", "VmHWM")):
+            memoria[linha.split(":")[0]] = int(linha.split()[1]) / 1024
+print(json.dumps({{
+    "import_s": importado - inicio,
+    "pronto_s": pronto - inicio,
+    "rss_mb": memoria.get("VmRSS"),
+    "pico_rss_mb": memoria.get("VmHWM"),
+    "modulos": sorted(m for m in {pesados!r} if m in sys.modules),
+}}))
+"""
+
+CENARIOS = {
+    "recomendador": (
+        "import recomendador_tfidf",
+        "sistema = recomendador_tfidf.inicializar_sistema()\n"
+        "recomendador_tfidf.gerar_recomendacoes(sistema, {'generos': ['Ação', 'RPG'], "
+        "'plataformas': ['PC'], 'modos_jogo': ['Single-player']})",
+    ),
+    "app": (
+        "import app",
+        "from benchmarks import standin\n"
+        "standin.instalar(app, app.modelo.atual)\n"
+        "cliente = app.app.test_client()\n"
+        "with cliente.session_transaction() as sessao:\n"
+        "    sessao['preferencias'] = {'generos': ['Ação', 'RPG'], 'plataformas': ['PC'], "
+        "'modos_jogo': ['Single-player']}\n"
+        "assert cliente.get('/Home_page').status_code == 200",
+    ),
+}
+
+def preparar_artefatos(env):
+    """Gera os artefatos que faltam em um processo separado (o treino importa pandas e scikit-learn)"""
+    subprocess.run([sys.executable, "-c", _PREPARAR], cwd=RAIZ, env=env, check=True,
+                   stdout=subprocess.DEVNULL)
+
+def medir(cenario, env):
+    importar, primeira = CENARIOS[cenario]
+    codigo = _MEDIR.format(importar=importar, primeira=primeira, pesados=PESADOS)
+    inicio = time.perf_counter()
+    saida = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, env=env, check=True,
+                           capture_output=True, text=True).stdout
+    resultado = json.loads(saida.strip().splitlines()[-1])
+    resultado["processo_s"] = time.perf_counter() - inicio
+    return resultado
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", help="catálogo (ARCADE_JOGOS_CSV); padrão fontes/jogos_carac.csv")
+    parser.add_argument("--runs", type=int, default=3, help="processos por cenário (vale a mediana)")
+    parser.add_argument("--scenarios", default=",".join(CENARIOS))
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ)
+    if args.csv:
+        env["ARCADE_JOGOS_CSV"] = str(Path(args.csv).resolve())
+    preparar_artefatos(env)
+
+    resultados = {}
+    falhas = []
+    for cenario in args.scenarios.split(","):
+        execucoes = [medir(cenario, env) for _ in range(args.runs)]
+        resultado = {chave: statistics.median(e[chave] for e in execucoes)
+                     for chave in ("processo_s", "import_s", "pronto_s", "rss_mb", "pico_rss_mb")}
+        resultado["modulos"] = execucoes[0]["modulos"]
+        resultados[cenario] = resultado
+        print(f"{cenario:>13}: import {resultado['import_s'] * 1000:7.0f} ms   "
+              f"first result {resultado['pronto_s'] * 1000:7.0f} ms   "
+              f"process {resultado['processo_s'] * 1000:7.0f} ms   "
+              f"RSS {resultado['rss_mb']:6.1f} MB (peak {resultado['pico_rss_mb']:.1f})   "
+              f"loaded: {', '.join(resultado['modulos']) or '-'}")
+        treino = SO_TREINO.intersection(resultado["modulos"])
+        if treino:
+            falhas.append(f"{cenario} imported {', '.join(sorted(treino))} while serving")
+    print(json.dumps(resultados, indent=2))
+    for falha in falhas:
+        print(f"❌ {falha}")
+    return 1 if falhas else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+"""
+Benchmark suite for the recommender, the data layer and the Flask routes.
+
+Measures SistemaRecomendacao training time and memory, recomendar and
+gerar_recomendacoes latency for synthetic catalogs of several sizes, and
+end-to-end latency of /Home_page, /search and /product/<id> through the
+Flask test client with an in-process database stand-in, and the checkout
+path of Connect_base.ConnectionPool over fake connections.
+
+With --dsn (or ARCADE_BENCH_DSN) the Connect_base data functions are also
+measured against a real, populated database through the connection pool.
+
+Results can be saved as a baseline; later runs are compared against it and
+the command exits with status 1 when a metric is slower than the baseline by
+more than the threshold. Latencies (*_ms) also need to grow by more than
+--floor-ms, so sub-millisecond metrics do not fail on scheduler noise; with
+--runs N every metric is the median of N runs of the suite.
+
+Usage (from the project root):
+    python -m benchmarks.run --quick
+    python -m benchmarks.run --sizes 20,1000,100000,1000000 --save-baseline
+    python -m benchmarks.run --threshold 0.25 --runs 3
+    python -m benchmarks.run --quick --dsn "host=localhost dbname=Arcade_Checkpoint user=postgres"
+"""
+
+import gc
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+import threading
+import numpy as np
+
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+TAMANHOS = [20, 1000, 10_000, 100_000, 1_000_000]
+TAMANHOS_RAPIDOS = [20, 1000, 10_000]
+THRESHOLD = 0.20
+PISO_MS = 0.2          # crescimento absoluto mínimo (ms) para uma latência contar como regressão
+POOL_THREADS = 8       # threads disputando o pool em pool_disputado
+POOL_TAMANHO = 4
+
+PERFIS = [
+    {"generos": ["Ação", "Aventura", "RPG"], "plataformas": ["PC"], "modos_jogo": ["Single-player", "Cooperativo"]},
+    {"generos": ["Puzzle", "Narrativo", "Horror"], "plataformas": ["PlayStation", "Xbox"], "modos_jogo": ["Single-player", "Mundo Aberto"]},
+    {"generos": ["Sandbox", "Simulação", "Estratégia"], "plataformas": ["Nintendo Switch", "Mobile"], "modos_jogo": ["Multiplayer online", "Cooperativo"]},
+]
+
+def medir(funcao, repeticoes, aquecimento=3):
+    for _ in range(aquecimento):
+        funcao()
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    tempos = np.asarray(tempos) * 1000
+    return {"p50_ms": float(np.percentile(tempos, 50)), "p95_ms": float(np.percentile(tempos, 95))}
+
+def aquecer_treino():
+    """Um treino descartável: pandas e scikit-learn são importados só no primeiro treino,
+    e esse custo não pode cair no treino_s do primeiro tamanho medido"""
+    from recomendador_tfidf import SistemaRecomendacao
+
+    SistemaRecomendacao()
+
+def bench_recomendador(tamanho, repeticoes):
+    from recomendador_tfidf import SistemaRecomendacao, gerar_recomendacoes
+    from gen_synthetic_data import gerar_catalogo
+
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = gerar_catalogo(tamanho, semente=0, saida=tmp, formato="csv")
+        gc.collect()
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        sistema = SistemaRecomendacao(caminho_csv=caminho)
+        treino = time.perf_counter() - inicio
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    perfis = iter(PERFIS * (repeticoes + 10))
+    resultados = {
+        "treino_s": treino,
+        "treino_pico_mb": pico / 1024 / 1024,
+    }
+    for nome, stats in (
+        ("recomendar", medir(lambda: sistema.recomendar(**next(perfis), top_n=10), repeticoes)),
+        ("gerar_recomendacoes", medir(lambda: gerar_recomendacoes(sistema, next(perfis), 10), repeticoes)),
+    ):
+        for chave, valor in stats.items():
+            resultados[f"{nome}_{chave}"] = valor
+    return resultados
+
+def bench_rotas(repeticoes):
+    import app as app_module
+    from benchmarks import standin
+
+    standin.instalar(app_module, app_module.modelo.atual)
+    cliente = app_module.app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao["preferencias"] = PERFIS[0]
+
+    def home_sem_cache():
+        app_module.home_cache.invalidate()
+        cliente.get("/Home_page")
+
+    rotas = {
+        "home_page_frio": home_sem_cache,
+        "home_page_cache": lambda: cliente.get("/Home_page"),
+        "search": lambda: cliente.get("/search?q=acao aventura"),
+        "product": lambda: cliente.get("/product/1"),
+    }
+    resultados = {}
+    for nome, funcao in rotas.items():
+        for chave, valor in medir(funcao, repeticoes).items():
+            resultados[f"{nome}_{chave}"] = valor
+    return resultados
+
+def bench_pool(repeticoes):
+    """getconn/putconn do ConnectionPool sobre conexões falsas: o custo do próprio pool
+    (lock, fila de ociosas, métricas), sem a ida ao Postgres"""
+    from benchmarks import standin
+
+    pool = standin.pool_falso(POOL_TAMANHO)
+
+    def checkout():
+        with pool.connection():
+            pass
+
+    def disputado():
+        def trabalhador():
+            for _ in range(50):
+                with pool.connection():
+                    pass
+        threads = [threading.Thread(target=trabalhador) for _ in range(POOL_THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    resultados = {}
+    for nome, funcao in (("checkout", checkout), ("disputado", disputado)):
+        for chave, valor in medir(funcao, repeticoes).items():
+            resultados[f"{nome}_{chave}"] = valor
+    pool.closeall()
+    return resultados
+
+def bench_banco(dsn, repeticoes):
+    """As funções de dados do Connect_base num Postgres populado, pelo pool de conexões"""
+    import psycopg2.extensions
+    import Connect_base
+
+    parametros = psycopg2.extensions.parse_dsn(dsn)
+    anterior = Connect_base._pool
+    Connect_base._pool = Connect_base.ConnectionPool(
+        minconn=1, maxconn=POOL_TAMANHO, cursor_factory=Connect_base.TimedCursor, **parametros)
+    try:
+        produtos = Connect_base.product_ids()
+        if not produtos:
+            print("Banco sem produtos, medições do banco ignoradas")
+            return {}
+        ids = [p[0] for p in produtos[:10]]
+        nomes = [p[1] for p in produtos[:10]]
+        _, _, cursor = Connect_base.catalog_page()
+        funcoes = {
+            "data_version": Connect_base.data_version,
+            "games_by_ids": lambda: Connect_base.games_by_ids(ids),
+            "all_games_filtros": lambda: Connect_base.all_games(nomes),
+            "find_prod": lambda: Connect_base.find_prod(ids[0]),
+            "catalog_primeira": Connect_base.catalog_page,
+            "catalog_seguinte": lambda: Connect_base.catalog_page(cursor),
+        }
+        resultados = {}
+        for nome, funcao in funcoes.items():
+            for chave, valor in medir(funcao, repeticoes).items():
+                resultados[f"{nome}_{chave}"] = valor
+        return resultados
+    finally:
+        Connect_base._pool.closeall()
+        Connect_base._pool = anterior
+
+def mediana(execucoes):
+    """Mediana, métrica a métrica, de várias execuções da suíte"""
+    return {
+        grupo: {nome: float(np.median([e[grupo][nome] for e in execucoes])) for nome in metricas}
+        for grupo, metricas in execucoes[0].items()
+    }
+
+def comparar(resultados, baseline, threshold, piso_ms=PISO_MS):
+    regressoes = []
+    for grupo, metricas in resultados.items():
+        for nome, valor in metricas.items():
+            anterior = baseline.get(grupo, {}).get(nome)
+            if anterior is None or anterior <= 0:
+                continue
+            variacao = (valor - anterior) / anterior
+            limite = threshold * anterior
+            if nome.endswith("_ms"):
+                limite = max(limite, piso_ms)
+            regrediu = valor - anterior > limite
+            marca = "❌" if regrediu else "  "
+            print(f"{marca} {grupo:>16} {nome:<28} {anterior:10.3f} -> {valor:10.3f} ({variacao:+.0%})")
+            if regrediu:
+                regressoes.append((grupo, nome, anterior, valor))
+    return regressoes
+
+def executar(tamanhos, repeticoes, rotas, dsn):
+    resultados = {}
+    for tamanho in tamanhos:
+        print(f"Recomendador com {tamanho:,} jogos...")
+        resultados[f"jogos={tamanho}"] = bench_recomendador(tamanho, repeticoes)
+    if rotas:
+        print("Rotas Flask...")
+        resultados["rotas"] = bench_rotas(repeticoes)
+    print("Pool de conexões...")
+    resultados["pool"] = bench_pool(repeticoes)
+    if dsn:
+        print("Banco de dados...")
+        banco = bench_banco(dsn, repeticoes)
+        if banco:
+            resultados["banco"] = banco
+    return resultados
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", help="comma-separated catalog sizes")
+    parser.add_argument("--quick", action="store_true", help=f"only sizes {TAMANHOS_RAPIDOS}")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--no-routes", action="store_true")
+    parser.add_argument("--baseline", default=str(BASELINE))
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--floor-ms", type=float, default=PISO_MS,
+                        help="minimum absolute growth (ms) for a latency to count as a regression")
+    parser.add_argument("--runs", type=int, default=1, help="run the suite N times and keep the median")
+    parser.add_argument("--dsn", default=os.environ.get("ARCADE_BENCH_DSN"),
+                        help="libpq DSN of a populated database (default: $ARCADE_BENCH_DSN)")
+    args = parser.parse_args(argv)
+
+    if args.sizes:
+        tamanhos = [int(t) for t in args.sizes.split(",")]
+    else:
+        tamanhos = TAMANHOS_RAPIDOS if args.quick else TAMANHOS
+
+    aquecer_treino()
+    execucoes = [executar(tamanhos, args.repeat, not args.no_routes, args.dsn)
+                 for _ in range(max(1, args.runs))]
+    resultados = mediana(execucoes)
+
+    print(json.dumps(resultados, indent=2))
+
+    caminho = Path(args.baseline)
+    if args.save_baseline:
+        caminho.write_text(json.dumps(resultados, indent=2))
+        print(f"Baseline salvo em {caminho}")
+        return 0
+    if caminho.exists():
+        regressoes = comparar(resultados, json.loads(caminho.read_text()), args.threshold, args.floor_ms)
+        if regressoes:
+            print(f"{len(regressoes)} métrica(s) acima do limite de {args.threshold:.0%} (piso de {args.floor_ms} ms)")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
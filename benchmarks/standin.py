@@ -0,0 +1,75 @@
+"""
+In-process stand-in for the Postgres-backed functions used by app.py, so
+the Flask routes can be benchmarked without a database.
+"""
+
+from unittest import mock
+import psycopg2
+import psycopg2.extensions
+import Connect_base
+from image_index import get_image_index
+
+def instalar(app_module, sistema):
+    """Replaces the data functions in app.py (and Connect_base) with in-memory versions"""
+    rows = [
+        (i + 1, str(nome), str(genero), str(plataforma), str(modo), 99.90, 4.25)
+        for i, (nome, genero, plataforma, modo) in enumerate(sistema.catalogo.registros())
+    ]
+    por_id = {row[0]: row for row in rows}
+    por_nome = {row[1]: row for row in rows}
+    imagens = get_image_index()
+
+    def all_games(filtros=None):
+        result = [por_nome[n] for n in filtros if n in por_nome] if filtros else rows
+        return result, imagens.lookup_many([r[1] for r in result])
+
+    def games_by_ids(ids):
+        result = [por_id[i] for i in ids if i in por_id]
+        return result, imagens.lookup_many([r[1] for r in result])
+
+    def find_prod(product_id):
+        product = por_id.get(product_id)
+        if not product:
+            return "Produto não encontrado", 404
+        return product, imagens.lookup(product[1])
+
+    def catalog_rows():
+        return [row[:6] for row in rows]
+
+    funcoes = {
+        "all_games": all_games,
+        "games_by_ids": games_by_ids,
+        "find_prod": find_prod,
+        "product_ids": lambda: [(row[0], row[1], row[5]) for row in rows],
+        "user_ratings": lambda username: {},
+        "data_version": lambda: 1,
+    }
+    for nome, funcao in funcoes.items():
+        setattr(app_module, nome, funcao)
+    Connect_base.catalog_rows = catalog_rows
+    return rows
+
+class ConexaoFalsa:
+    """Minimal psycopg2 connection double for benchmarking the pool checkout path"""
+
+    class _Info:
+        transaction_status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def __init__(self, *args, **kwargs):
+        self.closed = 0
+        self.info = self._Info()
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+
+def pool_falso(tamanho):
+    """A Connect_base.ConnectionPool holding `tamanho` ConexaoFalsa objects.
+
+    Every connection is opened up front (minconn == maxconn) so getconn never
+    reaches psycopg2.connect after construction.
+    """
+    with mock.patch.object(psycopg2, "connect", ConexaoFalsa):
+        return Connect_base.ConnectionPool(minconn=tamanho, maxconn=tamanho, dsn="")
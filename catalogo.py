@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+Catálogo de jogos em colunas compactas
+
+O recomendador só precisa do catálogo para montar os resultados (nome,
+gênero, plataforma, modo de jogo), aplicar os filtros e achar um jogo pelo
+nome. Em vez de um DataFrame com uma string Python por célula, cada coluna
+fica em arrays NumPy:
+
+  - nomes: um buffer UTF-8 com o deslocamento de cada nome; só os nomes que
+    saem em um resultado são decodificados;
+  - gênero, plataforma e modo de jogo: códigos inteiros para as combinações
+    distintas ("PC, PlayStation"...), que são poucas e ficam internadas;
+  - preço em float64;
+  - índice de nomes: as chaves normalizadas (chave_nome) em ordem, no mesmo
+    formato de buffer, consultadas por busca binária.
+
+Os arrays podem vir de arquivos .npy mapeados (artefatos.py), e aí workers
+criados por fork compartilham as mesmas páginas.
+"""
+
+import sys
+import numpy as np
+from normalizacao import chave_nome
+
+def _tipo_codigo(n):
+    return np.int16 if n <= np.iinfo(np.int16).max else np.int32
+
+class Textos:
+    """Strings em um buffer UTF-8 (uint8) com os deslocamentos de cada uma (n + 1)"""
+
+    def __init__(self, buffer, deslocamentos):
+        self.buffer = buffer
+        self.deslocamentos = deslocamentos
+
+    @classmethod
+    def de_lista(cls, textos):
+        codificados = [str(texto).encode("utf-8") for texto in textos]
+        deslocamentos = np.zeros(len(codificados) + 1, dtype=np.int64)
+        np.cumsum([len(c) for c in codificados], out=deslocamentos[1:])
+        return cls(np.frombuffer(b"".join(codificados), dtype=np.uint8), deslocamentos)
+
+    def __len__(self):
+        return len(self.deslocamentos) - 1
+
+    def __getitem__(self, i):
+        return self.buffer[self.deslocamentos[i]:self.deslocamentos[i + 1]].tobytes().decode("utf-8")
+
+    def lista(self, indices=None):
+        """Strings das posições `indices` (todas, se None)"""
+        buffer = memoryview(self.buffer)
+        if indices is None:
+            inicios, fins = self.deslocamentos[:-1].tolist(), self.deslocamentos[1:].tolist()
+        else:
+            indices = np.asarray(indices, dtype=np.int64)
+            inicios, fins = self.deslocamentos[indices].tolist(), self.deslocamentos[indices + 1].tolist()
+        return [str(buffer[a:b], "utf-8") for a, b in zip(inicios, fins)]
+
+class Categorica:
+    """Coluna de texto guardada como códigos para um array de categorias"""
+
+    def __init__(self, categorias, codigos):
+        self.categorias = np.array([sys.intern(str(c)) for c in categorias], dtype=object)
+        self.codigos = codigos
+
+    @classmethod
+    def de_valores(cls, valores):
+        categorias, codigos = np.unique(np.asarray(valores, dtype=str), return_inverse=True)
+        return cls(categorias, codigos.astype(_tipo_codigo(len(categorias))))
+
+    def __len__(self):
+        return len(self.codigos)
+
+    def __getitem__(self, indices):
+        return self.categorias[self.codigos[indices]]
+
+    def acrescentar(self, valores):
+        posicao = {categoria: i for i, categoria in enumerate(self.categorias)}
+        categorias = list(self.categorias)
+        novos = []
+        for valor in valores:
+            valor = str(valor)
+            if valor not in posicao:
+                posicao[valor] = len(categorias)
+                categorias.append(valor)
+            novos.append(posicao[valor])
+        tipo = _tipo_codigo(len(categorias))
+        return Categorica(categorias, np.concatenate([np.asarray(self.codigos, dtype=tipo),
+                                                      np.asarray(novos, dtype=tipo)]))
+
+    def subconjunto(self, linhas):
+        usadas, codigos = np.unique(self.codigos[linhas], return_inverse=True)
+        return Categorica(self.categorias[usadas], codigos.astype(_tipo_codigo(len(usadas))))
+
+class IndiceNomes:
+    """Posição de cada jogo pela chave do nome; em nomes repetidos vale a primeira linha"""
+
+    def __init__(self, chaves, posicoes):
+        self.chaves = chaves
+        self.posicoes = posicoes
+
+    @classmethod
+    def de_nomes(cls, nomes):
+        chaves = [chave_nome(nome) for nome in nomes]
+        ordem = sorted(range(len(chaves)), key=chaves.__getitem__)
+        unicas = [i for j, i in enumerate(ordem) if j == 0 or chaves[i] != chaves[ordem[j - 1]]]
+        return cls(Textos.de_lista([chaves[i] for i in unicas]), np.asarray(unicas, dtype=np.int64))
+
+    def procurar(self, chave):
+        inicio, fim = 0, len(self.chaves)
+        while inicio < fim:
+            meio = (inicio + fim) // 2
+            if self.chaves[meio] < chave:
+                inicio = meio + 1
+            else:
+                fim = meio
+        if inicio < len(self.chaves) and self.chaves[inicio] == chave:
+            return int(self.posicoes[inicio])
+        return None
+
+    def como_dict(self):
+        """Chave -> posição de todos os jogos, para consultas em massa"""
+        return dict(zip(self.chaves.lista(), self.posicoes.tolist()))
+
+class CatalogoColunar:
+    def __init__(self, nomes, generos, plataformas, modos, precos):
+        self.nomes = nomes
+        self.generos = generos
+        self.plataformas = plataformas
+        self.modos = modos
+        self.precos = precos
+
+    @classmethod
+    def de_colunas(cls, nomes, generos, plataformas, modos, precos=None):
+        nomes = Textos.de_lista(nomes)
+        precos = (np.full(len(nomes), np.nan) if precos is None
+                  else np.asarray(precos, dtype=np.float64))
+        return cls(nomes, Categorica.de_valores(generos), Categorica.de_valores(plataformas),
+                   Categorica.de_valores(modos), precos)
+
+    def __len__(self):
+        return len(self.nomes)
+
+    def registros(self, indices=None):
+        """(nome, gênero, plataforma, modo de jogo) das linhas `indices` (todas, se None)"""
+        if indices is None:
+            indices = np.arange(len(self))
+        return zip(self.nomes.lista(indices), self.generos[indices],
+                   self.plataformas[indices], self.modos[indices])
+
+    def descricoes(self):
+        """Texto de cada jogo para o TF-IDF ("gênero plataforma modo")"""
+        return [f"{g} {p} {m}" for g, p, m in zip(self.generos[:], self.plataformas[:], self.modos[:])]
+
+    def com_precos(self, precos):
+        return CatalogoColunar(self.nomes, self.generos, self.plataformas, self.modos,
+                               np.asarray(precos, dtype=np.float64))
+
+    def acrescentar(self, nomes, generos, plataformas, modos, precos):
+        novos = Textos.de_lista(nomes)
+        nomes = Textos(np.concatenate([self.nomes.buffer, novos.buffer]),
+                       np.concatenate([self.nomes.deslocamentos,
+                                       novos.deslocamentos[1:] + self.nomes.deslocamentos[-1]]))
+        return CatalogoColunar(nomes, self.generos.acrescentar(generos),
+                               self.plataformas.acrescentar(plataformas), self.modos.acrescentar(modos),
+                               np.concatenate([self.precos, np.asarray(precos, dtype=np.float64)]))
+
+    def subconjunto(self, linhas):
+        """Catálogo só com as `linhas` (máscara booleana ou índices)"""
+        indices = np.arange(len(self))[linhas]
+        return CatalogoColunar(Textos.de_lista(self.nomes.lista(indices)),
+                               self.generos.subconjunto(indices),
+                               self.plataformas.subconjunto(indices),
+                               self.modos.subconjunto(indices), self.precos[indices])
+
+    def colunas(self):
+        """Arrays para gravar no artefato (o inverso de de_artefato)"""
+        colunas = {"nome_utf8": self.nomes.buffer, "nome_deslocamentos": self.nomes.deslocamentos}
+        for nome, coluna in (("genero", self.generos), ("plataforma", self.plataformas),
+                             ("modo_jogo", self.modos)):
+            colunas[f"{nome}_categorias"] = coluna.categorias
+            colunas[f"{nome}_codigos"] = coluna.codigos
+        colunas["preco"] = self.precos
+        return colunas
+
+    @classmethod
+    def de_artefato(cls, colunas):
+        def categorica(nome):
+            return Categorica(colunas[f"{nome}_categorias"], colunas[f"{nome}_codigos"])
+
+        return cls(Textos(colunas["nome_utf8"], colunas["nome_deslocamentos"]),
+                   categorica("genero"), categorica("plataforma"), categorica("modo_jogo"),
+                   colunas["preco"])
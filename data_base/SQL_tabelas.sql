@@ -1,7 +1,7 @@
 CREATE TABLE IF NOT EXISTS CLIENT (
     ID_CLIENT SERIAL PRIMARY KEY,
     USERNAME VARCHAR(50) UNIQUE NOT NULL,
-    PASSWORD_HASH VARCHAR(255) NOT NULL,
+    PASSWORD_HASH VARCHAR(255) NOT NULL
 );
 
 CREATE TABLE IF NOT EXISTS PRODUCT (
@@ -21,6 +21,134 @@ CREATE TABLE IF NOT EXISTS RATING (
     PRIMARY KEY (ID_CLIENT, ID_PRODUCT)
 );
 
+/* Estatísticas de avaliação por produto, mantidas pelos triggers abaixo */
+CREATE TABLE IF NOT EXISTS PRODUCT_RATING_STATS (
+    ID_PRODUCT INT PRIMARY KEY,
+    RATING_COUNT BIGINT NOT NULL DEFAULT 0,
+    RATING_SUM BIGINT NOT NULL DEFAULT 0,
+    AVERAGE_RATING NUMERIC(4,2) GENERATED ALWAYS AS (
+        CASE WHEN RATING_COUNT > 0 THEN ROUND(RATING_SUM::NUMERIC / RATING_COUNT, 2) END
+    ) STORED
+);
+
+/* Bancos criados antes da coluna AVERAGE_RATING */
+ALTER TABLE PRODUCT_RATING_STATS ADD COLUMN IF NOT EXISTS AVERAGE_RATING NUMERIC(4,2) GENERATED ALWAYS AS (
+    CASE WHEN RATING_COUNT > 0 THEN ROUND(RATING_SUM::NUMERIC / RATING_COUNT, 2) END
+) STORED;
+
+/* Ordem estável da listagem do catálogo (média desc, id) para paginação por chave */
+CREATE INDEX IF NOT EXISTS product_rating_stats_catalog_order
+    ON PRODUCT_RATING_STATS (AVERAGE_RATING DESC, ID_PRODUCT)
+    WHERE RATING_COUNT > 0;
+
+/* Aplica a diferença entre as linhas novas e antigas de um comando em RATING */
+CREATE OR REPLACE FUNCTION apply_rating_stats_delta() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO PRODUCT_RATING_STATS AS s (ID_PRODUCT, RATING_COUNT, RATING_SUM)
+        SELECT ID_PRODUCT, COUNT(*), COALESCE(SUM(RATING), 0)
+        FROM new_rows GROUP BY ID_PRODUCT
+        ON CONFLICT (ID_PRODUCT) DO UPDATE
+        SET RATING_COUNT = s.RATING_COUNT + EXCLUDED.RATING_COUNT,
+            RATING_SUM = s.RATING_SUM + EXCLUDED.RATING_SUM;
+
+    ELSIF TG_OP = 'UPDATE' THEN
+        INSERT INTO PRODUCT_RATING_STATS AS s (ID_PRODUCT, RATING_COUNT, RATING_SUM)
+        SELECT ID_PRODUCT, SUM(delta_count), SUM(delta_sum)
+        FROM (
+            SELECT ID_PRODUCT, 1 AS delta_count, COALESCE(RATING, 0) AS delta_sum FROM new_rows
+            UNION ALL
+            SELECT ID_PRODUCT, -1, -COALESCE(RATING, 0) FROM old_rows
+        ) d
+        GROUP BY ID_PRODUCT
+        ON CONFLICT (ID_PRODUCT) DO UPDATE
+        SET RATING_COUNT = s.RATING_COUNT + EXCLUDED.RATING_COUNT,
+            RATING_SUM = s.RATING_SUM + EXCLUDED.RATING_SUM;
+
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE PRODUCT_RATING_STATS s
+        SET RATING_COUNT = s.RATING_COUNT - d.cnt,
+            RATING_SUM = s.RATING_SUM - d.total
+        FROM (
+            SELECT ID_PRODUCT, COUNT(*) AS cnt, COALESCE(SUM(RATING), 0) AS total
+            FROM old_rows GROUP BY ID_PRODUCT
+        ) d
+        WHERE s.ID_PRODUCT = d.ID_PRODUCT;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+/* Versão dos dados de catálogo e avaliações, usada pelo cache da Home_page.
+   Só os comandos em PRODUCT (raros) mudam a versão pelo trigger. Em RATING o UPDATE
+   desta linha única travaria todos os escritores até o commit e invalidaria as páginas
+   de todos os usuários a cada avaliação; quem grava avaliações em lote (bulk_load.py,
+   rating_stats.py rebuild) soma 1 à versão uma vez, no fim. */
+CREATE TABLE IF NOT EXISTS DATA_VERSION (
+    ID INT PRIMARY KEY DEFAULT 1 CHECK (ID = 1),
+    VERSION BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO DATA_VERSION (ID, VERSION) VALUES (1, 0) ON CONFLICT (ID) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_data_version() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE DATA_VERSION SET VERSION = VERSION + 1 WHERE ID = 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS product_data_version ON PRODUCT;
+CREATE TRIGGER product_data_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON PRODUCT
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version();
+
+DROP TRIGGER IF EXISTS rating_data_version ON RATING;
+
+/* Triggers por comando: um INSERT ... ON CONFLICT DO UPDATE em lote dispara cada um uma vez */
+DROP TRIGGER IF EXISTS rating_stats_insert ON RATING;
+CREATE TRIGGER rating_stats_insert AFTER INSERT ON RATING
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_rating_stats_delta();
+
+DROP TRIGGER IF EXISTS rating_stats_update ON RATING;
+CREATE TRIGGER rating_stats_update AFTER UPDATE ON RATING
+    REFERENCING NEW TABLE AS new_rows OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_rating_stats_delta();
+
+DROP TRIGGER IF EXISTS rating_stats_delete ON RATING;
+CREATE TRIGGER rating_stats_delete AFTER DELETE ON RATING
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_rating_stats_delta();
+
+/* TRUNCATE não tem tabela de transição nem dispara o trigger de DELETE: zera tudo */
+CREATE OR REPLACE FUNCTION clear_rating_stats() RETURNS TRIGGER AS $$
+BEGIN
+    DELETE FROM PRODUCT_RATING_STATS;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS rating_stats_truncate ON RATING;
+CREATE TRIGGER rating_stats_truncate AFTER TRUNCATE ON RATING
+    FOR EACH STATEMENT EXECUTE FUNCTION clear_rating_stats();
+
+/* Preenche as estatísticas com as avaliações que já existiam antes dos triggers.
+   Pode rodar de novo: recalcula tudo a partir de RATING (o mesmo que rating_stats.py rebuild) */
+BEGIN;
+LOCK TABLE RATING IN SHARE MODE;
+INSERT INTO PRODUCT_RATING_STATS AS s (ID_PRODUCT, RATING_COUNT, RATING_SUM)
+SELECT ID_PRODUCT, COUNT(*), COALESCE(SUM(RATING), 0)
+FROM RATING
+GROUP BY ID_PRODUCT
+ON CONFLICT (ID_PRODUCT) DO UPDATE
+SET RATING_COUNT = EXCLUDED.RATING_COUNT,
+    RATING_SUM = EXCLUDED.RATING_SUM;
+UPDATE PRODUCT_RATING_STATS s
+SET RATING_COUNT = 0, RATING_SUM = 0
+WHERE s.RATING_COUNT <> 0
+  AND NOT EXISTS (SELECT 1 FROM RATING r WHERE r.ID_PRODUCT = s.ID_PRODUCT);
+COMMIT;
+
 
 INSERT INTO PRODUCT (NAME_PRODUCT, GENRE, PLATFORM, GAME_MODE, PRICE)
 VALUES ('Spider-Man: Miles Morales', 'Ação / Aventura', 'PlayStation', 'Single-player, Mundo Aberto', 130.84);
@@ -109,4 +237,15 @@ FROM PRODUCT p
 JOIN RATING r ON p.ID_PRODUCT = r.ID_PRODUCT
 GROUP BY p.ID_PRODUCT, p.NAME_PRODUCT, p.GENRE, p.PLATFORM, p.GAME_MODE, p.PRICE
 ORDER BY average_rating DESC
+LIMIT 4;
+
+/* Melhores avaliados (pelas estatísticas incrementais) */
+SELECT 
+    p.ID_PRODUCT,
+    p.NAME_PRODUCT,
+    ROUND(s.RATING_SUM::NUMERIC / s.RATING_COUNT, 2) AS average_rating
+FROM PRODUCT p
+JOIN PRODUCT_RATING_STATS s ON p.ID_PRODUCT = s.ID_PRODUCT
+WHERE s.RATING_COUNT > 0
+ORDER BY average_rating DESC
 LIMIT 4;
\ No newline at end of file
@@ -0,0 +1,163 @@
+"""
+Streaming bulk loader for CLIENT and RATING.
+
+CSV files are read in chunks and each chunk is sent with COPY into a
+temporary staging table, then merged set-wise into the real table. Memory use
+depends only on the chunk size, not on the file size.
+
+Usage (from the project root):
+    python -m data_base.bulk_load users fontes/usuarios.csv
+    python -m data_base.bulk_load ratings fontes/matriz_utilidade.csv --users fontes/usuarios.csv
+    python -m data_base.bulk_load ratings ratings.csv            # USERNAME,ID_PRODUCT,RATING
+
+Ratings come either in the long format above or as a utility matrix with one
+row per user (in the same order as the users file) and one ProdutoN column
+per product.
+"""
+
+import io
+import re
+import csv
+import sys
+import time
+import argparse
+from itertools import islice
+from Connect_base import get_pool, BUMP_DATA_VERSION
+
+CHUNK_ROWS = 50_000
+PRODUCT_COLUMN = re.compile(r"^Produto(\d+)$")
+
+STAGE_CLIENT = """
+    CREATE TEMP TABLE IF NOT EXISTS STAGE_CLIENT (
+        USERNAME TEXT,
+        PASSWORD_HASH TEXT
+    ) ON COMMIT DELETE ROWS
+"""
+
+STAGE_RATING = """
+    CREATE TEMP TABLE IF NOT EXISTS STAGE_RATING (
+        USERNAME TEXT,
+        ID_PRODUCT INT,
+        RATING INT
+    ) ON COMMIT DELETE ROWS
+"""
+
+MERGE_CLIENT = """
+    INSERT INTO CLIENT (USERNAME, PASSWORD_HASH)
+    SELECT DISTINCT ON (USERNAME) USERNAME, PASSWORD_HASH
+    FROM STAGE_CLIENT
+    ORDER BY USERNAME
+    ON CONFLICT (USERNAME) DO NOTHING
+"""
+
+MERGE_RATING = """
+    INSERT INTO RATING (ID_CLIENT, ID_PRODUCT, RATING)
+    SELECT DISTINCT ON (c.ID_CLIENT, s.ID_PRODUCT) c.ID_CLIENT, s.ID_PRODUCT, s.RATING
+    FROM STAGE_RATING s
+    JOIN CLIENT c ON c.USERNAME = s.USERNAME
+    WHERE s.RATING BETWEEN 1 AND 5
+    ORDER BY c.ID_CLIENT, s.ID_PRODUCT
+    ON CONFLICT (ID_CLIENT, ID_PRODUCT) DO UPDATE SET RATING = EXCLUDED.RATING
+"""
+
+class Progress:
+    def __init__(self, label):
+        self.label = label
+        self.start = time.perf_counter()
+        self.read = 0
+        self.written = 0
+
+    def update(self, read, written):
+        self.read += read
+        self.written += written
+        elapsed = time.perf_counter() - self.start
+        rate = self.read / elapsed if elapsed > 0 else 0.0
+        print(f"{self.label}: {self.read:,} rows read, {self.written:,} merged ({rate:,.0f} rows/s)")
+
+    def done(self):
+        elapsed = time.perf_counter() - self.start
+        rate = self.read / elapsed if elapsed > 0 else 0.0
+        print(f"✅ {self.label} finished: {self.read:,} rows in {elapsed:.1f}s ({rate:,.0f} rows/s)")
+
+def chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+def copy_chunk(cur, table, columns, chunk):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(chunk)
+    buffer.seek(0)
+    cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+def load(stage_ddl, table, columns, merge, rows, label, chunk_rows=CHUNK_ROWS, bump_version=False):
+    progress = Progress(label)
+    with get_pool().connection() as conn, conn.cursor() as cur:
+        cur.execute(stage_ddl)
+        conn.commit()
+        for chunk in chunks(rows, chunk_rows):
+            copy_chunk(cur, table, columns, chunk)
+            cur.execute(merge)
+            merged = cur.rowcount
+            conn.commit()  # staging rows are dropped on commit
+            progress.update(len(chunk), merged)
+        if bump_version and progress.written:
+            # one version bump for the whole load invalidates the cached Home pages
+            cur.execute(BUMP_DATA_VERSION)
+            conn.commit()
+    progress.done()
+
+def user_rows(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            yield row["USERNAME"], row["PASSWORD_HASH"]
+
+def long_rating_rows(reader):
+    for row in reader:
+        yield row["USERNAME"], row["ID_PRODUCT"], row["RATING"]
+
+def matrix_rating_rows(reader, users_path):
+    product_ids = []
+    for column in reader.fieldnames:
+        match = PRODUCT_COLUMN.match(column.strip())
+        if not match:
+            raise SystemExit(f"Unexpected column in utility matrix: {column!r}")
+        product_ids.append((column, match.group(1)))
+
+    # the matrix has no usernames: row i belongs to user i of the users file
+    for (username, _), row in zip(user_rows(users_path), reader):
+        for column, product_id in product_ids:
+            rating = (row[column] or "").strip()
+            if rating and rating != "0":
+                yield username, product_id, rating
+
+def rating_rows(path, users_path=None):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        if {"USERNAME", "ID_PRODUCT", "RATING"} <= set(reader.fieldnames or ()):
+            yield from long_rating_rows(reader)
+        elif users_path:
+            yield from matrix_rating_rows(reader, users_path)
+        else:
+            raise SystemExit("Utility-matrix ratings need --users with the matching users file.")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="COPY-based bulk loader for CLIENT and RATING")
+    parser.add_argument("kind", choices=["users", "ratings"])
+    parser.add_argument("path")
+    parser.add_argument("--users", help="users CSV matching the rows of a utility matrix")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args(argv)
+
+    if args.kind == "users":
+        load(STAGE_CLIENT, "STAGE_CLIENT", ["USERNAME", "PASSWORD_HASH"], MERGE_CLIENT,
+             user_rows(args.path), "CLIENT", args.chunk_rows)
+    else:
+        load(STAGE_RATING, "STAGE_RATING", ["USERNAME", "ID_PRODUCT", "RATING"], MERGE_RATING,
+             rating_rows(args.path, args.users), "RATING", args.chunk_rows, bump_version=True)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
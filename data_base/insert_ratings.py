@@ -1,6 +1,6 @@
 import psycopg2
 import pandas as pd
-from Connect_base import Connect_Base
+from Connect_base import Connect_Base, BUMP_DATA_VERSION
 # ---------- CONFIG ----------
 CSV_USERS = r"C:/Users/faust/Desktop/Sistema de Recomendação/fontes/usuarios.csv"
 CSV_RATINGS = r"C:/Users/faust/Desktop/Sistema de Recomendação/fontes/matriz_utilidade.csv"
@@ -80,6 +80,7 @@ for i in range(0, num_users, BATCH_USER_RATINGS):
         for product_id, rating in enumerate(row, start=1):
             vals.append(cur.mogrify("(%s,%s,%s)", (int(id_client), int(product_id), int(rating))).decode('utf-8'))
 
+    # PRODUCT_RATING_STATS é atualizada pelos triggers de RATING (SQL_tabelas.sql)
     if vals:
         sql = ("INSERT INTO RATING (ID_CLIENT, ID_PRODUCT, RATING) VALUES " + ",".join(vals)
                + " ON CONFLICT (ID_CLIENT, ID_PRODUCT) DO UPDATE SET RATING = EXCLUDED.RATING")
@@ -87,6 +88,10 @@ for i in range(0, num_users, BATCH_USER_RATINGS):
         conn.commit()
     print(f"✅ Inseridas/atualizadas avaliações para usuários {i+1} até {i+len(block)}")
 
+# a versão dos dados (cache da Home_page) muda uma vez, no fim da carga
+cur.execute(BUMP_DATA_VERSION)
+conn.commit()
+
 cur.close()
 conn.close()
 print("Tudo finalizado com sucesso.")
@@ -0,0 +1,73 @@
+"""
+Reconstrói ou confere PRODUCT_RATING_STATS a partir da tabela RATING.
+
+As estatísticas normalmente são mantidas pelos triggers do SQL_tabelas.sql;
+este comando preenche a tabela do zero e mostra as diferenças encontradas.
+
+Uso (na raiz do projeto):
+    python -m data_base.rating_stats verify
+    python -m data_base.rating_stats rebuild
+"""
+
+import sys
+from Connect_base import get_pool, BUMP_DATA_VERSION
+
+DRIFT_QUERY = """
+    SELECT
+        COALESCE(s.ID_PRODUCT, r.ID_PRODUCT) AS id_product,
+        COALESCE(s.RATING_COUNT, 0) AS stored_count,
+        COALESCE(r.cnt, 0) AS real_count,
+        COALESCE(s.RATING_SUM, 0) AS stored_sum,
+        COALESCE(r.total, 0) AS real_sum
+    FROM PRODUCT_RATING_STATS s
+    FULL OUTER JOIN (
+        SELECT ID_PRODUCT, COUNT(*) AS cnt, COALESCE(SUM(RATING), 0) AS total
+        FROM RATING
+        GROUP BY ID_PRODUCT
+    ) r ON s.ID_PRODUCT = r.ID_PRODUCT
+    WHERE COALESCE(s.RATING_COUNT, 0) <> COALESCE(r.cnt, 0)
+       OR COALESCE(s.RATING_SUM, 0) <> COALESCE(r.total, 0)
+    ORDER BY 1
+"""
+
+def verify():
+    with get_pool().connection() as conn, conn.cursor() as cur:
+        cur.execute(DRIFT_QUERY)
+        drift = cur.fetchall()
+        conn.rollback()
+
+    if not drift:
+        print("✅ PRODUCT_RATING_STATS está consistente com RATING.")
+        return []
+
+    print(f"❌ {len(drift)} produto(s) com diferença:")
+    for id_product, stored_count, real_count, stored_sum, real_sum in drift:
+        print(f"   produto {id_product}: contagem {stored_count} -> {real_count}, soma {stored_sum} -> {real_sum}")
+    return drift
+
+def rebuild():
+    with get_pool().connection() as conn, conn.cursor() as cur:
+        # o modo SHARE bloqueia escritas em RATING (e seus triggers) durante o recálculo
+        cur.execute("LOCK TABLE RATING IN SHARE MODE")
+        cur.execute(DRIFT_QUERY)
+        drift = cur.fetchall()
+        cur.execute("TRUNCATE PRODUCT_RATING_STATS")
+        cur.execute("""
+            INSERT INTO PRODUCT_RATING_STATS (ID_PRODUCT, RATING_COUNT, RATING_SUM)
+            SELECT ID_PRODUCT, COUNT(*), COALESCE(SUM(RATING), 0)
+            FROM RATING
+            GROUP BY ID_PRODUCT
+        """)
+        rows = cur.rowcount
+        cur.execute(BUMP_DATA_VERSION)
+        conn.commit()
+
+    print(f"Estatísticas reconstruídas para {rows} produto(s); {len(drift)} estavam diferentes.")
+    return drift
+
+if __name__ == "__main__":
+    commands = {"verify": verify, "rebuild": rebuild}
+    if len(sys.argv) != 2 or sys.argv[1] not in commands:
+        raise SystemExit(__doc__)
+    drift = commands[sys.argv[1]]()
+    sys.exit(1 if sys.argv[1] == "verify" and drift else 0)
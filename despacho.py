@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+Despacho em lote das recomendações
+
+Requisições simultâneas da Home_page chegam ao recomendador uma a uma, e cada
+uma faz seu próprio transform e produto esparso contra a matriz inteira. O
+despacho junta os pedidos que chegam dentro de uma janela curta (ou até
+`max_lote` pedidos), pontua todos com um único recomendar_lote() em uma
+thread própria e entrega a cada chamador o seu top-k por um Future.
+
+Os tempos de espera na fila e os tamanhos dos lotes vão para o /metrics
+(arcade_batch_queue_wait_seconds e arcade_batch_size).
+"""
+
+import os
+import time
+import queue
+import threading
+from concurrent.futures import Future
+import metrics
+from recomendador_tfidf import PESO_COLABORATIVO
+
+# segundos que o primeiro pedido de um lote espera por companhia (0 desliga o despacho)
+JANELA_LOTE = float(os.environ.get("ARCADE_LOTE_JANELA", 0.002))
+MAX_LOTE = int(os.environ.get("ARCADE_LOTE_MAX", 32))
+TIMEOUT_LOTE = float(os.environ.get("ARCADE_LOTE_TIMEOUT", 10.0))
+
+class _Pedido:
+    __slots__ = ("sistema", "perfil", "top_n", "futuro", "chegada")
+
+    def __init__(self, sistema, perfil, top_n):
+        self.sistema = sistema
+        self.perfil = perfil
+        self.top_n = top_n
+        self.futuro = Future()
+        self.chegada = time.perf_counter()
+
+def _falhar(pedidos, erro):
+    """Entrega `erro` aos pedidos que ainda não têm resposta"""
+    for pedido in pedidos:
+        if not pedido.futuro.done():
+            pedido.futuro.set_exception(erro)
+
+class DespachoRecomendacoes:
+    def __init__(self, janela=JANELA_LOTE, max_lote=MAX_LOTE, nome="home"):
+        self.janela = janela
+        self.max_lote = max(1, max_lote)
+        self.nome = nome
+        self._fila = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {"lotes": 0, "pedidos": 0, "maior_lote": 0}
+
+    @property
+    def ativo(self):
+        return self.janela > 0
+
+    def _iniciar(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._laco, name=f"despacho-{self.nome}",
+                                                    daemon=True)
+                    self._thread.start()
+
+    def enviar(self, sistema, perfil, top_n=10):
+        """Coloca o perfil na fila; o Future recebe a lista de recomendações"""
+        self._iniciar()
+        pedido = _Pedido(sistema, perfil, top_n)
+        self._fila.put(pedido)
+        return pedido.futuro
+
+    def recomendar(self, sistema, perfil, top_n=10, timeout=TIMEOUT_LOTE):
+        with metrics.timed("recommend_batch"):
+            return self.enviar(sistema, perfil, top_n).result(timeout)
+
+    def para(self, sistema):
+        """`sistema` com recomendar() passando pelo despacho (ou ele mesmo, se o despacho está desligado)"""
+        return SistemaEmLote(self, sistema) if self.ativo else sistema
+
+    def _coletar(self):
+        """Bloqueia até o primeiro pedido e junta os que chegarem dentro da janela"""
+        primeiro = self._fila.get()
+        if primeiro is None:
+            return None, True
+        lote = [primeiro]
+        limite = time.perf_counter() + self.janela
+        while len(lote) < self.max_lote:
+            restante = limite - time.perf_counter()
+            try:
+                pedido = self._fila.get(timeout=restante) if restante > 0 else self._fila.get_nowait()
+            except queue.Empty:
+                break
+            if pedido is None:
+                return lote, True
+            lote.append(pedido)
+        return lote, False
+
+    def _executar(self, lote):
+        agora = time.perf_counter()
+        for pedido in lote:
+            metrics.observe_histogram("arcade_batch_queue_wait_seconds", "dispatcher", self.nome,
+                                      agora - pedido.chegada)
+        metrics.observe_histogram("arcade_batch_size", "dispatcher", self.nome, len(lote),
+                                  metrics.SIZE_BUCKETS)
+        with self._lock:
+            self._stats["lotes"] += 1
+            self._stats["pedidos"] += len(lote)
+            self._stats["maior_lote"] = max(self._stats["maior_lote"], len(lote))
+
+        # pedidos lidos de versões diferentes do modelo não se misturam
+        grupos = {}
+        for pedido in lote:
+            grupos.setdefault(id(pedido.sistema), []).append(pedido)
+
+        for pedidos in grupos.values():
+            top_n = max(pedido.top_n for pedido in pedidos)
+            try:
+                resultados = pedidos[0].sistema.recomendar_lote([p.perfil for p in pedidos], top_n=top_n)
+                for pedido, resultado in zip(pedidos, resultados):
+                    pedido.futuro.set_result(resultado[:pedido.top_n])
+            except Exception as e:
+                _falhar(pedidos, e)
+
+    def _laco(self):
+        while True:
+            lote, fechar = None, False
+            try:
+                lote, fechar = self._coletar()
+                if lote:
+                    self._executar(lote)
+            except Exception as e:
+                # um erro fora da pontuação (métricas, agrupamento...) não pode matar a thread:
+                # quem está esperando recebe a exceção e o despacho segue atendendo
+                print(f"Erro no despacho {self.nome}:", e)
+                _falhar(lote or [], e)
+            if fechar:
+                return
+
+    def fechar(self):
+        if self._thread is not None:
+            self._fila.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["lote_medio"] = stats["pedidos"] / stats["lotes"] if stats["lotes"] else 0.0
+        return stats
+
+class SistemaEmLote:
+    """Fachada do sistema: recomendar() vai pelo despacho, o resto é repassado ao sistema"""
+
+    def __init__(self, despacho, sistema):
+        self._despacho = despacho
+        self._sistema = sistema
+
+    def recomendar(self, generos, plataformas, modos_jogo, top_n=10,
+                   colaborativo=None, avaliacoes_usuario=None, peso_colaborativo=PESO_COLABORATIVO,
+                   filtros=None):
+        if colaborativo is not None and avaliacoes_usuario:
+            # a mistura com o colaborativo é por usuário, fica fora do lote
+            return self._sistema.recomendar(generos, plataformas, modos_jogo, top_n, colaborativo,
+                                            avaliacoes_usuario, peso_colaborativo, filtros)
+        perfil = {'generos': generos, 'plataformas': plataformas, 'modos_jogo': modos_jogo,
+                  'filtros': filtros}
+        return self._despacho.recomendar(self._sistema, perfil, top_n)
+
+    def __getattr__(self, nome):
+        return getattr(self._sistema, nome)
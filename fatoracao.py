@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+"""
+Fatoração de matriz (ALS) para prever notas de jogos não avaliados
+
+A matriz de avaliações usuário×jogo é aproximada por U·Vᵀ + média global.
+Cada passo do ALS fixa um lado e resolve, para todas as linhas do outro, as
+equações normais regularizadas (λ·nº de notas da linha). A matriz de cada
+linha é Xᵀ·X dos vetores fixos que ela avaliou, e os sistemas f×f de um
+bloco de linhas são resolvidos de uma vez com np.linalg.solve, em várias
+threads. Os blocos são dimensionados para que as matrizes f×f em andamento
+não passem de LIMITE_BYTES_BLOCO (64 MB) somadas todas as threads (o dobro
+durante o solve, que trabalha numa cópia); além disso o treino guarda as
+notas (por usuário e por jogo, ~40 bytes por nota), U e V.
+
+Os fatores treinados são salvos em .npz. Para um usuário do site, que não
+está em U, o vetor é calculado na hora a partir das notas dele (um único
+sistema f×f), e a previsão sai em uma multiplicação por Vᵀ.
+
+Uso:
+    python fatoracao.py treinar [--banco | --avaliacoes avaliacoes.csv]
+    python fatoracao.py avaliar [--banco | --avaliacoes avaliacoes.csv] [--k 10] [--semente 42]
+"""
+
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from scipy import sparse
+from normalizacao import chave_nome
+from recomendador_colab import (CSV_COLAB, NOTA_MIN, NOTA_MAX, carregar_avaliacoes_csv,
+                                carregar_avaliacoes_banco, carregar_avaliacoes_longo)
+import artefatos
+
+FATORES = 32
+REGULARIZACAO = 0.1
+ITERACOES = 10
+THREADS = int(os.environ.get("ARCADE_ALS_THREADS", os.cpu_count() or 1))
+# memória máxima das matrizes f×f dos blocos de linhas em andamento (somadas as threads)
+LIMITE_BYTES_BLOCO = 64 * 1024 * 1024
+NOTA_RELEVANTE = 4
+
+class _Lado:
+    """Estrutura de um lado do ALS: linhas a resolver x linhas do lado fixo.
+
+    A matriz das equações normais de uma linha é Xᵀ·X, com X os vetores fixos
+    que ela avaliou, reunidos na hora (no máximo `vetores_por_vez` de cada vez,
+    para linhas com muitas notas). As linhas são resolvidas em blocos de até
+    `tamanho_bloco`, de modo que as matrizes f x f dos blocos em andamento
+    somem no máximo `limite_bytes`, seja qual for o tamanho dos dois lados.
+    """
+
+    def __init__(self, matriz, fatores, media, limite_bytes=LIMITE_BYTES_BLOCO, threads=1):
+        matriz = sparse.csr_matrix(matriz, dtype=np.float64)
+        # mesma estrutura das notas, só os valores são novos
+        self.centrada = sparse.csr_matrix((matriz.data - media, matriz.indices, matriz.indptr),
+                                          shape=matriz.shape)
+        self.indptr, self.indices = matriz.indptr, matriz.indices
+        self.contagens = np.diff(matriz.indptr)
+        self.n, self.n_fixos = matriz.shape
+        # cada thread resolve um bloco por vez: o limite é dividido entre elas
+        por_thread = limite_bytes // max(1, threads)
+        self.tamanho_bloco = max(1, por_thread // (8 * fatores * fatores))
+        self.vetores_por_vez = max(1, por_thread // (8 * fatores))
+        self.blocos = [(inicio, min(inicio + self.tamanho_bloco, self.n))
+                       for inicio in range(0, self.n, self.tamanho_bloco)]
+
+    def _sistemas(self, fixos, inicio, fim):
+        """Xᵀ·X de cada linha de inicio:fim (linhas x f x f)"""
+        f = fixos.shape[1]
+        A = np.zeros((fim - inicio, f, f))
+        for linha in range(inicio, fim):
+            primeira, ultima = self.indptr[linha], self.indptr[linha + 1]
+            for a in range(primeira, ultima, self.vetores_por_vez):
+                vetores = fixos[self.indices[a:min(a + self.vetores_por_vez, ultima)]]
+                A[linha - inicio] += vetores.T @ vetores
+        return A
+
+    def passo(self, fixos, saida, reg, pool):
+        f = fixos.shape[1]
+        B = self.centrada @ fixos
+
+        def bloco(intervalo):
+            inicio, fim = intervalo
+            A = self._sistemas(fixos, inicio, fim)
+            # linhas sem nota ficam com vetor zero (A = λ·I, B = 0)
+            A += (reg * np.maximum(self.contagens[inicio:fim], 1))[:, None, None] * np.eye(f)
+            saida[inicio:fim] = np.linalg.solve(A, B[inicio:fim, :, None])[..., 0]
+
+        list(pool.map(bloco, self.blocos))
+
+class SistemaFatoracao:
+    def __init__(self, avaliacoes=None, itens=None, fatores=FATORES, reg=REGULARIZACAO,
+                 iteracoes=ITERACOES, threads=THREADS, semente=42,
+                 U=None, V=None, media=None):
+        """Treina a partir de `avaliacoes` (CSR usuário×jogo) ou usa fatores já calculados"""
+        self.itens = np.asarray(itens, dtype=str)
+        self.versao = None
+        self.reg = reg
+        self.tempo_treino = None
+        if V is None:
+            U, V, media = self._treinar(avaliacoes, fatores, reg, iteracoes, threads, semente)
+        self.U = U
+        self.V = np.asarray(V, dtype=np.float64)
+        self.media = float(media)
+        self._gram = self.V.T @ self.V
+        self._indice_por_chave = {}
+        for idx, nome in enumerate(self.itens):
+            self._indice_por_chave.setdefault(chave_nome(nome), idx)
+
+    def _treinar(self, avaliacoes, fatores, reg, iteracoes, threads, semente):
+        inicio = time.perf_counter()
+        por_usuario = sparse.csr_matrix(avaliacoes, dtype=np.float64)
+        por_item = por_usuario.T.tocsr()
+        media = por_usuario.data.mean() if por_usuario.nnz else (NOTA_MIN + NOTA_MAX) / 2
+
+        usuarios = _Lado(por_usuario, fatores, media, LIMITE_BYTES_BLOCO, threads)
+        jogos = _Lado(por_item, fatores, media, LIMITE_BYTES_BLOCO, threads)
+
+        rng = np.random.default_rng(semente)
+        U = rng.normal(0, 0.1, (por_usuario.shape[0], fatores))
+        V = rng.normal(0, 0.1, (por_usuario.shape[1], fatores))
+        with ThreadPoolExecutor(max_workers=max(1, threads)) as pool:
+            for _ in range(iteracoes):
+                usuarios.passo(V, U, reg, pool)
+                jogos.passo(U, V, reg, pool)
+        self.tempo_treino = time.perf_counter() - inicio
+        return U.astype(np.float32), V, media
+
+    def indices_de(self, nomes):
+        """Posição de cada nome nos fatores (-1 quando não existe)"""
+        return np.fromiter((self._indice_por_chave.get(chave_nome(n), -1) for n in nomes),
+                           dtype=np.int64, count=len(nomes))
+
+    def vetor_usuario(self, indices, notas):
+        """Fatores de um usuário novo a partir das notas dele (mesma equação do ALS)"""
+        vetores = self.V[indices]
+        A = vetores.T @ vetores + self.reg * max(1, len(indices)) * np.eye(self.V.shape[1])
+        return np.linalg.solve(A, vetores.T @ (np.asarray(notas, dtype=np.float64) - self.media))
+
+    def prever(self, vetores_usuarios):
+        """Notas previstas (1 a 5) de todos os jogos para cada vetor de usuário"""
+        return np.clip(vetores_usuarios @ self.V.T + self.media, NOTA_MIN, NOTA_MAX)
+
+    def pontuar(self, avaliacoes_usuario):
+        """Nota prevista (1 a 5) para todos os jogos, dado {nome_do_jogo: nota}.
+
+        Os jogos que o usuário já avaliou ficam com -inf, para não voltarem
+        como recomendação.
+        """
+        n = len(self.itens)
+        if not avaliacoes_usuario:
+            return np.full(n, np.nan, dtype=np.float32)
+        indices = self.indices_de(list(avaliacoes_usuario))
+        notas = np.fromiter(avaliacoes_usuario.values(), dtype=np.float64, count=len(avaliacoes_usuario))
+        conhecidos = indices >= 0
+        if not conhecidos.any():
+            return np.full(n, np.nan, dtype=np.float32)
+        vetor = self.vetor_usuario(indices[conhecidos], notas[conhecidos])
+        previsao = self.prever(vetor).astype(np.float32)
+        previsao[indices[conhecidos]] = -np.inf
+        return previsao
+
+    def pontuar_normalizado(self, avaliacoes_usuario):
+        """Mesma previsão de `pontuar`, em escala 0 a 1 para combinar com o cosseno"""
+        return (self.pontuar(avaliacoes_usuario) - NOTA_MIN) / (NOTA_MAX - NOTA_MIN)
+
+    def salvar(self, destino):
+        destino = Path(destino)
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        tmp = destino.with_name(destino.name + ".tmp.npz")
+        np.savez(tmp, itens=self.itens, V=self.V, media=np.asarray(self.media),
+                 reg=np.asarray(self.reg))
+        os.replace(tmp, destino)
+        return destino
+
+    @classmethod
+    def carregar(cls, origem):
+        # só os fatores dos jogos: usuários do site são calculados pelas notas deles
+        with np.load(origem, allow_pickle=False) as dados:
+            return cls(itens=dados['itens'], V=dados['V'], media=float(dados['media']),
+                       reg=float(dados['reg']))
+
+def caminho_fatoracao(checksum):
+    return artefatos.ARTEFATOS_DIR / f"als-v{artefatos.FORMATO}-{checksum[:16]}.npz"
+
+def caminho_fatoracao_banco():
+    return artefatos.ARTEFATOS_DIR / f"als-v{artefatos.FORMATO}-banco.npz"
+
+def inicializar_fatoracao(caminho_csv=CSV_COLAB):
+    """Carrega os fatores salvos (banco ou CSV atual) ou treina em memória"""
+    checksum = artefatos.checksum_arquivo(caminho_csv)
+    for caminho, versao in ((caminho_fatoracao_banco(), "banco"),
+                            (caminho_fatoracao(checksum), checksum)):
+        if caminho.exists():
+            try:
+                sistema = SistemaFatoracao.carregar(caminho)
+                sistema.versao = f"als-{versao}"
+                return sistema
+            except Exception as e:
+                print(f"Erro ao carregar fatores {caminho}: {e}")
+
+    avaliacoes, itens = carregar_avaliacoes_csv(caminho_csv)
+    sistema = SistemaFatoracao(avaliacoes, itens)
+    sistema.versao = f"als-{checksum}"
+    return sistema
+
+# Avaliação offline
+
+def dividir(avaliacoes, fracao_teste=0.2, semente=42):
+    """Separa as notas em treino e teste (sorteio por nota, reprodutível pela semente)"""
+    coo = avaliacoes.tocoo()
+    teste = np.random.default_rng(semente).random(coo.nnz) < fracao_teste
+
+    def parte(selecao):
+        return sparse.csr_matrix((coo.data[selecao], (coo.row[selecao], coo.col[selecao])),
+                                 shape=avaliacoes.shape, dtype=np.float64)
+    return parte(~teste), parte(teste)
+
+def _rmse(previstas, reais):
+    return float(np.sqrt(np.mean((previstas - reais) ** 2))) if len(reais) else float("nan")
+
+def avaliar(avaliacoes, itens, k=10, fracao_teste=0.2, semente=42, fatores=FATORES,
+            reg=REGULARIZACAO, iteracoes=ITERACOES, threads=THREADS, usuarios_latencia=200):
+    treino, teste = dividir(avaliacoes, fracao_teste, semente)
+    modelo = SistemaFatoracao(treino, itens, fatores=fatores, reg=reg, iteracoes=iteracoes,
+                              threads=threads, semente=semente)
+    k = min(k, len(itens))
+
+    # RMSE nas notas de teste, contra as médias como referência
+    teste_coo = teste.tocoo()
+    previstas = np.clip(np.einsum("nf,nf->n", modelo.U[teste_coo.row].astype(np.float64),
+                                  modelo.V[teste_coo.col]) + modelo.media, NOTA_MIN, NOTA_MAX)
+    soma_itens = np.asarray(treino.sum(axis=0)).ravel()
+    notas_itens = np.diff(treino.tocsc().indptr)
+    media_itens = np.where(notas_itens > 0, soma_itens / np.maximum(notas_itens, 1), modelo.media)
+
+    # precision@k: top-k entre os jogos fora do treino; relevante = nota de teste >= NOTA_RELEVANTE
+    relevantes = teste.multiply(teste >= NOTA_RELEVANTE).tocsr()
+    usuarios = np.flatnonzero(np.diff(relevantes.indptr) > 0)
+    # referência: os k jogos com mais notas no treino que o usuário ainda não avaliou
+    popularidade = np.diff(treino.tocsc().indptr).astype(np.float64)
+    acertos = acertos_populares = 0
+    linhas_por_bloco = max(1, LIMITE_BYTES_BLOCO // (8 * max(1, len(itens))))
+    for inicio in range(0, len(usuarios), linhas_por_bloco):
+        bloco = usuarios[inicio:inicio + linhas_por_bloco]
+        scores = modelo.prever(modelo.U[bloco].astype(np.float64))
+        vistos = treino[bloco].tocoo()
+        scores[vistos.row, vistos.col] = -np.inf
+        topo = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        acertos += int(relevantes[bloco][np.arange(len(bloco))[:, None], topo].astype(bool).sum())
+        scores = np.broadcast_to(popularidade, scores.shape).copy()
+        scores[vistos.row, vistos.col] = -np.inf
+        topo = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        acertos_populares += int(relevantes[bloco][np.arange(len(bloco))[:, None], topo].astype(bool).sum())
+    total = k * len(usuarios)
+
+    # latência por usuário no caminho do site: notas -> vetor -> previsão -> top-k
+    # só usuários com notas no treino; com poucos usuários a amostra encolhe (ou fica vazia)
+    candidatos = np.flatnonzero(np.diff(treino.indptr) > 0)
+    amostra = (np.random.default_rng(semente).choice(candidatos, size=min(usuarios_latencia, len(candidatos)),
+                                                     replace=False)
+               if len(candidatos) else candidatos)
+    tempos = []
+    for usuario in amostra:
+        linha = treino[usuario]
+        notas = {itens[j]: nota for j, nota in zip(linha.indices, linha.data)}
+        t = time.perf_counter()
+        previsao = modelo.pontuar(notas)
+        np.argpartition(-previsao, k - 1)[:k]
+        tempos.append(time.perf_counter() - t)
+    tempos = np.asarray(tempos) * 1000
+
+    return {
+        "avaliacoes": int(avaliacoes.nnz),
+        "usuarios": int(avaliacoes.shape[0]),
+        "jogos": int(avaliacoes.shape[1]),
+        "notas_teste": int(teste.nnz),
+        "rmse": _rmse(previstas, teste_coo.data),
+        "rmse_media_global": _rmse(np.full(teste.nnz, modelo.media), teste_coo.data),
+        "rmse_media_jogo": _rmse(media_itens[teste_coo.col], teste_coo.data),
+        f"precision@{k}": acertos / total if total else float("nan"),
+        f"precision@{k}_populares": acertos_populares / total if total else float("nan"),
+        "usuarios_precision": int(len(usuarios)),
+        "tempo_treino_s": modelo.tempo_treino,
+        "latencia_usuario_ms_mediana": float(np.median(tempos)) if len(tempos) else float("nan"),
+        "latencia_usuario_ms_p95": float(np.percentile(tempos, 95)) if len(tempos) else float("nan"),
+    }
+
+def _carregar(args):
+    if args.banco:
+        return carregar_avaliacoes_banco()
+    if args.avaliacoes:
+        return carregar_avaliacoes_longo(args.avaliacoes)
+    return carregar_avaliacoes_csv(args.csv)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Fatoração de matriz (ALS) das avaliações",
+        epilog="Memória: além das notas (por usuário e por jogo, ~40 bytes por nota) e dos fatores "
+               "(U e V, 8·f bytes por usuário e por jogo), o treino usa no máximo "
+               f"{2 * LIMITE_BYTES_BLOCO // 2**20} MB para as matrizes f×f, qualquer que seja o "
+               "número de usuários, jogos ou threads. O avaliar pontua os usuários de teste em "
+               f"blocos de {LIMITE_BYTES_BLOCO // 2**20} MB.")
+    parser.add_argument("comando", choices=["treinar", "avaliar"])
+    parser.add_argument("--banco", action="store_true", help="lê a tabela RATING")
+    parser.add_argument("--avaliacoes", help="CSV longo USERNAME,ID_PRODUCT,RATING (gen_synthetic_data.py)")
+    parser.add_argument("--csv", default=CSV_COLAB, help="matriz de utilidade (padrão)")
+    parser.add_argument("--fatores", type=int, default=FATORES)
+    parser.add_argument("--reg", type=float, default=REGULARIZACAO)
+    parser.add_argument("--iteracoes", type=int, default=ITERACOES)
+    parser.add_argument("--threads", type=int, default=THREADS)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--teste", type=float, default=0.2, help="fração das notas no teste")
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    avaliacoes, itens = _carregar(args)
+    if args.comando == "avaliar":
+        resultado = avaliar(avaliacoes, itens, k=args.k, fracao_teste=args.teste, semente=args.semente,
+                            fatores=args.fatores, reg=args.reg, iteracoes=args.iteracoes,
+                            threads=args.threads)
+        for chave, valor in resultado.items():
+            print(f"{chave:>28}: {valor:.4f}" if isinstance(valor, float) else f"{chave:>28}: {valor}")
+        sys.exit(0)
+
+    sistema = SistemaFatoracao(avaliacoes, itens, fatores=args.fatores, reg=args.reg,
+                               iteracoes=args.iteracoes, threads=args.threads, semente=args.semente)
+    if args.banco:
+        destino = caminho_fatoracao_banco()
+    else:
+        destino = caminho_fatoracao(artefatos.checksum_arquivo(args.avaliacoes or args.csv))
+    sistema.salvar(destino)
+    print(f"Fatores salvos em {destino} ({avaliacoes.nnz} avaliações, {len(itens)} jogos, "
+          f"{sistema.tempo_treino:.2f}s de treino)")
@@ -0,0 +1,192 @@
+"""
+Gerador de dados sintéticos em escala de produção
+
+Gera, em blocos e com semente fixa (mesma semente = mesmos arquivos):
+  - catálogo no formato de fontes/jogos_carac.csv (+ coluna PRICE)
+  - usuários no formato de fontes/usuarios.csv
+  - avaliações em formato longo (USERNAME, ID_PRODUCT, RATING), com
+    popularidade dos jogos e atividade dos usuários seguindo leis de potência
+
+Nada é acumulado em memória além de um bloco, então milhões de usuários e
+100k+ jogos rodam com memória constante. Parquet exige pyarrow instalado.
+
+Uso:
+    python gen_synthetic_data.py --games 100000 --users 2000000 --out dados/
+    python gen_synthetic_data.py --games 500 --users 1000 --format parquet
+"""
+
+import csv
+import argparse
+import hashlib
+from pathlib import Path
+import numpy as np
+
+BLOCO = 50_000
+
+# distribuições aproximadas do catálogo real (fontes/jogos_carac.csv)
+GENEROS = {
+    "Ação": 0.22, "Aventura": 0.20, "RPG": 0.08, "Puzzle": 0.07, "Metroidvania": 0.05,
+    "Sandbox": 0.05, "FPS": 0.07, "Narrativo": 0.05, "Simulação": 0.06, "Roguelike": 0.04,
+    "Horror": 0.05, "Estratégia": 0.06,
+}
+PLATAFORMAS = {
+    "PC": 0.80, "PlayStation": 0.75, "Xbox": 0.55, "Nintendo Switch": 0.40, "Mobile": 0.15,
+}
+# valor único de plataforma que o catálogo real usa no lugar da lista (ex.: Castlevania)
+MULTIPLATAFORMA = "Multiplataforma (dependendo da versão)"
+FRACAO_MULTIPLATAFORMA = 0.05
+MODOS = {
+    "Single-player": 0.85, "Mundo Aberto": 0.25, "Cooperativo": 0.30, "Multiplayer online": 0.30,
+}
+PALAVRAS_NOME = [
+    "Shadow", "Legend", "Knight", "Valley", "Dawn", "Ghost", "Star", "Dragon", "Lost", "Iron",
+    "Crystal", "Night", "Echo", "Storm", "Hollow", "Crown", "Rift", "Ember", "Tide", "Forge",
+]
+
+class Gravador:
+    """Escreve blocos de colunas em CSV ou Parquet sem manter o arquivo em memória"""
+
+    def __init__(self, caminho, colunas, formato):
+        self.colunas = colunas
+        self.formato = formato
+        self.caminho = Path(caminho).with_suffix("." + formato)
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        if formato == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            self._pa = pa
+            self._writer = None
+            self._pq = pq
+        else:
+            self._arquivo = open(self.caminho, "w", newline="", encoding="utf-8")
+            self._csv = csv.writer(self._arquivo)
+            self._csv.writerow(colunas)
+
+    def escrever(self, bloco):
+        if self.formato == "parquet":
+            tabela = self._pa.table({c: bloco[c] for c in self.colunas})
+            if self._writer is None:
+                self._writer = self._pq.ParquetWriter(self.caminho, tabela.schema)
+            self._writer.write_table(tabela)
+        else:
+            self._csv.writerows(zip(*(bloco[c] for c in self.colunas)))
+
+    def fechar(self):
+        if self.formato == "parquet":
+            if self._writer is not None:
+                self._writer.close()
+        else:
+            self._arquivo.close()
+        return self.caminho
+
+def _rng(semente, *partes):
+    """Gerador independente por (semente, tabela, bloco): blocos reproduzíveis em qualquer ordem"""
+    return np.random.default_rng([semente, *partes])
+
+def _multi_escolha(rng, opcoes, probabilidades, n, separador, no_minimo=1):
+    """Para cada linha, cada opção entra com sua probabilidade (ao menos `no_minimo`)"""
+    nomes = np.asarray(list(opcoes))
+    marcado = rng.random((n, len(nomes))) < np.asarray(probabilidades)
+    sem_nada = marcado.sum(axis=1) < no_minimo
+    marcado[sem_nada, rng.integers(0, len(nomes), sem_nada.sum())] = True
+    return [separador.join(nomes[linha]) for linha in marcado]
+
+def gerar_catalogo(n_jogos, semente, saida, formato, bloco=BLOCO):
+    gravador = Gravador(Path(saida) / "jogos_carac", ["Nome", "Gênero", "Plataforma", "Modo de jogo", "PRICE"], formato)
+    generos = list(GENEROS)
+    p_generos = np.asarray(list(GENEROS.values()))
+    p_generos = p_generos / p_generos.sum()
+
+    for inicio in range(0, n_jogos, bloco):
+        n = min(bloco, n_jogos - inicio)
+        rng = _rng(semente, 1, inicio // bloco)
+        palavras = rng.integers(0, len(PALAVRAS_NOME), size=(n, 2))
+        nomes = [f"{PALAVRAS_NOME[a]} {PALAVRAS_NOME[b]} {inicio + i + 1}" for i, (a, b) in enumerate(palavras)]
+
+        # gênero principal pela distribuição, às vezes com um segundo gênero
+        principal = rng.choice(len(generos), size=n, p=p_generos)
+        segundo = rng.choice(len(generos), size=n, p=p_generos)
+        tem_segundo = (rng.random(n) < 0.7) & (segundo != principal)
+        genero = [f"{generos[a]} / {generos[b]}" if dois else generos[a]
+                  for a, b, dois in zip(principal, segundo, tem_segundo)]
+
+        precos = np.round(np.clip(rng.lognormal(np.log(80), 0.6, n), 5, 400), 2)
+        plataformas = _multi_escolha(rng, PLATAFORMAS, list(PLATAFORMAS.values()), n, ", ")
+        modos = _multi_escolha(rng, MODOS, list(MODOS.values()), n, ", ")
+        # sorteio em um gerador próprio para não mudar as outras colunas das sementes existentes
+        for i in np.flatnonzero(_rng(semente, 4, inicio // bloco).random(n) < FRACAO_MULTIPLATAFORMA):
+            plataformas[i] = MULTIPLATAFORMA
+        gravador.escrever({
+            "Nome": nomes,
+            "Gênero": genero,
+            "Plataforma": plataformas,
+            "Modo de jogo": modos,
+            "PRICE": precos.tolist(),
+        })
+    return gravador.fechar()
+
+def gerar_usuarios(n_usuarios, semente, saida, formato, bloco=BLOCO):
+    gravador = Gravador(Path(saida) / "usuarios", ["USERNAME", "PASSWORD_HASH"], formato)
+    for inicio in range(0, n_usuarios, bloco):
+        fim = min(inicio + bloco, n_usuarios)
+        nomes = [f"user{i + 1}" for i in range(inicio, fim)]
+        # mesmo esquema do creating_fakeUsers.py (SHA256 de "senha<i>"), só para simulação
+        hashes = [hashlib.sha256(f"senha{i + 1}".encode()).hexdigest() for i in range(inicio, fim)]
+        gravador.escrever({"USERNAME": nomes, "PASSWORD_HASH": hashes})
+    return gravador.fechar()
+
+def gerar_avaliacoes(n_usuarios, n_jogos, media_por_usuario, semente, saida, formato,
+                     alfa_jogos=1.1, sigma_usuarios=1.0, bloco=BLOCO):
+    """Avaliações esparsas: popularidade Zipf dos jogos e atividade log-normal dos usuários"""
+    gravador = Gravador(Path(saida) / "avaliacoes", ["USERNAME", "ID_PRODUCT", "RATING"], formato)
+
+    # a ordem de popularidade é embaralhada para não favorecer os primeiros IDs
+    rng_global = _rng(semente, 2)
+    pesos = 1.0 / np.arange(1, n_jogos + 1) ** alfa_jogos
+    acumulado = np.cumsum(pesos[rng_global.permutation(n_jogos)])
+    acumulado /= acumulado[-1]
+    qualidade = rng_global.normal(0, 0.7, n_jogos)   # jogos bons recebem notas maiores
+    mu = np.log(media_por_usuario) - sigma_usuarios ** 2 / 2
+
+    total = 0
+    for inicio in range(0, n_usuarios, bloco):
+        n = min(bloco, n_usuarios - inicio)
+        rng = _rng(semente, 3, inicio // bloco)
+        quantidades = np.clip(rng.lognormal(mu, sigma_usuarios, n).astype(np.int64), 1, n_jogos)
+        usuarios = np.repeat(np.arange(inicio, inicio + n), quantidades)
+        jogos = np.searchsorted(acumulado, rng.random(usuarios.size), side="right")
+        jogos = np.minimum(jogos, n_jogos - 1)
+
+        # remove pares repetidos (usuário, jogo) mantendo a ordem
+        pares = np.unique(usuarios.astype(np.int64) * n_jogos + jogos)
+        usuarios, jogos = np.divmod(pares, n_jogos)
+
+        humor = rng.normal(0, 0.5, n)[usuarios - inicio]
+        notas = np.clip(np.rint(3.4 + qualidade[jogos] + humor + rng.normal(0, 0.8, usuarios.size)), 1, 5)
+
+        gravador.escrever({
+            "USERNAME": [f"user{u + 1}" for u in usuarios],
+            "ID_PRODUCT": (jogos + 1).tolist(),
+            "RATING": notas.astype(np.int64).tolist(),
+        })
+        total += usuarios.size
+        print(f"Avaliações: usuários {inicio + 1}-{inicio + n}, {total:,} linhas")
+    return gravador.fechar()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--ratings-per-user", type=float, default=20.0, help="média de avaliações sorteadas por usuário (antes de remover repetidas)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="dados_sinteticos")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    args = parser.parse_args(argv)
+
+    print("Catálogo:", gerar_catalogo(args.games, args.seed, args.out, args.format))
+    print("Usuários:", gerar_usuarios(args.users, args.seed, args.out, args.format))
+    print("Avaliações:", gerar_avaliacoes(args.users, args.games, args.ratings_per_user,
+                                          args.seed, args.out, args.format))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Resized, content-hashed variants of the game images.
+
+    python image_assets.py            # build whatever is missing or changed
+    python image_assets.py --force    # rebuild everything
+
+Each image in static/ gets a "thumb" (card grids) and a "detail" (product
+page) WebP (or the original bytes, when re-encoding would not make the file
+smaller) whose file name carries a hash of its bytes, so it can be served
+with an immutable cache header. manifest.json maps the original file name to
+its variants; templates go through `image_url()` and fall back to the
+original file when an image has no variant yet (or Pillow is not installed).
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+from image_index import STATIC_DIR, IMAGE_SUFFIXES
+
+DERIVED_DIR = Path(os.environ.get("ARCADE_DERIVED_DIR",
+                                  Path(__file__).resolve().parent / "derived_images"))
+MANIFEST = "manifest.json"
+
+# bounding boxes (width, height); cards are ~300x200 CSS px, shown on 2x screens too
+VARIANTS = {
+    "thumb": (480, 320),
+    "detail": (1000, 1000),
+}
+WEBP_QUALITY = 80
+
+def _file_hash(data, length=16):
+    return hashlib.sha256(data).hexdigest()[:length]
+
+def _render(image, box):
+    from PIL import Image
+
+    variant = image.copy()
+    variant.thumbnail(box, Image.LANCZOS)
+    if variant.mode not in ("RGB", "RGBA"):
+        variant = variant.convert("RGBA" if "transparency" in variant.info else "RGB")
+    buffer = io.BytesIO()
+    variant.save(buffer, format="WEBP", quality=WEBP_QUALITY, method=6)
+    return buffer.getvalue(), variant.size
+
+def build(source_dir=STATIC_DIR, derived_dir=DERIVED_DIR, force=False):
+    """Generates the variants that are missing or stale and rewrites the manifest"""
+    try:
+        from PIL import Image
+    except ImportError:
+        print("Pillow is not installed (pip install Pillow); originals will be served as they are")
+        return None
+    try:
+        import pillow_avif  # noqa: F401  (AVIF decoding on Pillow builds without it)
+    except ImportError:
+        pass
+
+    source_dir, derived_dir = Path(source_dir), Path(derived_dir)
+    derived_dir.mkdir(parents=True, exist_ok=True)
+    old = {} if force else load_manifest(derived_dir)
+    manifest = {}
+    generated = skipped = failed = 0
+
+    for source in sorted(source_dir.iterdir()):
+        if not source.is_file() or source.suffix.lower() not in IMAGE_SUFFIXES:
+            continue
+        data = source.read_bytes()
+        source_hash = _file_hash(data)
+
+        previous = old.get(source.name)
+        if (previous and previous.get("source") == source_hash
+                and all((derived_dir / previous.get(name, {}).get("file", "")).is_file()
+                        for name in VARIANTS)):
+            manifest[source.name] = previous
+            skipped += 1
+            continue
+
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                image.load()
+                entry = {"source": source_hash}
+                for name, box in VARIANTS.items():
+                    content, (width, height) = _render(image, box)
+                    suffix = ".webp"
+                    if len(content) >= len(data):
+                        # already small: the re-encode would only add bytes
+                        content, (width, height), suffix = data, image.size, source.suffix.lower()
+                    file_name = f"{chave_arquivo(source.stem)}.{name}.{_file_hash(content)}{suffix}"
+                    target = derived_dir / file_name
+                    if not target.exists():
+                        tmp = target.with_suffix(".tmp")
+                        tmp.write_bytes(content)
+                        os.replace(tmp, target)
+                    entry[name] = {"file": file_name, "width": width, "height": height,
+                                   "bytes": len(content)}
+        except Exception as e:
+            print(f"Error generating variants for {source.name}: {e}")
+            failed += 1
+            continue
+
+        manifest[source.name] = entry
+        generated += 1
+        print(f"{source.name}: {len(data)} bytes -> "
+              + ", ".join(f"{name} {entry[name]['bytes']} bytes" for name in VARIANTS))
+
+    tmp = derived_dir / (MANIFEST + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=1, sort_keys=True, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, derived_dir / MANIFEST)
+
+    # variants no longer referenced by the manifest (old hashes, removed images)
+    referenced = {entry[name]["file"] for entry in manifest.values() for name in VARIANTS}
+    for file in derived_dir.iterdir():
+        if file.suffix.lower() in IMAGE_SUFFIXES and file.name not in referenced:
+            file.unlink()
+
+    print(f"Image variants: {generated} generated, {skipped} up to date, {failed} failed")
+    return manifest
+
+def chave_arquivo(stem):
+    """File-name-safe version of the image stem (readable in the browser's network tab)"""
+    safe = "".join(c if c.isalnum() else "-" for c in stem).strip("-").lower()
+    return safe or "image"
+
+def load_manifest(derived_dir=DERIVED_DIR):
+    try:
+        with open(Path(derived_dir) / MANIFEST, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+class AssetManifest:
+    """The manifest in memory, reloaded when manifest.json changes (checked every few seconds)"""
+
+    def __init__(self, derived_dir=DERIVED_DIR, check_interval=5.0):
+        self.derived_dir = Path(derived_dir)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked_at = 0.0
+        self._entries = {}
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            if now - self._checked_at < self.check_interval:
+                return
+            self._checked_at = now
+            try:
+                mtime = (self.derived_dir / MANIFEST).stat().st_mtime
+            except OSError:
+                mtime = None
+            if mtime != self._mtime:
+                self._entries = load_manifest(self.derived_dir) if mtime else {}
+                self._mtime = mtime
+
+    def variant(self, image, name):
+        """The variant's file name, or None when it was not generated"""
+        self._maybe_reload()
+        entry = self._entries.get(image)
+        if entry and name in entry:
+            return entry[name]["file"]
+        return None
+
+_manifest = None
+_manifest_lock = threading.Lock()
+
+def get_asset_manifest():
+    global _manifest
+    if _manifest is None:
+        with _manifest_lock:
+            if _manifest is None:
+                _manifest = AssetManifest()
+    return _manifest
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate thumbnail/detail variants of static/ images")
+    parser.add_argument("--source", default=STATIC_DIR)
+    parser.add_argument("--out", default=DERIVED_DIR)
+    parser.add_argument("--force", action="store_true", help="regenerate every image")
+    args = parser.parse_args()
+    sys.exit(0 if build(args.source, args.out, args.force) is not None else 1)
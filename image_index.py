@@ -0,0 +1,105 @@
+import os
+import time
+import threading
+from pathlib import Path
+from normalizacao import chave_nome
+from metrics import timed
+
+STATIC_DIR = Path(os.environ.get("ARCADE_STATIC_DIR", Path(__file__).resolve().parent / "static"))
+DEFAULT_IMAGE = "default.jpg"
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".avif", ".webp", ".gif"}
+RESOLVED_MAX = 4096   # memoized partial matches kept before the memo is cleared
+
+class ImageIndex:
+    """Maps normalized game names to image files in the static directory.
+
+    The directory is listed once; it is listed again only when its mtime
+    changes, which is checked at most every `check_interval` seconds.
+    Names come from database rows and search terms, so the memo of partial
+    matches is capped at `resolved_max` entries.
+    """
+
+    def __init__(self, base=STATIC_DIR, check_interval=2.0, resolved_max=RESOLVED_MAX):
+        self.base = Path(base)
+        self.check_interval = check_interval
+        self.resolved_max = resolved_max
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked_at = 0.0
+        self._exact = {}       # chave_nome(stem) -> file name
+        self._stems = []       # (chave_nome(stem), file name), for partial matches
+        self._resolved = {}    # memoized lookups for the current listing
+        self._refresh()
+
+    def _refresh(self):
+        try:
+            mtime = self.base.stat().st_mtime
+            files = [f for f in self.base.iterdir()
+                     if f.is_file() and f.suffix.lower() in IMAGE_SUFFIXES]
+        except OSError as e:
+            print(f"Error reading image directory {self.base}: {e}")
+            mtime, files = None, []
+
+        exact = {}
+        stems = []
+        for file in sorted(files):
+            key = chave_nome(file.stem)
+            exact.setdefault(key, file.name)
+            stems.append((key, file.name))
+
+        self._exact = exact
+        self._stems = stems
+        self._resolved = {}
+        self._mtime = mtime
+
+    def _maybe_refresh(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            if now - self._checked_at < self.check_interval:
+                return
+            self._checked_at = now
+            try:
+                mtime = self.base.stat().st_mtime
+            except OSError:
+                mtime = None
+            if mtime != self._mtime:
+                self._refresh()
+
+    def lookup(self, name):
+        with timed("image_lookup"):
+            self._maybe_refresh()
+            return self._lookup(name)
+
+    def _lookup(self, name):
+        key = chave_nome(name)
+        found = self._exact.get(key)
+        if found:
+            return found
+
+        resolved = self._resolved.get(key)
+        if resolved is None:
+            # same rule as the old directory scan: the name is part of the file stem
+            resolved = next((file for stem, file in self._stems if key and key in stem),
+                            DEFAULT_IMAGE)
+            if len(self._resolved) >= self.resolved_max:
+                self._resolved = {}
+            self._resolved[key] = resolved
+        return resolved
+
+    def lookup_many(self, names):
+        with timed("image_lookup"):
+            self._maybe_refresh()
+            return [self._lookup(name) for name in names]
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_image_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = ImageIndex()
+    return _index
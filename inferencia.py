@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Vetorização TF-IDF para servir recomendações, sem o scikit-learn
+
+Para servir só é preciso transformar textos curtos (o perfil do questionário)
+com o vocabulário e o IDF que saíram do treino. Este módulo refaz o
+transform do TfidfVectorizer com os parâmetros usados pelo recomendador
+(minúsculas, tokens `(?u)\\b\\w\\w+\\b`, n-gramas de palavras, contagem × IDF,
+norma L2) só com NumPy e SciPy, e assim o processo web carrega o artefato sem
+importar pandas nem scikit-learn. O treino continua no scikit-learn; a matriz
+devolvida por `transform` é a mesma.
+"""
+
+import re
+import numpy as np
+from scipy import sparse
+
+PADRAO_TOKEN = re.compile(r"(?u)\b\w\w+\b")
+
+class VetorizadorTfidf:
+    """transform() do TfidfVectorizer a partir de vocabulário e IDF já calculados.
+
+    Mantém os nomes de atributo do scikit-learn (vocabulary_, idf_,
+    ngram_range, get_feature_names_out), então pode ficar no lugar dele.
+    """
+
+    def __init__(self, vocabulario, idf, ngram_range=(1, 2)):
+        """`vocabulario` são os termos na ordem das colunas da matriz"""
+        self.termos = list(vocabulario)
+        self.vocabulary_ = {termo: i for i, termo in enumerate(self.termos)}
+        self.idf_ = np.asarray(idf, dtype=np.float64)
+        self.ngram_range = tuple(ngram_range)
+
+    @classmethod
+    def de_sklearn(cls, vectorizer):
+        return cls(vectorizer.get_feature_names_out().tolist(), vectorizer.idf_, vectorizer.ngram_range)
+
+    def get_feature_names_out(self):
+        return np.asarray(self.termos, dtype=object)
+
+    def _termos(self, texto):
+        tokens = PADRAO_TOKEN.findall(texto.lower())
+        minimo, maximo = self.ngram_range
+        termos = tokens[:] if minimo == 1 else []
+        for n in range(max(minimo, 2), min(maximo, len(tokens)) + 1):
+            termos.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return termos
+
+    def transform(self, textos):
+        """Matriz CSR (um texto por linha) com as linhas normalizadas; termos fora do vocabulário são ignorados"""
+        vocabulario = self.vocabulary_
+        colunas, indptr = [], [0]
+        for texto in textos:
+            colunas.extend([vocabulario[termo] for termo in self._termos(texto) if termo in vocabulario])
+            indptr.append(len(colunas))
+
+        n = len(indptr) - 1
+        matriz = sparse.csr_matrix(
+            (np.ones(len(colunas)), np.asarray(colunas, dtype=np.int32), np.asarray(indptr, dtype=np.int32)),
+            shape=(n, len(self.termos)))
+        # ordena as colunas de cada linha e soma os termos repetidos (a contagem)
+        matriz.sum_duplicates()
+
+        matriz.data *= self.idf_[matriz.indices]
+        por_linha = np.diff(matriz.indptr)
+        normas = np.sqrt(np.bincount(np.repeat(np.arange(n), por_linha),
+                                     weights=matriz.data * matriz.data, minlength=n))
+        normas[normas == 0] = 1.0
+        matriz.data /= np.repeat(normas, por_linha)
+        return matriz
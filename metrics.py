@@ -0,0 +1,115 @@
+"""
+Lightweight hot-path timing.
+
+`timed(stage)` records how long a block took into a process-wide histogram
+and, while a request is being traced, into that request's breakdown (sent
+back as a Server-Timing header). The cost is two perf_counter() calls, a
+bisect and a short lock, so it stays on in production.
+"""
+
+import time
+import threading
+import contextvars
+from bisect import bisect_left
+from contextlib import contextmanager
+
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[slot] += 1
+            self.total += value
+            self.count += 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.total, self.count
+
+_histograms = {}          # (metric name, label name, label value) -> Histogram
+_histograms_lock = threading.Lock()
+
+def _histogram(name, label, value, buckets=BUCKETS):
+    key = (name, label, value)
+    histogram = _histograms.get(key)
+    if histogram is None:
+        with _histograms_lock:
+            histogram = _histograms.setdefault(key, Histogram(buckets))
+    return histogram
+
+def observe_histogram(name, label, value, sample, buckets=BUCKETS):
+    """Records `sample` in a histogram of its own (not part of the request breakdown)"""
+    _histogram(name, label, value, buckets).observe(sample)
+
+def observe(stage, seconds):
+    _histogram("arcade_stage_seconds", "stage", stage).observe(seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+@contextmanager
+def timed(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start)
+
+def start_request():
+    """Starts collecting the per-stage breakdown for the current request"""
+    return _request_timings.set({}), time.perf_counter()
+
+def finish_request(token, endpoint):
+    """Stops collecting; returns (timings, total seconds)"""
+    state, start = token
+    total = time.perf_counter() - start
+    timings = _request_timings.get() or {}
+    _request_timings.reset(state)
+    _histogram("arcade_request_seconds", "endpoint", endpoint or "unknown").observe(total)
+    return timings, total
+
+def server_timing(timings, total):
+    parts = [f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in timings.items()]
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def prometheus_text(gauges=None):
+    """Histograms (and optional {name: {labels tuple: value}} gauges) in Prometheus text format"""
+    lines = []
+    with _histograms_lock:
+        items = sorted(_histograms.items())
+
+    described = set()
+    for (name, label, value), histogram in items:
+        if name not in described:
+            lines.append(f"# TYPE {name} histogram")
+            described.add(name)
+        counts, total, count = histogram.snapshot()
+        cumulative = 0
+        for bound, bucket_count in zip(histogram.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'{name}_bucket{{{label}="{_escape(value)}",le="{le}"}} {cumulative}')
+        lines.append(f'{name}_sum{{{label}="{_escape(value)}"}} {total}')
+        lines.append(f'{name}_count{{{label}="{_escape(value)}"}} {count}')
+
+    for name, samples in (gauges or {}).items():
+        lines.append(f"# TYPE {name} gauge")
+        for labels, sample in samples.items():
+            rendered = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+            lines.append(f"{name}{{{rendered}}} {sample}" if rendered else f"{name} {sample}")
+    return "\n".join(lines) + "\n"
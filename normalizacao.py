@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+"""
+Funções de normalização de texto compartilhadas pelo catálogo
+"""
+
+import re
+import unicodedata
+
+_NAO_ALFANUMERICO = re.compile(r"[^0-9a-z]+")
+
+def normalizar_texto(texto):
+    """Minúsculas e sem acentos ("Ação" -> "acao")"""
+    texto = unicodedata.normalize("NFKD", str(texto))
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return texto.lower()
+
+def chave_nome(nome):
+    """Chave estável para comparar nomes de jogos vindos de fontes diferentes.
+
+    "Spider-Man: Miles Morales" e "Spider-Man Miles Morales" geram a mesma chave.
+    """
+    return _NAO_ALFANUMERICO.sub("", normalizar_texto(nome))
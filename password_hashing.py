@@ -0,0 +1,119 @@
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+import bcrypt
+
+BCRYPT_ROUNDS = int(os.environ.get("ARCADE_BCRYPT_ROUNDS", 12))
+# Processes per web worker: with N gunicorn workers there are N x HASH_WORKERS
+# bcrypt processes on the host, so keep N x HASH_WORKERS around the CPU count.
+HASH_WORKERS = int(os.environ.get("ARCADE_HASH_WORKERS", 2))
+HASH_MAX_PENDING = int(os.environ.get("ARCADE_HASH_MAX_PENDING", HASH_WORKERS * 4))
+HASH_TIMEOUT = float(os.environ.get("ARCADE_HASH_TIMEOUT", 10.0))
+
+class HashingBusy(Exception):
+    """The hashing pool queue is full; the caller should answer 503."""
+
+def hash_cost(stored_hash):
+    """Cost factor of a bcrypt hash ("$2b$12$..." -> 12), or None if it is not bcrypt"""
+    parts = stored_hash.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+# The two functions below run inside the worker processes.
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
+
+def _verify(password, stored_hash, rounds):
+    try:
+        ok = bcrypt.checkpw(password.encode("utf-8"), stored_hash.encode("utf-8"))
+    except ValueError:
+        return False, None
+    cost = hash_cost(stored_hash)
+    if ok and cost is not None and cost < rounds:
+        # the password is at hand only now, so the outdated hash is upgraded here
+        return True, _hash(password, rounds)
+    return ok, None
+
+class HashingPool:
+    """Runs bcrypt on a process pool so request threads do not burn the worker CPU.
+
+    At most `max_pending` jobs may be queued or running; beyond that calls
+    fail fast with HashingBusy instead of piling up.
+    """
+
+    def __init__(self, workers=HASH_WORKERS, max_pending=HASH_MAX_PENDING,
+                 timeout=HASH_TIMEOUT, rounds=BCRYPT_ROUNDS):
+        self.workers = workers
+        self.timeout = timeout
+        self.rounds = rounds
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._stats = {"hashed": 0, "verified": 0, "rehashed": 0, "rejected": 0, "timeouts": 0}
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # the pool starts lazily inside a threaded web worker that holds database
+                    # sockets and locks; forking it would copy them into the children
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context("forkserver"))
+        return self._executor
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            self._count("rejected")
+            raise HashingBusy("Password hashing queue is full")
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            self._count("timeouts")
+            raise HashingBusy("Password hashing timed out")
+
+    def hash_password(self, password):
+        hashed = self._run(_hash, password, self.rounds)
+        self._count("hashed")
+        return hashed
+
+    def verify_password(self, password, stored_hash):
+        """Returns (matches, new_hash); new_hash is set when the stored cost is outdated"""
+        ok, new_hash = self._run(_verify, password, stored_hash, self.rounds)
+        self._count("verified")
+        if new_hash:
+            self._count("rehashed")
+        return ok, new_hash
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_hashing_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = HashingPool()
+    return _pool
@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+Tabela pré-calculada das recomendações do questionário
+
+O questionário tem um vocabulário fechado: 12 gêneros (mínimo 3), 6
+plataformas (mínimo 1) e 4 modos de jogo (mínimo 2), ou seja 4017 x 63 x 11 =
+2.783.781 perfis possíveis. Este módulo pontua todos offline, em lotes
+vetorizados distribuídos por um pool de processos, e grava o top-N de cada um
+em arrays .npy abertos com mmap. Em produção a resposta é uma conta de índice
+e duas leituras.
+
+A chave de um perfil é a máscara de bits das escolhas (gêneros nos bits 0-11,
+plataformas em 12-17, modos em 18-21). A linha da tabela sai direto da
+máscara: posto da combinação de gêneros x 63 x 11 + (plataformas - 1) x 11 +
+posto da combinação de modos, sem índice auxiliar.
+
+O texto do perfil depende da ordem das escolhas (os bigramas cruzam as
+palavras vizinhas), então a tabela vale para as escolhas na ordem canônica
+abaixo, que é a ordem em que o Test.html envia. Preferências em outra ordem,
+com filtros ou com o colaborativo continuam sendo pontuadas na hora, assim
+como qualquer sistema cuja versão não seja a da tabela.
+
+Uso: python precomputo.py [caminho_do_csv] [--top-n 10] [--workers N]
+"""
+
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import threading
+import time
+from pathlib import Path
+from itertools import combinations
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import artefatos
+
+# ordem do Test.html; FPS e Roguelike só existem no main.py e ficam no fim
+GENEROS = ['Aventura', 'Ação', 'Metroidvania', 'Puzzle', 'Sandbox', 'RPG', 'Simulação',
+           'Estratégia', 'Horror', 'Narrativo', 'FPS', 'Roguelike']
+PLATAFORMAS = ['Xbox', 'PlayStation', 'PC', 'Nintendo Switch', 'Multiplataforma', 'Mobile']
+MODOS = ['Single-Player', 'Mundo Aberto', 'Multiplayer online', 'Cooperativo']
+MIN_GENEROS, MIN_PLATAFORMAS, MIN_MODOS = 3, 1, 2
+
+FORMATO = 1
+TOP_N = 10
+# segundos até procurar de novo a tabela de uma versão que não tinha tabela
+# (ela pode ser gerada com o servidor no ar)
+RECHECAR_TABELA = float(os.environ.get("ARCADE_PERFIS_RECHECAR", 60.0))
+
+def _mascaras_validas(n, minimo):
+    """Máscaras de n bits com pelo menos `minimo` bits ligados, em ordem crescente"""
+    return np.array([m for m in range(1 << n) if bin(m).count("1") >= minimo], dtype=np.int64)
+
+MASCARAS_GENEROS = _mascaras_validas(len(GENEROS), MIN_GENEROS)
+MASCARAS_PLATAFORMAS = _mascaras_validas(len(PLATAFORMAS), MIN_PLATAFORMAS)
+MASCARAS_MODOS = _mascaras_validas(len(MODOS), MIN_MODOS)
+
+def _postos(mascaras, n):
+    postos = np.full(1 << n, -1, dtype=np.int32)
+    postos[mascaras] = np.arange(len(mascaras), dtype=np.int32)
+    return postos
+
+POSTO_GENEROS = _postos(MASCARAS_GENEROS, len(GENEROS))
+POSTO_PLATAFORMAS = _postos(MASCARAS_PLATAFORMAS, len(PLATAFORMAS))
+POSTO_MODOS = _postos(MASCARAS_MODOS, len(MODOS))
+
+POR_GENERO = len(MASCARAS_PLATAFORMAS) * len(MASCARAS_MODOS)
+TOTAL_PERFIS = len(MASCARAS_GENEROS) * POR_GENERO
+
+_BITS = [{valor.lower(): bit for bit, valor in enumerate(lista)}
+         for lista in (GENEROS, PLATAFORMAS, MODOS)]
+
+def _mascara_canonica(escolhas, bits):
+    """Máscara das escolhas, ou None se alguma é desconhecida, repetida ou fora de ordem"""
+    mascara, anterior = 0, -1
+    for escolha in escolhas:
+        bit = bits.get(str(escolha).strip().lower())
+        if bit is None or bit <= anterior:
+            return None
+        mascara |= 1 << bit
+        anterior = bit
+    return mascara
+
+def linha_do_perfil(generos, plataformas, modos_jogo):
+    """Linha da tabela para as preferências, ou None se o perfil não está na tabela"""
+    mascaras = [_mascara_canonica(escolhas, bits)
+                for escolhas, bits in zip((generos, plataformas, modos_jogo), _BITS)]
+    if None in mascaras:
+        return None
+    g, p, m = int(POSTO_GENEROS[mascaras[0]]), int(POSTO_PLATAFORMAS[mascaras[1]]), int(POSTO_MODOS[mascaras[2]])
+    if g < 0 or p < 0 or m < 0:
+        return None
+    return g * POR_GENERO + p * len(MASCARAS_MODOS) + m
+
+def _escolhas(mascara, lista):
+    return [valor for bit, valor in enumerate(lista) if mascara >> bit & 1]
+
+def diretorio_tabela(checksum, base=artefatos.ARTEFATOS_DIR):
+    return Path(base) / f"perfis-v{FORMATO}-{checksum[:16]}"
+
+# Construção (roda nos processos do pool)
+
+_sistema = None
+
+def _iniciar_worker(caminho_csv):
+    global _sistema
+    from recomendador_tfidf import inicializar_sistema
+    _sistema = inicializar_sistema(caminho_csv)
+
+def _pontuar_generos(destino, inicio, fim, top_n):
+    """Pontua os perfis das combinações de gêneros [inicio, fim) e grava nas linhas delas"""
+    from recomendador_tfidf import LIMITE_BYTES_LOTE, _top_k_lote
+
+    indices_saida = np.load(destino / "indices.npy", mmap_mode="r+")
+    scores_saida = np.load(destino / "scores.npy", mmap_mode="r+")
+    sufixos = [
+        ' '.join(_escolhas(p, PLATAFORMAS)) + ' ' + ' '.join(_escolhas(m, MODOS))
+        for p in MASCARAS_PLATAFORMAS for m in MASCARAS_MODOS
+    ]
+    n_jogos = _sistema.tfidf_matrix.shape[0]
+    linhas_por_bloco = max(1, LIMITE_BYTES_LOTE // (8 * max(1, n_jogos)))
+
+    for posto in range(inicio, fim):
+        prefixo = ' '.join(_escolhas(int(MASCARAS_GENEROS[posto]), GENEROS))
+        perfis = _sistema.vectorizer.transform([prefixo + ' ' + sufixo for sufixo in sufixos])
+        base = posto * POR_GENERO
+        for bloco in range(0, POR_GENERO, linhas_por_bloco):
+            similaridades = _sistema._mascarar_inativos(
+                _sistema._similaridades(perfis[bloco:bloco + linhas_por_bloco]))
+            indices = _top_k_lote(similaridades, top_n)
+            scores = np.take_along_axis(similaridades, indices, axis=1)
+            linhas = slice(base + bloco, base + bloco + len(indices))
+            indices_saida[linhas, :indices.shape[1]] = indices
+            scores_saida[linhas, :indices.shape[1]] = scores
+    indices_saida.flush()
+    scores_saida.flush()
+    return fim - inicio
+
+def construir(caminho_csv=None, top_n=TOP_N, workers=None, base=artefatos.ARTEFATOS_DIR,
+              generos_por_tarefa=32):
+    """Pontua todos os perfis válidos e publica a tabela com um rename atômico"""
+    from recomendador_tfidf import CSV_JOGOS, inicializar_sistema
+
+    caminho_csv = caminho_csv or CSV_JOGOS
+    checksum = artefatos.checksum_arquivo(caminho_csv)
+    destino = diretorio_tabela(checksum, base)
+    if (destino / "meta.json").exists():
+        print(f"Tabela já existe: {destino}")
+        return destino
+
+    # o artefato do modelo é gerado antes, para os workers só mapearem o mesmo arquivo
+    artefatos.construir(caminho_csv, base)
+    n_jogos = inicializar_sistema(caminho_csv).tfidf_matrix.shape[0]
+    tipo_indice = np.int16 if n_jogos < np.iinfo(np.int16).max else np.int32
+
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=destino.name + ".", dir=destino.parent))
+    try:
+        indices = np.lib.format.open_memmap(tmp / "indices.npy", mode="w+", dtype=tipo_indice,
+                                            shape=(TOTAL_PERFIS, top_n))
+        indices[:] = -1
+        scores = np.lib.format.open_memmap(tmp / "scores.npy", mode="w+", dtype=np.float32,
+                                           shape=(TOTAL_PERFIS, top_n))
+        scores[:] = -np.inf
+        del indices, scores
+
+        tarefas = [(inicio, min(inicio + generos_por_tarefa, len(MASCARAS_GENEROS)))
+                   for inicio in range(0, len(MASCARAS_GENEROS), generos_por_tarefa)]
+        feitos = 0
+        with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_worker,
+                                 initargs=(str(caminho_csv),)) as pool:
+            futuros = [pool.submit(_pontuar_generos, tmp, inicio, fim, top_n) for inicio, fim in tarefas]
+            for futuro in futuros:
+                feitos += futuro.result()
+                print(f"{feitos * POR_GENERO:,}/{TOTAL_PERFIS:,} perfis")
+
+        meta = {
+            "formato": FORMATO,
+            "checksum": checksum,
+            "top_n": top_n,
+            "n_jogos": int(n_jogos),
+            "total_perfis": TOTAL_PERFIS,
+            "generos": GENEROS,
+            "plataformas": PLATAFORMAS,
+            "modos_jogo": MODOS,
+        }
+        with open(tmp / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+
+        try:
+            os.rename(tmp, destino)
+        except OSError:
+            # outro processo publicou a mesma tabela primeiro
+            if not (destino / "meta.json").exists():
+                raise
+            shutil.rmtree(tmp, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    print(f"Tabela salva em {destino} ({TOTAL_PERFIS:,} perfis, top {top_n})")
+    return destino
+
+# Consulta
+
+class TabelaPerfis:
+    def __init__(self, diretorio):
+        diretorio = Path(diretorio)
+        with open(diretorio / "meta.json", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if (self.meta["formato"] != FORMATO or self.meta["total_perfis"] != TOTAL_PERFIS
+                or self.meta["generos"] != GENEROS or self.meta["plataformas"] != PLATAFORMAS
+                or self.meta["modos_jogo"] != MODOS):
+            raise ValueError(f"tabela de perfis incompatível: {diretorio}")
+        self.versao = self.meta["checksum"]
+        self.top_n = self.meta["top_n"]
+        self.indices = np.load(diretorio / "indices.npy", mmap_mode="r")
+        self.scores = np.load(diretorio / "scores.npy", mmap_mode="r")
+
+    def consultar(self, generos, plataformas, modos_jogo, top_n):
+        """(índices, scores) do perfil, ou None se ele tem que ser pontuado na hora"""
+        if top_n > self.top_n:
+            return None
+        linha = linha_do_perfil(generos, plataformas, modos_jogo)
+        if linha is None:
+            return None
+        indices = np.asarray(self.indices[linha, :top_n], dtype=np.intp)
+        scores = np.asarray(self.scores[linha, :top_n], dtype=np.float64)
+        validos = indices >= 0
+        return indices[validos], scores[validos]
+
+_tabelas = {}
+_ausentes = {}   # versão -> momento da última procura sem tabela
+_tabelas_lock = threading.Lock()
+
+def _carregar_tabela(sistema, versao, base):
+    diretorio = diretorio_tabela(versao, base)
+    if not (diretorio / "meta.json").exists():
+        return None
+    try:
+        tabela = TabelaPerfis(diretorio)
+    except Exception as e:
+        print(f"Erro ao carregar tabela de perfis {diretorio}: {e}")
+        return None
+    if tabela.meta["n_jogos"] != sistema.tfidf_matrix.shape[0]:
+        return None
+    return tabela
+
+def tabela_para(sistema, base=artefatos.ARTEFATOS_DIR):
+    """Tabela gerada para a versão de `sistema`, ou None.
+
+    Vale só para o sistema exatamente como foi treinado: depois de qualquer
+    alteração incremental (alteracoes > 0) as respostas seriam outras. Sem
+    tabela, o disco só é consultado de novo depois de RECHECAR_TABELA segundos.
+    """
+    versao = getattr(sistema, "versao", None)
+    if not versao or getattr(sistema, "alteracoes", 0):
+        return None
+    tabela = _tabelas.get(versao)
+    if tabela is not None:
+        return tabela
+    ausente = _ausentes.get(versao)
+    if ausente is not None and time.monotonic() - ausente < RECHECAR_TABELA:
+        return None
+    with _tabelas_lock:
+        if versao not in _tabelas:
+            tabela = _carregar_tabela(sistema, versao, base)
+            if tabela is None:
+                _ausentes[versao] = time.monotonic()
+                return None
+            _ausentes.pop(versao, None)
+            _tabelas[versao] = tabela
+    return _tabelas[versao]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pré-calcula as recomendações de todos os perfis do questionário")
+    parser.add_argument("caminho_csv", nargs="?", default=None)
+    parser.add_argument("--top-n", type=int, default=TOP_N)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    construir(args.caminho_csv, top_n=args.top_n, workers=args.workers)
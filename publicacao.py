@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Publicação do recomendador em uso pelo app
+
+As requisições leem `modelo.atual` uma vez e usam essa referência até o fim,
+então nunca veem um modelo pela metade: cada alteração monta um sistema novo
+e só então troca a referência (uma atribuição, atômica no Python).
+"""
+
+import threading
+
+class ModeloPublicado:
+    def __init__(self, modelo, ao_publicar=None):
+        self._atual = modelo
+        self._escrita = threading.Lock()
+        self._ao_publicar = ao_publicar
+        self._reconstruindo = False
+        self._pendentes = []    # alterações feitas durante uma reconstrução
+
+    @property
+    def atual(self):
+        return self._atual
+
+    def _publicar(self, novo):
+        self._atual = novo
+        if self._ao_publicar:
+            self._ao_publicar(novo)
+
+    def publicar(self, novo):
+        with self._escrita:
+            self._publicar(novo)
+
+    def aplicar(self, alteracao):
+        """Aplica `alteracao(modelo) -> novo modelo` e publica o resultado"""
+        with self._escrita:
+            novo = alteracao(self._atual)
+            if self._reconstruindo:
+                self._pendentes.append(alteracao)
+            self._publicar(novo)
+            return novo
+
+    def reconstruir(self, em_segundo_plano=True):
+        """Refaz o treino completo e publica; alterações feitas no meio do caminho são reaplicadas"""
+        with self._escrita:
+            if self._reconstruindo:
+                return None
+            self._reconstruindo = True
+            self._pendentes = []
+            base = self._atual
+
+        def trabalho():
+            try:
+                novo = base.reconstruir()
+                with self._escrita:
+                    for alteracao in self._pendentes:
+                        novo = alteracao(novo)
+                    self._publicar(novo)
+            except Exception as e:
+                print("Erro ao reconstruir o recomendador:", e)
+            finally:
+                with self._escrita:
+                    self._reconstruindo = False
+                    self._pendentes = []
+
+        if not em_segundo_plano:
+            trabalho()
+            return None
+        thread = threading.Thread(target=trabalho, name="reconstrucao-recomendador", daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo de Sistema de Recomendação colaborativo (item-item)
+
+As avaliações ficam em uma matriz esparsa CSR usuário×jogo. No treino a
+matriz é centrada pela média de cada usuário e os k vizinhos mais similares
+de cada jogo são guardados; para pontuar um usuário basta somar as linhas de
+vizinhos dos jogos que ele avaliou, sem laços em Python.
+
+Uso: python recomendador_colab.py [--banco]
+"""
+
+import os
+import sys
+from pathlib import Path
+import numpy as np
+from scipy import sparse
+from normalizacao import chave_nome
+from recomendador_tfidf import vizinhos_top_k, K_VIZINHOS
+import artefatos
+
+CSV_COLAB = Path(os.environ.get("ARCADE_COLAB_CSV", Path(__file__).resolve().parent / "fontes" / "matriz_utilidade_colab.csv"))
+LINHAS_POR_BLOCO_CSV = 100_000
+NOTA_MIN, NOTA_MAX = 1, 5
+
+def _montar_csr(blocos_linhas, blocos_colunas, blocos_notas, n_usuarios, n_itens):
+    linhas = np.concatenate(blocos_linhas) if blocos_linhas else np.empty(0, np.int32)
+    colunas = np.concatenate(blocos_colunas) if blocos_colunas else np.empty(0, np.int32)
+    notas = np.concatenate(blocos_notas) if blocos_notas else np.empty(0, np.float32)
+    matriz = sparse.csr_matrix((notas, (linhas, colunas)), shape=(n_usuarios, n_itens), dtype=np.float32)
+    matriz.sum_duplicates()
+    return matriz
+
+def carregar_avaliacoes_csv(caminho=CSV_COLAB, linhas_por_bloco=LINHAS_POR_BLOCO_CSV):
+    """Lê a matriz de utilidade (um usuário por linha, um jogo por coluna).
+
+    O CSV é lido em blocos e só as notas preenchidas (> 0) entram na matriz.
+    """
+    import pandas as pd
+
+    blocos_linhas, blocos_colunas, blocos_notas = [], [], []
+    itens = None
+    n_usuarios = 0
+    for bloco in pd.read_csv(caminho, encoding="utf-8-sig", chunksize=linhas_por_bloco):
+        if itens is None:
+            itens = [str(c).strip() for c in bloco.columns]
+        valores = bloco.to_numpy(dtype=np.float32, na_value=0)
+        linhas, colunas = np.nonzero(valores > 0)
+        blocos_linhas.append((linhas + n_usuarios).astype(np.int32))
+        blocos_colunas.append(colunas.astype(np.int32))
+        blocos_notas.append(valores[linhas, colunas])
+        n_usuarios += len(bloco)
+
+    itens = itens or []
+    return _montar_csr(blocos_linhas, blocos_colunas, blocos_notas, n_usuarios, len(itens)), itens
+
+def carregar_avaliacoes_longo(caminho, linhas_por_bloco=LINHAS_POR_BLOCO_CSV):
+    """Lê avaliações no formato longo (USERNAME, ID_PRODUCT, RATING), em blocos.
+
+    É o formato do gen_synthetic_data.py; os jogos ficam identificados pelo
+    ID_PRODUCT, na ordem em que aparecem.
+    """
+    import pandas as pd
+
+    indice_usuarios, indice_itens, itens = {}, {}, []
+    blocos_linhas, blocos_colunas, blocos_notas = [], [], []
+    for bloco in pd.read_csv(caminho, encoding="utf-8-sig", chunksize=linhas_por_bloco,
+                             dtype={"USERNAME": str, "ID_PRODUCT": str}):
+        usuarios = [indice_usuarios.setdefault(u, len(indice_usuarios)) for u in bloco["USERNAME"]]
+        colunas = []
+        for produto in bloco["ID_PRODUCT"]:
+            coluna = indice_itens.get(produto)
+            if coluna is None:
+                coluna = indice_itens[produto] = len(itens)
+                itens.append(produto)
+            colunas.append(coluna)
+        blocos_linhas.append(np.asarray(usuarios, dtype=np.int32))
+        blocos_colunas.append(np.asarray(colunas, dtype=np.int32))
+        blocos_notas.append(bloco["RATING"].to_numpy(dtype=np.float32))
+
+    return _montar_csr(blocos_linhas, blocos_colunas, blocos_notas, len(indice_usuarios), len(itens)), itens
+
+def carregar_avaliacoes_banco(linhas_por_bloco=LINHAS_POR_BLOCO_CSV):
+    """Lê a tabela RATING com um cursor do lado do servidor, em blocos"""
+    from Connect_base import get_pool
+
+    itens, indice_itens = [], {}
+    indice_usuarios = {}
+    blocos_linhas, blocos_colunas, blocos_notas = [], [], []
+
+    with get_pool().connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT ID_PRODUCT, NAME_PRODUCT FROM PRODUCT ORDER BY ID_PRODUCT")
+            for id_product, nome in cur.fetchall():
+                indice_itens[id_product] = len(itens)
+                itens.append(nome)
+
+        with conn.cursor(name="avaliacoes_colab") as cur:
+            cur.itersize = linhas_por_bloco
+            cur.execute("SELECT ID_CLIENT, ID_PRODUCT, RATING FROM RATING")
+            while True:
+                linhas = cur.fetchmany(linhas_por_bloco)
+                if not linhas:
+                    break
+                dados = np.asarray(linhas, dtype=np.int64)
+                usuarios = [indice_usuarios.setdefault(int(u), len(indice_usuarios)) for u in dados[:, 0]]
+                colunas = [indice_itens.get(int(p), -1) for p in dados[:, 1]]
+                validos = np.asarray(colunas) >= 0
+                blocos_linhas.append(np.asarray(usuarios, dtype=np.int32)[validos])
+                blocos_colunas.append(np.asarray(colunas, dtype=np.int32)[validos])
+                blocos_notas.append(dados[validos, 2].astype(np.float32))
+        conn.commit()
+
+    return _montar_csr(blocos_linhas, blocos_colunas, blocos_notas, len(indice_usuarios), len(itens)), itens
+
+def _centralizar_por_usuario(avaliacoes):
+    """Subtrai de cada nota a média do usuário (cosseno ajustado)"""
+    centrada = avaliacoes.astype(np.float32, copy=True)
+    por_usuario = np.diff(centrada.indptr)
+    medias = np.zeros(centrada.shape[0], dtype=np.float32)
+    tem_nota = por_usuario > 0
+    medias[tem_nota] = np.add.reduceat(centrada.data, centrada.indptr[:-1][tem_nota]) / por_usuario[tem_nota]
+    centrada.data -= np.repeat(medias, por_usuario)
+    return centrada
+
+def _normalizar_linhas(matriz):
+    matriz = sparse.csr_matrix(matriz, dtype=np.float32)
+    normas = np.sqrt(np.asarray(matriz.multiply(matriz).sum(axis=1)).ravel())
+    normas[normas == 0] = 1
+    return sparse.diags(1 / normas) @ matriz
+
+class SistemaColaborativo:
+    def __init__(self, avaliacoes=None, itens=None, vizinhos=None, k=K_VIZINHOS):
+        """Treina a partir de `avaliacoes` (CSR usuário×jogo) ou usa `vizinhos` já calculados"""
+        self.itens = np.asarray(itens, dtype=str)
+        self.versao = None
+        if vizinhos is None:
+            itens_por_usuario = _centralizar_por_usuario(avaliacoes).T.tocsr()
+            vizinhos = vizinhos_top_k(_normalizar_linhas(itens_por_usuario), k)
+        self.vizinhos = sparse.csr_matrix(vizinhos, dtype=np.float32)
+        self._vizinhos_abs = abs(self.vizinhos)
+        self._indice_por_chave = {}
+        for idx, nome in enumerate(self.itens):
+            self._indice_por_chave.setdefault(chave_nome(nome), idx)
+
+    def indices_de(self, nomes):
+        """Posição de cada nome na matriz colaborativa (-1 quando não existe)"""
+        return np.fromiter((self._indice_por_chave.get(chave_nome(n), -1) for n in nomes),
+                           dtype=np.int64, count=len(nomes))
+
+    def pontuar(self, avaliacoes_usuario):
+        """Nota prevista (1 a 5) para todos os jogos, dado {nome_do_jogo: nota}.
+
+        Cada jogo avaliado espalha (nota - média do usuário) para seus
+        vizinhos, ponderado pela similaridade. Jogos sem vizinhos avaliados
+        ficam com a média do usuário. Os jogos que o usuário já avaliou ficam
+        com -inf, para não voltarem como recomendação.
+        """
+        n = len(self.itens)
+        if not avaliacoes_usuario:
+            return np.full(n, np.nan, dtype=np.float32)
+
+        indices = self.indices_de(list(avaliacoes_usuario))
+        notas = np.fromiter(avaliacoes_usuario.values(), dtype=np.float32, count=len(avaliacoes_usuario))
+        conhecidos = indices >= 0
+        indices, notas = indices[conhecidos], notas[conhecidos]
+        if len(indices) == 0:
+            return np.full(n, np.nan, dtype=np.float32)
+
+        media = notas.mean()
+        numerador = self.vizinhos[indices].T @ (notas - media)
+        denominador = self._vizinhos_abs[indices].T @ np.ones(len(indices), dtype=np.float32)
+
+        previsao = np.full(n, media, dtype=np.float32)
+        com_vizinhos = denominador > 0
+        previsao[com_vizinhos] += numerador[com_vizinhos] / denominador[com_vizinhos]
+        previsao = np.clip(previsao, NOTA_MIN, NOTA_MAX)
+        previsao[indices] = -np.inf
+        return previsao
+
+    def pontuar_normalizado(self, avaliacoes_usuario):
+        """Mesma previsão de `pontuar`, em escala 0 a 1 para combinar com o cosseno"""
+        return (self.pontuar(avaliacoes_usuario) - NOTA_MIN) / (NOTA_MAX - NOTA_MIN)
+
+    def salvar(self, destino):
+        destino = Path(destino)
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        tmp = destino.with_name(destino.name + ".tmp.npz")
+        np.savez(tmp, itens=self.itens, data=self.vizinhos.data, indices=self.vizinhos.indices,
+                 indptr=self.vizinhos.indptr, forma=np.asarray(self.vizinhos.shape))
+        os.replace(tmp, destino)
+        return destino
+
+    @classmethod
+    def carregar(cls, origem):
+        with np.load(origem, allow_pickle=False) as dados:
+            vizinhos = sparse.csr_matrix((dados['data'], dados['indices'], dados['indptr']),
+                                         shape=tuple(dados['forma']))
+            return cls(itens=dados['itens'], vizinhos=vizinhos)
+
+def caminho_colaborativo(checksum):
+    return artefatos.ARTEFATOS_DIR / f"colab-v{artefatos.FORMATO}-{checksum[:16]}.npz"
+
+# vizinhos treinados com a tabela RATING (python recomendador_colab.py --banco)
+def caminho_colaborativo_banco():
+    return artefatos.ARTEFATOS_DIR / f"colab-v{artefatos.FORMATO}-banco.npz"
+
+def inicializar_colaborativo(caminho_csv=CSV_COLAB):
+    """Carrega os vizinhos pré-calculados (banco ou CSV atual) ou treina em memória.
+
+    Com ARCADE_COLAB_MODELO=als as notas vêm da fatoração de matriz (fatoracao.py).
+    """
+    if os.environ.get("ARCADE_COLAB_MODELO", "").lower() == "als":
+        from fatoracao import inicializar_fatoracao
+        return inicializar_fatoracao(caminho_csv)
+
+    checksum = artefatos.checksum_arquivo(caminho_csv)
+    for caminho, versao in ((caminho_colaborativo_banco(), "banco"),
+                            (caminho_colaborativo(checksum), checksum)):
+        if caminho.exists():
+            try:
+                sistema = SistemaColaborativo.carregar(caminho)
+                sistema.versao = versao
+                return sistema
+            except Exception as e:
+                print(f"Erro ao carregar vizinhos colaborativos {caminho}: {e}")
+
+    avaliacoes, itens = carregar_avaliacoes_csv(caminho_csv)
+    sistema = SistemaColaborativo(avaliacoes, itens)
+    sistema.versao = checksum
+    return sistema
+
+if __name__ == "__main__":
+    if "--banco" in sys.argv:
+        avaliacoes, itens = carregar_avaliacoes_banco()
+        destino = caminho_colaborativo_banco()
+    else:
+        avaliacoes, itens = carregar_avaliacoes_csv()
+        destino = caminho_colaborativo(artefatos.checksum_arquivo(CSV_COLAB))
+    sistema = SistemaColaborativo(avaliacoes, itens)
+    sistema.salvar(destino)
+    print(f"Vizinhos colaborativos salvos em {destino} ({avaliacoes.nnz} avaliações, {len(itens)} jogos)")
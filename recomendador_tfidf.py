@@ -1,100 +1,608 @@
 # -*- coding: utf-8 -*-
 """
 Módulo de Sistema de Recomendação pelo formulário
+
+pandas e scikit-learn só são importados para treinar; carregando o artefato,
+os perfis são vetorizados por inferencia.VetorizadorTfidf.
 """
 
-import pandas as pd
+import os
+import copy
+import threading
+from pathlib import Path
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from scipy import sparse
+from normalizacao import chave_nome, normalizar_texto
+from catalogo import CatalogoColunar, IndiceNomes, Textos
+from inferencia import VetorizadorTfidf
+from metrics import timed
+import artefatos
+import precomputo
+
+CSV_JOGOS = Path(os.environ.get("ARCADE_JOGOS_CSV", Path(__file__).resolve().parent / "fontes" / "jogos_carac.csv"))
+
+# peso padrão das notas previstas pelo filtro colaborativo na mistura com o TF-IDF
+PESO_COLABORATIVO = 0.3
+# com filtros, abaixo desta fração do catálogo só as linhas candidatas são pontuadas
+FRACAO_CANDIDATOS = 0.5
+
+# parâmetros do TfidfVectorizer, também gravados no artefato
+NGRAM_RANGE = (1, 2)
+
+# Limite de memória para a matriz densa de scores de um lote de perfis
+LIMITE_BYTES_LOTE = 64 * 1024 * 1024
+
+def _desempatar(scores, candidatos, k):
+    """Troca os candidatos empatados no k-ésimo score pelos de menor índice.
+
+    O argpartition escolhe um subconjunto qualquer dos jogos empatados no
+    limite; só quando há mais empatados do que vagas a escolha é refeita.
+    """
+    limite = scores[candidatos].min()
+    if np.count_nonzero(scores >= limite) <= k:
+        return candidatos
+    acima = np.flatnonzero(scores > limite)
+    empatados = np.flatnonzero(scores == limite)[:k - len(acima)]
+    return np.concatenate([acima, empatados])
+
+def _top_k(scores, k):
+    """Índices dos k maiores scores em ordem decrescente, sem ordenar o array inteiro.
+
+    Empates são resolvidos pelo menor índice, inclusive no k-ésimo lugar.
+    """
+    n = scores.shape[0]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < n:
+        candidatos = _desempatar(scores, np.argpartition(-scores, k - 1)[:k], k)
+    else:
+        candidatos = np.arange(n)
+    ordem = np.lexsort((candidatos, -scores[candidatos]))
+    return candidatos[ordem]
+
+def _top_k_lote(scores, k):
+    """Versão de _top_k para uma matriz (um perfil por linha)"""
+    n = scores.shape[1]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.intp)
+    if k < n:
+        candidatos = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        limites = np.take_along_axis(scores, candidatos, axis=1).min(axis=1)
+        # linhas com empate no k-ésimo lugar seguem a regra do _top_k
+        for linha in np.flatnonzero(np.count_nonzero(scores >= limites[:, None], axis=1) > k):
+            candidatos[linha] = _desempatar(scores[linha], candidatos[linha], k)
+    else:
+        candidatos = np.broadcast_to(np.arange(n), scores.shape)
+    valores = np.take_along_axis(scores, candidatos, axis=1)
+    ordem = np.lexsort((candidatos, -valores), axis=1)
+    return np.take_along_axis(candidatos, ordem, axis=1)
 
-def criar_base_jogos():
+# Vizinhos guardados por jogo e memória máxima usada por bloco ao calcular o índice
+K_VIZINHOS = 10
+LIMITE_BYTES_VIZINHOS = 64 * 1024 * 1024
 
-    df = pd.read_csv("C:\\Users\\faust\\Desktop\\Sistema de Recomendação\\fontes\\jogos_carac.csv", encoding="utf-8")
+def vizinhos_top_k(matriz, k=K_VIZINHOS, limite_bytes=LIMITE_BYTES_VIZINHOS):
+    """Índice esparso com os k vizinhos mais similares de cada linha.
+
+    `matriz` deve ter as linhas normalizadas (norma L2), assim o produto
+    escalar é o cosseno. A similaridade é calculada em blocos de linhas para
+    que a parte densa nunca passe de `limite_bytes`. O resultado é uma
+    matriz CSR N×N com no máximo k entradas positivas por linha, sem a
+    diagonal.
+    """
+    matriz = sparse.csr_matrix(matriz)
+    n = matriz.shape[0]
+    k = min(k, max(n - 1, 0))
+    transposta = matriz.T.tocsc()
+    linhas_por_bloco = max(1, limite_bytes // (8 * max(1, n)))
+
+    indptr = [0]
+    indices = []
+    dados = []
+    for inicio in range(0, n, linhas_por_bloco):
+        fim = min(inicio + linhas_por_bloco, n)
+        bloco = (matriz[inicio:fim] @ transposta).toarray()
+        bloco[np.arange(fim - inicio), np.arange(inicio, fim)] = -np.inf
+        vizinhos = _top_k_lote(bloco, k)
+        scores = np.take_along_axis(bloco, vizinhos, axis=1)
+        for viz, sc in zip(vizinhos, scores):
+            positivos = sc > 0
+            indices.append(viz[positivos])
+            dados.append(sc[positivos])
+            indptr.append(indptr[-1] + int(positivos.sum()))
+
+    return sparse.csr_matrix(
+        (
+            np.concatenate(dados).astype(np.float32) if dados else np.empty(0, np.float32),
+            np.concatenate(indices).astype(np.int32) if indices else np.empty(0, np.int32),
+            np.asarray(indptr, dtype=np.int64),
+        ),
+        shape=(n, n),
+    )
+
+def criar_base_jogos(caminho=CSV_JOGOS):
+    import pandas as pd
+
+    df = pd.read_csv(caminho, encoding="utf-8")
 
     for col in ["Nome", "Gênero", "Plataforma", "Modo de jogo"]:
         df[col] = df[col].astype(str).str.strip()
+    if "PRICE" in df.columns:
+        df["PRICE"] = pd.to_numeric(df["PRICE"], errors="coerce")
 
     return df
 
+def _valores_atributo(texto):
+    """Valores normalizados de uma célula separada por vírgulas ("PC, Nintendo Switch")"""
+    return {valor.strip() for valor in normalizar_texto(texto).split(",") if valor.strip()}
+
+def _mascaras_coluna(coluna):
+    """Uma máscara booleana por valor que aparece na coluna categórica.
+
+    O catálogo tem poucas combinações distintas ("PC, PlayStation, Xbox"...),
+    então cada combinação é lida uma vez e as máscaras saem dos códigos.
+    """
+    por_valor = {}
+    for codigo, combinacao in enumerate(coluna.categorias):
+        for valor in _valores_atributo(combinacao):
+            por_valor.setdefault(valor, []).append(codigo)
+    mascaras = {valor: np.isin(coluna.codigos, cods) for valor, cods in por_valor.items()}
+    # quantos valores cada linha lista (para "multiplataforma")
+    contagem = np.array([len(_valores_atributo(c)) for c in coluna.categorias],
+                        dtype=np.int64)[coluna.codigos]
+    return mascaras, contagem
+
 class SistemaRecomendacao:
-    def __init__(self):
-        self.df = criar_base_jogos()
+    def __init__(self, artefato=None, caminho_csv=CSV_JOGOS, df=None, catalogo=None):
         self.vectorizer = None
         self.tfidf_matrix = None
-        self.similarity_matrix = None
-        self._treinar_modelo()
-    
-    def _treinar_modelo(self):
-        self.df['descricao'] = (
-            self.df['Gênero'] + ' ' + 
-            self.df['Plataforma'] + ' ' + 
-            self.df['Modo de jogo']
-        )
-        
-        self.vectorizer = TfidfVectorizer(
-            ngram_range=(1, 2),
+        self.versao = None
+        self.alteracoes = 0
+        self._vizinhos = None
+        self._vizinhos_lock = threading.Lock()
+        self._alinhamentos = {}
+        self._mascaras = None
+        # chaves de nome mudadas por adicionar/remover (None = removido), por cima do índice
+        self._chaves_alteradas = {}
+        if artefato is not None:
+            self._carregar_artefato(artefato)
+        else:
+            if catalogo is None:
+                df = criar_base_jogos(caminho_csv) if df is None else df
+                catalogo = CatalogoColunar.de_colunas(
+                    df['Nome'], df['Gênero'], df['Plataforma'], df['Modo de jogo'],
+                    df['PRICE'] if 'PRICE' in df else None)
+            self._treinar_modelo(catalogo)
+        # ID_PRODUCT de cada jogo (-1 até vincular_ids ser chamado)
+        self._ids = np.full(len(self.catalogo), -1, dtype=np.int64)
+        self.ids_vinculados = False
+        # jogos removidos incrementalmente ficam mascarados até a próxima reconstrução
+        self._ativos = np.ones(len(self.catalogo), dtype=bool)
+        self._todos_ativos = True
+        self._atualizar_info()
+
+    def _treinar_modelo(self, catalogo):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        self.catalogo = catalogo
+        vectorizer = TfidfVectorizer(
+            ngram_range=NGRAM_RANGE,
             min_df=1,
             max_df=0.95
         )
-        
-        self.tfidf_matrix = self.vectorizer.fit_transform(self.df['descricao'])
-        self.similarity_matrix = cosine_similarity(self.tfidf_matrix)
-    
+        self.tfidf_matrix = vectorizer.fit_transform(catalogo.descricoes())
+        # só o vocabulário e o IDF seguem para a inferência
+        self.vectorizer = VetorizadorTfidf.de_sklearn(vectorizer)
+        self._indice_nomes = IndiceNomes.de_nomes(catalogo.nomes.lista())
+
+    def _carregar_artefato(self, diretorio):
+        dados = artefatos.carregar_artefato(diretorio)
+        self.vectorizer = VetorizadorTfidf(dados['vocabulario'], dados['idf'],
+                                           dados['meta']['ngram_range'])
+        self.tfidf_matrix = dados['tfidf_matrix']
+        self.versao = dados['meta']['checksum']
+
+        colunas = dados['colunas']
+        self.catalogo = CatalogoColunar.de_artefato(colunas)
+        self._indice_nomes = IndiceNomes(
+            Textos(colunas['chave_utf8'], colunas['chave_deslocamentos']), colunas['chave_posicoes'])
+
+    def _atualizar_info(self):
+        # calculado no treino e a cada alteração, não a cada requisição
+        self._info = {
+            'total_jogos': int(self._ativos.sum()),
+            'tamanho_vocabulario': len(self.vectorizer.vocabulary_),
+            'forma_matriz_tfidf': self.tfidf_matrix.shape
+        }
+
+    def vincular_ids(self, produtos):
+        """Novo sistema com cada jogo do CSV associado ao ID_PRODUCT do banco.
+
+        `produtos` são tuplas (ID_PRODUCT, NAME_PRODUCT[, PRICE]); os nomes são
+        comparados pela chave normalizada, então "Spider-Man: Miles Morales" no
+        banco casa com "Spider-Man Miles Morales" no CSV. O preço do banco, quando
+        vem, passa a valer para o filtro de preço. O sistema atual não muda
+        (pode estar publicado); devolve (novo sistema, nomes sem par).
+        """
+        ids = np.full(len(self.catalogo), -1, dtype=np.int64)
+        precos = np.array(self.catalogo.precos, dtype=np.float64)
+        posicoes = self._indice_nomes.como_dict()
+        posicoes.update(self._chaves_alteradas)
+        for produto in produtos:
+            id_product, nome = produto[0], produto[1]
+            idx = posicoes.get(chave_nome(nome))
+            if idx is not None and ids[idx] < 0:
+                ids[idx] = id_product
+                if len(produto) > 2 and produto[2] is not None:
+                    precos[idx] = float(produto[2])
+        # os scores não mudam, então não conta como alteração (a tabela pré-calculada continua valendo)
+        novo = copy.copy(self)
+        novo._ids = ids
+        novo.catalogo = self.catalogo.com_precos(precos)
+        novo.ids_vinculados = True
+        return novo, self.catalogo.nomes.lista(np.flatnonzero(ids < 0))
+
+    def salvar(self, destino, checksum):
+        """Grava vocabulário, IDF, matriz TF-IDF, colunas do catálogo e índice de nomes em `destino`"""
+        self.versao = checksum
+        return artefatos.salvar_artefato(
+            destino,
+            vocabulario=self.vectorizer.get_feature_names_out(),
+            idf=self.vectorizer.idf_,
+            tfidf_matrix=self.tfidf_matrix,
+            colunas=dict(
+                self.catalogo.colunas(),
+                chave_utf8=self._indice_nomes.chaves.buffer,
+                chave_deslocamentos=self._indice_nomes.chaves.deslocamentos,
+                chave_posicoes=self._indice_nomes.posicoes,
+            ),
+            meta={'checksum': checksum, 'ngram_range': list(self.vectorizer.ngram_range)},
+        )
+
+    @staticmethod
+    def _texto_perfil(generos, plataformas, modos_jogo):
+        return ' '.join(generos) + ' ' + ' '.join(plataformas) + ' ' + ' '.join(modos_jogo)
+
     def criar_perfil_usuario(self, generos, plataformas, modos_jogo):
         """Cria um perfil TF-IDF baseado nas preferências do usuário"""
-        perfil_texto = ' '.join(generos) + ' ' + ' '.join(plataformas) + ' ' + ' '.join(modos_jogo)
-        perfil_tfidf = self.vectorizer.transform([perfil_texto])
+        perfil_texto = self._texto_perfil(generos, plataformas, modos_jogo)
+        with timed("tfidf_transform"):
+            perfil_tfidf = self.vectorizer.transform([perfil_texto])
         return perfil_tfidf
+
+    def _similaridades(self, perfis_tfidf):
+        """Cosseno entre perfis e jogos.
+
+        As linhas do TF-IDF já saem normalizadas (norma L2), então o cosseno
+        é só o produto escalar esparso.
+        """
+        return (perfis_tfidf @ self.tfidf_matrix.T).toarray()
+
+    def _mascarar_inativos(self, similaridades):
+        if self._todos_ativos:
+            return similaridades
+        return np.where(self._ativos, similaridades, -np.inf)
+
+    def mascaras_atributos(self):
+        """Máscaras de plataforma e modo de jogo, montadas na primeira consulta com filtros"""
+        if self._mascaras is None:
+            self._mascaras = {
+                'plataformas': _mascaras_coluna(self.catalogo.plataformas),
+                'modos_jogo': _mascaras_coluna(self.catalogo.modos),
+            }
+        return self._mascaras
+
+    def _mascara_valores(self, atributo, valores):
+        """Linhas com pelo menos um dos `valores` (OU entre os valores de um filtro)"""
+        mascaras, contagem = self.mascaras_atributos()[atributo]
+        mascara = np.zeros(len(self.catalogo), dtype=bool)
+        for valor in valores:
+            valor = normalizar_texto(valor).strip()
+            if atributo == 'plataformas' and valor.startswith('multiplataforma'):
+                # "Multiplataforma" casa com jogos em mais de uma plataforma
+                mascara |= contagem > 1
+            elif valor in mascaras:
+                mascara |= mascaras[valor]
+        if atributo == 'plataformas':
+            # jogos marcados como "Multiplataforma (...)" rodam em qualquer plataforma
+            for chave, linhas in mascaras.items():
+                if chave.startswith('multiplataforma'):
+                    mascara |= linhas
+        return mascara
+
+    def mascara_filtros(self, filtros):
+        """Máscara dos jogos que passam nos filtros rígidos, ou None se não houver filtro.
+
+        `filtros` aceita 'plataformas' e 'modos_jogo' (listas; basta um valor
+        casar) e 'preco_maximo'. Os filtros se combinam com E; jogos sem preço
+        conhecido não passam no filtro de preço.
+        """
+        if not filtros:
+            return None
+        mascara = None
+        for atributo in ('plataformas', 'modos_jogo'):
+            valores = filtros.get(atributo)
+            if valores:
+                parcial = self._mascara_valores(atributo, valores)
+                mascara = parcial if mascara is None else mascara & parcial
+        preco_maximo = filtros.get('preco_maximo')
+        if preco_maximo is not None:
+            with np.errstate(invalid='ignore'):
+                parcial = self.catalogo.precos <= float(preco_maximo)
+            mascara = parcial if mascara is None else mascara & parcial
+        if mascara is not None and not self._todos_ativos:
+            mascara &= self._ativos
+        return mascara
+
+    def _montar_resultados(self, indices, scores):
+        validos = np.isfinite(scores)
+        if not validos.all():
+            indices, scores = indices[validos], scores[validos]
+        return [
+            {
+                'id_product': int(id_product),
+                'nome': nome,
+                'genero': genero,
+                'plataforma': plataforma,
+                'modo_jogo': modo,
+                'score_similaridade': float(score),
+                'score_percentual': f"{score*100:.1f}%"
+            }
+            for id_product, (nome, genero, plataforma, modo), score in zip(
+                self._ids[indices], self.catalogo.registros(indices), scores)
+        ]
     
-    def recomendar(self, generos, plataformas, modos_jogo, top_n=10):
+    def _scores_colaborativos(self, colaborativo, avaliacoes_usuario):
+        """Notas previstas pelo filtro colaborativo na ordem do catálogo TF-IDF"""
+        alinhamento = self._alinhamentos.get(id(colaborativo))
+        if alinhamento is None or alinhamento[0] is not colaborativo:
+            alinhamento = (colaborativo, colaborativo.indices_de(self.catalogo.nomes.lista()))
+            self._alinhamentos[id(colaborativo)] = alinhamento
+        posicoes = alinhamento[1]
+
+        previstas = colaborativo.pontuar_normalizado(avaliacoes_usuario)
+        scores = np.full(len(posicoes), np.nan, dtype=np.float64)
+        existentes = posicoes >= 0
+        scores[existentes] = previstas[posicoes[existentes]]
+        return scores
+
+    def recomendar(self, generos, plataformas, modos_jogo, top_n=10,
+                   colaborativo=None, avaliacoes_usuario=None, peso_colaborativo=PESO_COLABORATIVO,
+                   filtros=None):
     
         perfil_usuario = self.criar_perfil_usuario(generos, plataformas, modos_jogo)
-        
-        similaridades = cosine_similarity(perfil_usuario, self.tfidf_matrix).flatten()
-        
-        indices_similares = similaridades.argsort()[::-1]
+        mascara = self.mascara_filtros(filtros)
+        candidatos = None
+        if mascara is not None:
+            candidatos = np.flatnonzero(mascara)
+            if not len(candidatos):
+                return []
+            if len(candidatos) >= FRACAO_CANDIDATOS * len(self.catalogo):
+                candidatos = None
+
+        with timed("similarity"):
+            if candidatos is not None:
+                # só as linhas que passaram nos filtros entram no produto esparso
+                similaridades = (perfil_usuario @ self.tfidf_matrix[candidatos].T).toarray()[0]
+            elif mascara is not None:
+                similaridades = np.where(mascara, self._similaridades(perfil_usuario)[0], -np.inf)
+            else:
+                similaridades = self._mascarar_inativos(self._similaridades(perfil_usuario)[0])
 
-        recomendacoes = []
-        for idx in indices_similares:
-            if len(recomendacoes) >= top_n:
-                break
+            if colaborativo is not None and avaliacoes_usuario:
+                colab = self._scores_colaborativos(colaborativo, avaliacoes_usuario)
+                if candidatos is not None:
+                    colab = colab[candidatos]
+                # jogos fora da matriz colaborativa ficam só com o score do TF-IDF
+                similaridades = np.where(
+                    np.isnan(colab),
+                    similaridades,
+                    (1 - peso_colaborativo) * similaridades + peso_colaborativo * colab
+                )
             
-            jogo = self.df.iloc[idx]
-            score = similaridades[idx]
-   
-            recomendacoes.append({
-                'nome': jogo['Nome'],
-                'genero': jogo['Gênero'],
-                'plataforma': jogo['Plataforma'],
-                'modo_jogo': jogo['Modo de jogo'],
-                'score_similaridade': float(score),
-                'score_percentual': f"{score*100:.1f}%"
-            })
-        
-        return recomendacoes
+            indices = _top_k(similaridades, top_n)
+            scores = similaridades[indices]
+            if candidatos is not None:
+                indices = candidatos[indices]
+
+        return self._montar_resultados(indices, scores)
+
+    def recomendar_lote(self, perfis, top_n=10):
+        """Recomenda para vários perfis de uma vez.
+
+        `perfis` é uma lista de dicionários no formato de preferencias_usuario
+        ('generos', 'plataformas', 'modos_jogo' e opcionalmente 'filtros').
+        Todos os perfis são pontuados com um único produto de matrizes esparsas
+        por bloco.
+        """
+        textos = [
+            self._texto_perfil(p['generos'], p['plataformas'], p['modos_jogo'])
+            for p in perfis
+        ]
+        if not textos:
+            return []
+
+        with timed("tfidf_transform"):
+            perfis_tfidf = self.vectorizer.transform(textos)
+        linhas_por_bloco = max(1, LIMITE_BYTES_LOTE // (8 * max(1, self.tfidf_matrix.shape[0])))
+
+        resultados = []
+        for inicio in range(0, len(textos), linhas_por_bloco):
+            with timed("similarity"):
+                similaridades = self._mascarar_inativos(
+                    self._similaridades(perfis_tfidf[inicio:inicio + linhas_por_bloco]))
+                for linha, perfil in enumerate(perfis[inicio:inicio + linhas_por_bloco]):
+                    mascara = self.mascara_filtros(perfil.get('filtros'))
+                    if mascara is not None:
+                        similaridades[linha, ~mascara] = -np.inf
+                indices = _top_k_lote(similaridades, top_n)
+                scores = np.take_along_axis(similaridades, indices, axis=1)
+            resultados.extend(
+                self._montar_resultados(idx, sc) for idx, sc in zip(indices, scores)
+            )
+        return resultados
+
+    def indice_vizinhos(self):
+        """Índice de jogos similares, calculado na primeira consulta"""
+        if self._vizinhos is None:
+            with self._vizinhos_lock:
+                if self._vizinhos is None:
+                    self._vizinhos = vizinhos_top_k(self.tfidf_matrix)
+        return self._vizinhos
+
+    def indice_do_jogo(self, nome):
+        chave = chave_nome(nome)
+        if chave in self._chaves_alteradas:
+            return self._chaves_alteradas[chave]
+        return self._indice_nomes.procurar(chave)
+
+    def jogos_similares(self, nome, top_n=5):
+        """Jogos mais parecidos com `nome`, lidos direto do índice de vizinhos"""
+        idx = self.indice_do_jogo(nome)
+        if idx is None:
+            return []
+        vizinhos = self.indice_vizinhos()
+        inicio, fim = vizinhos.indptr[idx], vizinhos.indptr[idx + 1]
+        # operações do scipy podem reordenar as colunas, então a ordem vem dos scores
+        indices = vizinhos.indices[inicio:fim]
+        scores = vizinhos.data[inicio:fim]
+        if not self._todos_ativos:
+            ativos = self._ativos[indices]
+            indices, scores = indices[ativos], scores[ativos]
+        ordem = np.argsort(-scores, kind='stable')[:top_n]
+        return self._montar_resultados(indices[ordem], scores[ordem])
+
+    # Alterações incrementais. Nenhuma delas modifica o objeto atual: cada uma
+    # devolve um novo sistema, que pode ser publicado com uma troca de referência
+    # enquanto requisições em andamento continuam usando o anterior.
+
+    def _copiar(self):
+        novo = copy.copy(self)
+        novo._vizinhos = None
+        novo._vizinhos_lock = threading.Lock()
+        novo._alinhamentos = {}
+        novo._mascaras = None
+        novo._chaves_alteradas = dict(self._chaves_alteradas)
+        novo.alteracoes = self.alteracoes + 1
+        return novo
+
+    def adicionar(self, jogos):
+        """Novo sistema com `jogos` acrescentados ao fim da matriz, sem refazer o treino.
+
+        `jogos` são dicionários com 'nome', 'genero', 'plataforma', 'modo_jogo'
+        e opcionalmente 'id_product' e 'preco'. Termos que não estão no vocabulário são
+        ignorados até a próxima reconstrução completa.
+        """
+        jogos = list(jogos)
+        if not jogos:
+            return self
+        novo = self._copiar()
+        campos = {campo: [str(j[campo]).strip() for j in jogos]
+                  for campo in ('nome', 'genero', 'plataforma', 'modo_jogo')}
+        descricoes = [f"{g} {p} {m}" for g, p, m in
+                      zip(campos['genero'], campos['plataforma'], campos['modo_jogo'])]
+
+        inicio = len(self.catalogo)
+        novo.tfidf_matrix = sparse.vstack(
+            [self.tfidf_matrix, self.vectorizer.transform(descricoes)], format='csr')
+        novo.catalogo = self.catalogo.acrescentar(
+            campos['nome'], campos['genero'], campos['plataforma'], campos['modo_jogo'],
+            [float(j.get('preco', np.nan)) for j in jogos])
+        novo._ids = np.concatenate([self._ids, [int(j.get('id_product', -1)) for j in jogos]])
+        novo._ativos = np.concatenate([self._ativos, np.ones(len(jogos), dtype=bool)])
+        for idx, nome in enumerate(campos['nome'], start=inicio):
+            novo._chaves_alteradas[chave_nome(nome)] = idx
+        novo._atualizar_info()
+        return novo
+
+    def remover(self, nomes):
+        """Novo sistema em que os jogos de `nomes` deixam de ser recomendados"""
+        novo = self._copiar()
+        novo._ativos = self._ativos.copy()
+        for nome in nomes:
+            idx = novo.indice_do_jogo(nome)
+            if idx is not None:
+                novo._ativos[idx] = False
+                novo._chaves_alteradas[chave_nome(nome)] = None
+        novo._todos_ativos = bool(novo._ativos.all())
+        novo._atualizar_info()
+        return novo
+
+    def atualizar(self, jogos):
+        """Novo sistema com os dados de `jogos` substituídos (mascara a linha antiga e acrescenta a nova)"""
+        jogos = list(jogos)
+        ids_atuais = {}
+        atualizados = []
+        for jogo in jogos:
+            idx = self.indice_do_jogo(jogo['nome'])
+            if idx is not None and 'id_product' not in jogo:
+                ids_atuais[jogo['nome']] = int(self._ids[idx])
+            if idx is not None and 'preco' not in jogo:
+                jogo = dict(jogo, preco=float(self.catalogo.precos[idx]))
+            atualizados.append(jogo)
+        jogos = [dict(j, id_product=ids_atuais.get(j['nome'], j.get('id_product', -1))) for j in atualizados]
+        return self.remover([j['nome'] for j in jogos]).adicionar(jogos)
+
+    def reconstruir(self):
+        """Treino completo sobre os jogos ativos (vocabulário e IDF recalculados)"""
+        ativos = self._ativos
+        novo = SistemaRecomendacao(catalogo=self.catalogo.subconjunto(ativos))
+        novo._ids = self._ids[ativos].copy()
+        novo.ids_vinculados = self.ids_vinculados
+        novo.versao = self.versao
+        novo.alteracoes = self.alteracoes + 1
+        return novo
 
     def get_info_sistema(self):
         """Retorna informações sobre o sistema"""
-        return {
-            'total_jogos': len(self.df),
-            'tamanho_vocabulario': len(self.vectorizer.get_feature_names_out()),
-            'forma_matriz_tfidf': self.tfidf_matrix.shape
-        }
+        return dict(self._info)
+
 
+def inicializar_sistema(caminho_csv=CSV_JOGOS):
+    """Carrega o artefato do CSV atual se ele já foi gerado; senão treina em memória"""
+    checksum = artefatos.checksum_arquivo(caminho_csv)
+    diretorio = artefatos.diretorio_artefato(checksum)
+    if (diretorio / "meta.json").exists():
+        try:
+            return SistemaRecomendacao(artefato=diretorio)
+        except Exception as e:
+            print(f"Erro ao carregar artefato {diretorio}: {e}")
 
-def inicializar_sistema():
-    return SistemaRecomendacao()
+    print("Artefato do modelo não encontrado, treinando (gere com: python artefatos.py)")
+    sistema = SistemaRecomendacao(caminho_csv=caminho_csv)
+    sistema.versao = checksum
+    return sistema
 
-def gerar_recomendacoes(sistema, preferencias_usuario, num_recomendacoes=10):
+def gerar_recomendacoes(sistema, preferencias_usuario, num_recomendacoes=10,
+                        colaborativo=None, avaliacoes_usuario=None,
+                        peso_colaborativo=PESO_COLABORATIVO):
    
     try:
-        recomendacoes = sistema.recomendar(
-            generos=preferencias_usuario['generos'],
-            plataformas=preferencias_usuario['plataformas'],
-            modos_jogo=preferencias_usuario['modos_jogo'],
-            top_n=num_recomendacoes
-        )
+        recomendacoes = None
+        if not preferencias_usuario.get('filtros') and not (colaborativo is not None and avaliacoes_usuario):
+            # perfis do questionário já pontuados offline para esta versão do catálogo
+            tabela = precomputo.tabela_para(sistema)
+            if tabela is not None:
+                encontrado = tabela.consultar(preferencias_usuario['generos'],
+                                              preferencias_usuario['plataformas'],
+                                              preferencias_usuario['modos_jogo'],
+                                              num_recomendacoes)
+                if encontrado is not None:
+                    recomendacoes = sistema._montar_resultados(*encontrado)
+
+        if recomendacoes is None:
+            recomendacoes = sistema.recomendar(
+                generos=preferencias_usuario['generos'],
+                plataformas=preferencias_usuario['plataformas'],
+                modos_jogo=preferencias_usuario['modos_jogo'],
+                top_n=num_recomendacoes,
+                colaborativo=colaborativo,
+                avaliacoes_usuario=avaliacoes_usuario,
+                peso_colaborativo=peso_colaborativo,
+                filtros=preferencias_usuario.get('filtros')
+            )
         
         return {
             'sucesso': True,
@@ -0,0 +1,200 @@
+import re
+import time
+import heapq
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from normalizacao import normalizar_texto
+
+SEARCH_TTL = 60.0     # seconds before the catalog is reloaded from the database
+SEARCH_RETRY = 10.0   # seconds before a failed reload is tried again
+PER_PAGE = 20
+
+# row layout: (ID_PRODUCT, NAME_PRODUCT, GENRE, PLATFORM, GAME_MODE, PRICE)
+FIELD_WEIGHTS = ((1, 3.0), (2, 1.5), (3, 1.0), (4, 0.5))
+PREFIX_FACTOR = 0.7
+TRIGRAM_FACTOR = 0.5
+MIN_TRIGRAM_SIMILARITY = 0.4
+
+_TOKEN = re.compile(r"[0-9a-z]+")
+
+def tokenize(text):
+    return _TOKEN.findall(normalizar_texto(text))
+
+def trigrams(token):
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class SearchIndex:
+    """In-memory inverted index over the product catalog.
+
+    Matching is accent-insensitive ("acao" finds "Ação"). Each query token is
+    matched exactly, then as a prefix, and finally by trigram similarity to
+    tolerate typos. Documents are ranked by the number of query tokens they
+    match and by field-weighted score.
+    """
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self._postings = defaultdict(dict)     # token -> {doc: weight}
+        self._trigrams = defaultdict(set)      # trigram -> tokens
+        self._names = []                        # normalized names, for autocomplete
+        name_tokens = []                        # (token, doc) from names, sorted
+
+        for doc, row in enumerate(self.rows):
+            for field, weight in FIELD_WEIGHTS:
+                for token in tokenize(row[field] or ""):
+                    postings = self._postings[token]
+                    postings[doc] = max(postings.get(doc, 0.0), weight)
+                    if field == 1:
+                        name_tokens.append((token, doc))
+            self._names.append(normalizar_texto(row[1]))
+
+        for token in self._postings:
+            for gram in trigrams(token):
+                self._trigrams[gram].add(token)
+
+        self._terms = sorted(self._postings)
+        name_tokens.sort()
+        self._name_tokens = name_tokens
+
+    def _prefix_terms(self, prefix):
+        start = bisect_left(self._terms, prefix)
+        for term in self._terms[start:]:
+            if not term.startswith(prefix):
+                break
+            yield term
+
+    def _similar_terms(self, token):
+        grams = trigrams(token)
+        counts = defaultdict(int)
+        for gram in grams:
+            for term in self._trigrams.get(gram, ()):
+                counts[term] += 1
+        for term, shared in counts.items():
+            similarity = shared / (len(grams) + len(trigrams(term)) - shared)
+            if similarity >= MIN_TRIGRAM_SIMILARITY:
+                yield term, similarity
+
+    def _score_token(self, token):
+        scores = {}
+        for doc, weight in self._postings.get(token, {}).items():
+            scores[doc] = weight
+        for term in self._prefix_terms(token):
+            if term == token:
+                continue
+            for doc, weight in self._postings[term].items():
+                scores[doc] = max(scores.get(doc, 0.0), weight * PREFIX_FACTOR)
+        if not scores:
+            for term, similarity in self._similar_terms(token):
+                for doc, weight in self._postings[term].items():
+                    scores[doc] = max(scores.get(doc, 0.0), weight * TRIGRAM_FACTOR * similarity)
+        return scores
+
+    def search(self, term, page=1, per_page=PER_PAGE):
+        """Returns (rows of the requested page, total number of matches)"""
+        tokens = tokenize(term)
+        if not tokens:
+            return [], 0
+
+        matched = defaultdict(int)
+        score = defaultdict(float)
+        for token in dict.fromkeys(tokens):
+            for doc, value in self._score_token(token).items():
+                matched[doc] += 1
+                score[doc] += value
+
+        phrase = " ".join(tokens)
+        for doc in score:
+            if self._names[doc].startswith(phrase):
+                score[doc] += 2.0
+
+        page = max(1, page)
+        # only the docs up to the requested page are ordered, not the whole result
+        ranked = heapq.nlargest(
+            page * per_page, score,
+            key=lambda doc: (matched[doc], score[doc], -doc)
+        )
+        start = (page - 1) * per_page
+        return [self.rows[doc] for doc in ranked[start:start + per_page]], len(score)
+
+    def autocomplete(self, prefix, limit=8):
+        """Products whose name (or a word of it) starts with `prefix`"""
+        tokens = tokenize(prefix)
+        if not tokens:
+            return []
+        phrase = " ".join(tokens)
+        last = tokens[-1]
+
+        seen = {}
+        start = bisect_left(self._name_tokens, (last,))
+        for token, doc in self._name_tokens[start:]:
+            if not token.startswith(last):
+                break
+            if doc not in seen and all(t in self._names[doc] for t in tokens[:-1]):
+                seen[doc] = 0 if self._names[doc].startswith(phrase) else 1
+
+        best = heapq.nsmallest(limit, seen, key=lambda doc: (seen[doc], self._names[doc]))
+        return [{"id": self.rows[doc][0], "name": self.rows[doc][1]} for doc in best]
+
+_index = None
+_built_at = 0.0
+_failed_at = None
+_refreshing = False
+_index_lock = threading.Lock()
+_first_build_lock = threading.Lock()
+
+def _load(load_rows):
+    """Builds a new index; on failure records the time so the next try waits SEARCH_RETRY"""
+    global _index, _built_at, _failed_at, _refreshing
+    try:
+        index = SearchIndex(load_rows())
+    except Exception as e:
+        print(f"Error loading the search index: {e}")
+        with _index_lock:
+            _failed_at = time.monotonic()
+            _refreshing = False
+        raise
+    with _index_lock:
+        _index, _built_at, _failed_at, _refreshing = index, time.monotonic(), None, False
+    return index
+
+def _refresh(load_rows):
+    try:
+        _load(load_rows)
+    except Exception:
+        pass   # the old index keeps answering
+
+def get_search_index(load_rows):
+    """Shared index, rebuilt from `load_rows()` after SEARCH_TTL seconds.
+
+    Only the first build runs on the request thread. Later rebuilds run on a
+    background thread while the current index keeps answering, and the new
+    one replaces it when it is ready. After a failed load the database is not
+    asked again for SEARCH_RETRY seconds.
+    """
+    global _refreshing
+    if _index is None:
+        with _first_build_lock:
+            if _index is None:
+                if _failed_at is not None and time.monotonic() - _failed_at < SEARCH_RETRY:
+                    raise RuntimeError("Search index unavailable")
+                return _load(load_rows)
+        return _index
+
+    index = _index
+    now = time.monotonic()
+    retry_wait = _failed_at is not None and now - _failed_at < SEARCH_RETRY
+    if now - _built_at > SEARCH_TTL and not _refreshing and not retry_wait:
+        with _index_lock:
+            if _refreshing:
+                return index
+            _refreshing = True
+        threading.Thread(target=_refresh, args=(load_rows,), name="search-index", daemon=True).start()
+    return index
+
+def invalidate_search_index():
+    """The next search starts a rebuild (the current index answers until it is ready)"""
+    global _built_at, _failed_at
+    _built_at = float("-inf")
+    _failed_at = None
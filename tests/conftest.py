@@ -0,0 +1,77 @@
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+import os
+import uuid
+import pytest
+import gen_synthetic_data
+
+SCHEMA = RAIZ / "data_base" / "SQL_tabelas.sql"
+
+def aplicar_schema(conn):
+    with conn.cursor() as cur:
+        cur.execute(SCHEMA.read_text(encoding="utf-8"))
+
+@pytest.fixture(scope="session")
+def dados_sinteticos(tmp_path_factory):
+    """Catálogo, usuários e avaliações pequenos (300 jogos, 150 usuários)"""
+    saida = tmp_path_factory.mktemp("dados_sinteticos")
+    gen_synthetic_data.main(["--games", "300", "--users", "150", "--out", str(saida)])
+    return saida
+
+@pytest.fixture(scope="session")
+def sistema(dados_sinteticos):
+    from recomendador_tfidf import SistemaRecomendacao
+    return SistemaRecomendacao(caminho_csv=dados_sinteticos / "jogos_carac.csv")
+
+@pytest.fixture
+def banco(monkeypatch):
+    """Banco PostgreSQL novo com o SQL_tabelas.sql aplicado, ligado ao pool do Connect_base.
+
+    Precisa de ARCADE_TEST_DSN (ex.: "host=localhost user=postgres dbname=postgres");
+    sem ela os testes que usam o banco são pulados.
+    """
+    dsn = os.environ.get("ARCADE_TEST_DSN")
+    if not dsn:
+        pytest.skip("ARCADE_TEST_DSN não definida")
+    import psycopg2
+    import psycopg2.extensions
+    import Connect_base
+
+    nome = f"arcade_teste_{uuid.uuid4().hex[:12]}"
+    admin = psycopg2.connect(dsn)
+    admin.autocommit = True
+    with admin.cursor() as cur:
+        cur.execute(f"CREATE DATABASE {nome} ENCODING 'UTF8' TEMPLATE template0")
+    parametros = dict(psycopg2.extensions.parse_dsn(dsn), dbname=nome)
+    conn = psycopg2.connect(**parametros)
+    conn.autocommit = True
+    aplicar_schema(conn)
+
+    pool = Connect_base.ConnectionPool(minconn=0, maxconn=4,
+                                       cursor_factory=Connect_base.TimedCursor, **parametros)
+    monkeypatch.setattr(Connect_base, "_pool", pool)
+    try:
+        yield conn
+    finally:
+        pool.closeall()
+        conn.close()
+        with admin.cursor() as cur:
+            cur.execute(f"DROP DATABASE IF EXISTS {nome}")
+        admin.close()
+
+@pytest.fixture(scope="session")
+def app_module():
+    """app.py importado com o banco substituído pelo stand-in dos benchmarks"""
+    import app
+    from benchmarks import standin
+    standin.instalar(app, app.modelo.atual)
+    return app
+
+@pytest.fixture
+def cliente(app_module):
+    app_module.home_cache.invalidate()
+    return app_module.app.test_client()
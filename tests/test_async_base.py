@@ -0,0 +1,60 @@
+import pytest
+
+asyncpg = pytest.importorskip("asyncpg")
+
+import async_base
+from password_hashing import HashingPool, hash_cost
+
+@pytest.fixture
+def async_db(banco, monkeypatch):
+    params = banco.get_dsn_parameters()
+    db = async_base.AsyncDatabase(min_size=1, max_size=2, database=params["dbname"],
+                                  host=params.get("host"), port=int(params.get("port", 5432)),
+                                  user=params.get("user"), password=banco.info.password)
+    hashing = HashingPool(workers=1, rounds=5)
+    monkeypatch.setattr(async_base, "_db", db)
+    monkeypatch.setattr(async_base, "get_hashing_pool", lambda: hashing)
+    yield db
+    db.close()
+    hashing.shutdown()
+
+def stored_hash(banco, username):
+    with banco.cursor() as cur:
+        cur.execute("SELECT PASSWORD_HASH FROM CLIENT WHERE USERNAME = %s", (username,))
+        return cur.fetchone()[0]
+
+def test_login_rehashes_through_the_async_pool(banco, async_db):
+    antigo = HashingPool(workers=1, rounds=4)
+    try:
+        hash_barato = antigo.hash_password("segredo")
+    finally:
+        antigo.shutdown()
+    with banco.cursor() as cur:
+        cur.execute("INSERT INTO CLIENT (USERNAME, PASSWORD_HASH) VALUES ('ana', %s)", (hash_barato,))
+
+    assert async_db.run_sync(async_base.User_Login("ana", "errada")) == (False, None)
+    assert stored_hash(banco, "ana") == hash_barato
+
+    assert async_db.run_sync(async_base.User_Login("ana", "segredo")) == (True, "ana")
+    novo = stored_hash(banco, "ana")
+    assert hash_cost(novo) == 5
+    assert async_db.run_sync(async_base.User_Login("ana", "segredo")) == (True, "ana")
+    assert stored_hash(banco, "ana") == novo
+
+    assert async_db.run_sync(async_base.User_Login("ninguem", "segredo")) == (False, None)
+
+def test_failed_rehash_does_not_fail_the_login(banco, async_db, monkeypatch):
+    antigo = HashingPool(workers=1, rounds=4)
+    try:
+        hash_barato = antigo.hash_password("segredo")
+    finally:
+        antigo.shutdown()
+    with banco.cursor() as cur:
+        cur.execute("INSERT INTO CLIENT (USERNAME, PASSWORD_HASH) VALUES ('bia', %s)", (hash_barato,))
+
+    async def falha(query, *args):
+        raise ConnectionError("conexão perdida")
+
+    monkeypatch.setattr(async_db, "execute", falha)
+    assert async_db.run_sync(async_base.User_Login("bia", "segredo")) == (True, "bia")
+    assert stored_hash(banco, "bia") == hash_barato
@@ -0,0 +1,49 @@
+from decimal import Decimal
+import pytest
+import Connect_base
+
+@pytest.fixture
+def catalogo(banco):
+    """60 produtos extras avaliados com poucas médias distintas (muitos empates)"""
+    with banco.cursor() as cur:
+        cur.execute("INSERT INTO PRODUCT (NAME_PRODUCT, GENRE, PLATFORM, GAME_MODE, PRICE) "
+                    "SELECT 'Empate ' || g, 'Ação', 'PC', 'Single-player', 10 FROM generate_series(1, 60) g")
+        cur.execute("INSERT INTO CLIENT (USERNAME, PASSWORD_HASH) VALUES ('a', 'x'), ('b', 'x')")
+        cur.execute("SELECT ID_CLIENT FROM CLIENT ORDER BY ID_CLIENT")
+        a, b = [row[0] for row in cur.fetchall()]
+        # notas 3, 4 e 5 para todos; metade recebe uma segunda nota e fica com média .5
+        cur.execute("INSERT INTO RATING SELECT %s, ID_PRODUCT, 3 + ID_PRODUCT %% 3 FROM PRODUCT", (a,))
+        cur.execute("INSERT INTO RATING SELECT %s, ID_PRODUCT, 4 + ID_PRODUCT %% 3 FROM PRODUCT "
+                    "WHERE ID_PRODUCT %% 2 = 0 AND ID_PRODUCT %% 3 < 2", (b,))
+        cur.execute("SELECT ID_PRODUCT, AVERAGE_RATING FROM PRODUCT_RATING_STATS WHERE RATING_COUNT > 0 "
+                    "ORDER BY AVERAGE_RATING DESC, ID_PRODUCT")
+        return cur.fetchall()
+
+@pytest.mark.parametrize("per_page", [1, 7, 20, 200])
+def test_pages_cover_the_catalog_once_in_order(catalogo, per_page):
+    assert len({media for _, media in catalogo}) < len(catalogo) // 10
+
+    vistos = []
+    cursor = None
+    for _ in range(len(catalogo) // per_page + 1):
+        linhas, imagens, cursor = Connect_base.catalog_page(cursor, per_page)
+        assert len(linhas) <= per_page and len(imagens) == len(linhas)
+        vistos.extend((row[0], row[6]) for row in linhas)
+        if cursor is None:
+            break
+        assert len(linhas) == per_page
+    assert vistos == catalogo
+
+def test_cursor_round_trip(catalogo):
+    linhas, _, cursor = Connect_base.catalog_page(per_page=5)
+    assert cursor == Connect_base.catalog_cursor(linhas[-1])
+    assert Connect_base.parse_catalog_cursor(cursor) == (linhas[-1][6], linhas[-1][0])
+    assert Connect_base.parse_catalog_cursor("4.50_12") == (Decimal("4.50"), 12)
+    for invalido in ("", "abc", "4.5", "x_1", "4.5_y", "1_2_3"):
+        assert Connect_base.parse_catalog_cursor(invalido) is None
+    # cursor inválido volta para a primeira página
+    assert Connect_base.catalog_page("lixo", 5)[0] == linhas
+
+def test_export_follows_the_same_order(catalogo):
+    exportado = [(row[0], row[6]) for linhas in Connect_base.iter_catalog(chunk_size=13) for row in linhas]
+    assert exportado == catalogo
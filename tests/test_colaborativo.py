@@ -0,0 +1,39 @@
+import numpy as np
+from scipy import sparse
+from catalogo import CatalogoColunar
+from recomendador_colab import SistemaColaborativo
+from recomendador_tfidf import SistemaRecomendacao
+
+JOGOS = ["Stray", "Celeste", "Hades", "Portal", "Terraria"]
+NOTAS = np.array([
+    [5, 4, 0, 1, 0],
+    [4, 5, 1, 0, 2],
+    [1, 0, 5, 4, 0],
+    [0, 1, 4, 5, 4],
+    [5, 5, 0, 0, 1],
+], dtype=np.float32)
+
+def colaborativo():
+    return SistemaColaborativo(sparse.csr_matrix(NOTAS), JOGOS)
+
+def test_jogos_avaliados_nao_recebem_previsao():
+    previsao = colaborativo().pontuar({"stray": 5, "Hades": 2, "Jogo Fora da Matriz": 4})
+    assert previsao[0] == -np.inf and previsao[2] == -np.inf
+    outros = previsao[[1, 3, 4]]
+    assert np.isfinite(outros).all() and (outros >= 1).all() and (outros <= 5).all()
+
+def test_sem_avaliacoes_conhecidas_nao_pontua():
+    assert np.isnan(colaborativo().pontuar({})).all()
+    assert np.isnan(colaborativo().pontuar({"Jogo Fora da Matriz": 3})).all()
+
+def test_mistura_nao_devolve_jogos_avaliados():
+    catalogo = CatalogoColunar.de_colunas(
+        JOGOS, ["Aventura", "Plataforma", "Roguelike", "Puzzle", "Sandbox"],
+        ["PC"] * 5, ["Single-player"] * 5)
+    sistema = SistemaRecomendacao(catalogo=catalogo)
+    avaliacoes = {"Stray": 5, "Celeste": 4}
+    recomendacoes = sistema.recomendar(["Aventura", "Plataforma"], ["PC"], ["Single-player"],
+                                       top_n=5, colaborativo=colaborativo(),
+                                       avaliacoes_usuario=avaliacoes)
+    nomes = [r["nome"] for r in recomendacoes]
+    assert nomes and not set(nomes) & set(avaliacoes)
@@ -0,0 +1,113 @@
+import threading
+import time
+import psycopg2
+import psycopg2.extensions
+import pytest
+import Connect_base
+from Connect_base import ConnectionPool, PoolTimeout
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, vars=None):
+        if self.conn.dead:
+            raise psycopg2.OperationalError("server closed the connection")
+        self.conn.queries.append(query)
+
+class FakeInfo:
+    transaction_status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.dead = False
+        self.queries = []
+        self.rollbacks = 0
+        self.info = FakeInfo()
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = 1
+
+@pytest.fixture
+def conexoes(monkeypatch):
+    criadas = []
+
+    def connect(**kwargs):
+        criadas.append(FakeConnection())
+        return criadas[-1]
+
+    monkeypatch.setattr(Connect_base.psycopg2, "connect", connect)
+    return criadas
+
+def test_checkout_reuses_idle_connection(conexoes):
+    pool = ConnectionPool(minconn=1, maxconn=2, dbname="x")
+    assert len(conexoes) == 1
+    with pool.connection() as conn:
+        assert conn is conexoes[0]
+        assert pool.stats()["in_use"] == 1
+    with pool.connection() as conn:
+        assert conn is conexoes[0]
+    stats = pool.stats()
+    assert stats["checkouts"] == 2 and stats["connections_created"] == 1
+    assert stats["in_use"] == 0 and stats["idle"] == 1
+
+def test_timeout_when_exhausted_and_wakeup_on_return(conexoes):
+    pool = ConnectionPool(minconn=0, maxconn=1, timeout=0.05, dbname="x")
+    conn = pool.getconn()
+    inicio = time.monotonic()
+    with pytest.raises(PoolTimeout):
+        pool.getconn()
+    assert time.monotonic() - inicio >= 0.05
+    assert pool.stats()["timeouts"] == 1
+
+    obtida = []
+    espera = threading.Thread(target=lambda: obtida.append(pool.getconn(timeout=2)))
+    espera.start()
+    time.sleep(0.05)
+    pool.putconn(conn)
+    espera.join(2)
+    assert obtida == [conn]
+    assert len(conexoes) == 1
+
+def test_connections_older_than_max_age_are_replaced(conexoes):
+    pool = ConnectionPool(minconn=0, maxconn=2, max_age=0.05, dbname="x")
+    with pool.connection() as primeira:
+        pass
+    time.sleep(0.06)
+    with pool.connection() as segunda:
+        assert segunda is not primeira
+    assert primeira.closed
+    assert pool.stats()["connections_discarded"] == 1
+
+def test_idle_connection_is_checked_and_dropped_when_dead(conexoes):
+    pool = ConnectionPool(minconn=1, maxconn=2, check_idle=0.0, dbname="x")
+    conexoes[0].dead = True
+    with pool.connection() as conn:
+        assert conn is conexoes[1]
+    assert conexoes[0].closed
+
+def test_broken_connection_is_not_returned_to_the_pool(conexoes):
+    pool = ConnectionPool(minconn=0, maxconn=2, dbname="x")
+    with pytest.raises(psycopg2.OperationalError):
+        with pool.connection():
+            raise psycopg2.OperationalError("lost")
+    assert pool.stats()["idle"] == 0 and conexoes[0].closed
+
+def test_open_transaction_is_rolled_back_on_return(conexoes):
+    pool = ConnectionPool(minconn=0, maxconn=1, dbname="x")
+    with pool.connection() as conn:
+        conn.info = type("Info", (), {"transaction_status": psycopg2.extensions.TRANSACTION_STATUS_INTRANS})()
+    assert conn.rollbacks == 1
@@ -0,0 +1,67 @@
+import pytest
+from despacho import DespachoRecomendacoes
+
+class SistemaFalso:
+    """recomendar_lote devolve, para cada perfil, o nome do sistema e o 'id' do perfil"""
+
+    def __init__(self, nome, erro=None):
+        self.nome = nome
+        self.erro = erro
+        self.lotes = []
+
+    def recomendar_lote(self, perfis, top_n=10):
+        self.lotes.append((len(perfis), top_n))
+        if self.erro:
+            raise self.erro
+        return [[(self.nome, perfil['id'], posicao) for posicao in range(top_n)] for perfil in perfis]
+
+@pytest.fixture
+def despacho():
+    # janela longa: o lote só sai quando max_lote pedidos chegam
+    despacho = DespachoRecomendacoes(janela=5.0, max_lote=6, nome="teste")
+    yield despacho
+    despacho.fechar()
+
+def test_cada_futuro_recebe_o_seu_resultado(despacho):
+    sistema = SistemaFalso("a")
+    top_ns = [3, 1, 5, 2, 4, 3]
+    futuros = [despacho.enviar(sistema, {'id': i}, top_n) for i, top_n in enumerate(top_ns)]
+
+    for i, (futuro, top_n) in enumerate(zip(futuros, top_ns)):
+        assert futuro.result(5) == [("a", i, posicao) for posicao in range(top_n)]
+    # um único recomendar_lote, com o maior top_n
+    assert sistema.lotes == [(6, 5)]
+    assert despacho.stats()["lotes"] == 1 and despacho.stats()["maior_lote"] == 6
+
+def test_falha_de_um_grupo_nao_afeta_os_outros(despacho):
+    bom, ruim = SistemaFalso("bom"), SistemaFalso("ruim", erro=RuntimeError("modelo quebrado"))
+    pedidos = [(bom if i % 2 else ruim, i) for i in range(6)]
+    futuros = [despacho.enviar(sistema, {'id': i}, 2) for sistema, i in pedidos]
+
+    for (sistema, i), futuro in zip(pedidos, futuros):
+        if sistema is bom:
+            assert futuro.result(5) == [("bom", i, 0), ("bom", i, 1)]
+        else:
+            with pytest.raises(RuntimeError, match="modelo quebrado"):
+                futuro.result(5)
+    assert bom.lotes == [(3, 2)] and ruim.lotes == [(3, 2)]
+
+    # o despacho continua atendendo depois da falha
+    futuros = [despacho.enviar(bom, {'id': i}, 1) for i in range(6)]
+    assert [f.result(5) for f in futuros] == [[("bom", i, 0)] for i in range(6)]
+
+def test_igual_ao_recomendar_direto(sistema):
+    despacho = DespachoRecomendacoes(janela=0.01, max_lote=4, nome="teste")
+    perfis = [
+        (['Ação', 'RPG'], ['PC'], ['Single-player']),
+        (['Puzzle'], ['Nintendo Switch'], ['Cooperativo']),
+        (['Horror'], ['PlayStation', 'Xbox'], ['Mundo Aberto']),
+    ]
+    try:
+        em_lote = despacho.para(sistema)
+        for generos, plataformas, modos in perfis:
+            assert em_lote.recomendar(generos, plataformas, modos, top_n=7) == \
+                sistema.recomendar(generos, plataformas, modos, top_n=7)
+        assert em_lote.get_info_sistema() == sistema.get_info_sistema()
+    finally:
+        despacho.fechar()
@@ -0,0 +1,41 @@
+import math
+import numpy as np
+from scipy import sparse
+import fatoracao
+from recomendador_colab import carregar_avaliacoes_longo
+
+def test_avaliar_com_poucos_usuarios(dados_sinteticos):
+    avaliacoes, itens = carregar_avaliacoes_longo(dados_sinteticos / "avaliacoes.csv")
+    # mais usuários pedidos para a latência do que usuários com notas no treino
+    resultado = fatoracao.avaliar(avaliacoes, itens, threads=1, usuarios_latencia=10_000)
+    assert resultado["usuarios"] == 150
+    assert resultado["rmse"] < resultado["rmse_media_global"]
+    assert not math.isnan(resultado["latencia_usuario_ms_mediana"])
+
+def test_avaliar_sem_usuarios_no_treino():
+    avaliacoes = sparse.csr_matrix(np.array([[5.0, 0, 3.0], [0, 4.0, 0]]))
+    resultado = fatoracao.avaliar(avaliacoes, ["a", "b", "c"], k=2, fracao_teste=1.0, threads=1)
+    assert resultado["notas_teste"] == 3
+    assert math.isnan(resultado["latencia_usuario_ms_mediana"])
+
+def test_blocos_pequenos_dao_os_mesmos_fatores(dados_sinteticos, monkeypatch):
+    avaliacoes, itens = carregar_avaliacoes_longo(dados_sinteticos / "avaliacoes.csv")
+    referencia = fatoracao.SistemaFatoracao(avaliacoes, itens, fatores=8, iteracoes=3, threads=1)
+
+    # 3 linhas por bloco e 32 vetores por vez: jogos populares são somados em várias partes
+    monkeypatch.setattr(fatoracao, "LIMITE_BYTES_BLOCO", 3 * 8 * 8 * 8 * 4)
+    lado = fatoracao._Lado(avaliacoes.T.tocsr(), 8, 3.0, limite_bytes=3 * 8 * 8 * 8, threads=1)
+    assert lado.tamanho_bloco == 3 and lado.vetores_por_vez == 24
+    assert lado.contagens.max() > lado.vetores_por_vez
+    fatiado = fatoracao.SistemaFatoracao(avaliacoes, itens, fatores=8, iteracoes=3, threads=4)
+    np.testing.assert_allclose(fatiado.V, referencia.V, atol=1e-10)
+    np.testing.assert_allclose(fatiado.U, referencia.U, atol=1e-5)
+
+def test_pontuar_esconde_os_jogos_avaliados(dados_sinteticos):
+    avaliacoes, itens = carregar_avaliacoes_longo(dados_sinteticos / "avaliacoes.csv")
+    modelo = fatoracao.SistemaFatoracao(avaliacoes, itens, fatores=8, iteracoes=3, threads=1)
+    notas = {itens[0]: 5, itens[3]: 1, "jogo que não existe": 4}
+    previsao = modelo.pontuar(notas)
+    assert np.isneginf(previsao[[0, 3]]).all()
+    outros = np.delete(previsao, [0, 3])
+    assert ((outros >= 1) & (outros <= 5)).all()
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from catalogo import CatalogoColunar
+from recomendador_tfidf import SistemaRecomendacao
+
+JOGOS = [
+    # nome, gênero, plataforma, modo de jogo, preço
+    ("Só PC", "Ação", "PC", "Single-player", 50.0),
+    ("PC e Xbox", "Ação", "PC, Xbox", "Multiplayer online", 120.0),
+    ("Só Switch", "Aventura", "Nintendo Switch", "Cooperativo", 200.0),
+    ("Qualquer uma", "Aventura", "Multiplataforma (dependendo da versão)", "Single-player, Cooperativo", 80.0),
+    ("Só Mobile", "Puzzle", "Mobile", "Single-player", np.nan),
+    ("Só PlayStation", "RPG", "PlayStation", "Mundo Aberto", 300.0),
+]
+
+@pytest.fixture(scope="module")
+def sistema():
+    nomes, generos, plataformas, modos, precos = zip(*JOGOS)
+    return SistemaRecomendacao(catalogo=CatalogoColunar.de_colunas(nomes, generos, plataformas, modos, precos))
+
+def nomes(sistema, mascara):
+    return {JOGOS[i][0] for i in np.flatnonzero(mascara)}
+
+def test_sem_filtros(sistema):
+    assert sistema.mascara_filtros(None) is None
+    assert sistema.mascara_filtros({}) is None
+    assert sistema.mascara_filtros({'plataformas': [], 'modos_jogo': []}) is None
+
+def test_plataforma_ou_entre_valores_e_multiplataforma_roda_em_todas(sistema):
+    assert nomes(sistema, sistema.mascara_filtros({'plataformas': ['PC']})) == {
+        "Só PC", "PC e Xbox", "Qualquer uma"}
+    assert nomes(sistema, sistema.mascara_filtros({'plataformas': ['nintendo switch', 'Mobile']})) == {
+        "Só Switch", "Só Mobile", "Qualquer uma"}
+    # plataforma que nenhum jogo lista: só os marcados como "Multiplataforma (...)"
+    assert nomes(sistema, sistema.mascara_filtros({'plataformas': ['Dreamcast']})) == {"Qualquer uma"}
+
+def test_filtro_multiplataforma(sistema):
+    # jogos em mais de uma plataforma, mais os marcados como "Multiplataforma (...)"
+    assert nomes(sistema, sistema.mascara_filtros({'plataformas': ['Multiplataforma']})) == {
+        "PC e Xbox", "Qualquer uma"}
+
+def test_modo_de_jogo(sistema):
+    assert nomes(sistema, sistema.mascara_filtros({'modos_jogo': ['Cooperativo']})) == {
+        "Só Switch", "Qualquer uma"}
+    assert nomes(sistema, sistema.mascara_filtros({'modos_jogo': ['Mundo Aberto', 'Multiplayer online']})) == {
+        "Só PlayStation", "PC e Xbox"}
+
+def test_preco_maximo_exclui_preco_desconhecido(sistema):
+    assert nomes(sistema, sistema.mascara_filtros({'preco_maximo': 100})) == {"Só PC", "Qualquer uma"}
+    assert nomes(sistema, sistema.mascara_filtros({'preco_maximo': 1000})) == {
+        nome for nome, *_, preco in JOGOS if not np.isnan(preco)}
+
+def test_filtros_combinam_com_e(sistema):
+    filtros = {'plataformas': ['PC'], 'modos_jogo': ['Single-player'], 'preco_maximo': 60}
+    assert nomes(sistema, sistema.mascara_filtros(filtros)) == {"Só PC"}
+    filtros = {'plataformas': ['PC'], 'modos_jogo': ['Single-player']}
+    assert nomes(sistema, sistema.mascara_filtros(filtros)) == {"Só PC", "Qualquer uma"}
+
+def test_recomendar_respeita_filtros(sistema):
+    filtros = {'plataformas': ['Xbox'], 'preco_maximo': 150}
+    recomendados = sistema.recomendar(['Aventura'], ['Nintendo Switch'], ['Cooperativo'], top_n=10,
+                                      filtros=filtros)
+    assert {r['nome'] for r in recomendados} == {"PC e Xbox", "Qualquer uma"}
+    lote = sistema.recomendar_lote([{'generos': ['Aventura'], 'plataformas': ['Nintendo Switch'],
+                                     'modos_jogo': ['Cooperativo'], 'filtros': filtros}], top_n=10)
+    assert lote[0] == recomendados
+    assert sistema.recomendar(['Ação'], ['PC'], ['Single-player'],
+                              filtros={'plataformas': ['Mobile'], 'preco_maximo': 10}) == []
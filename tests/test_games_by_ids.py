@@ -0,0 +1,48 @@
+from decimal import Decimal
+import Connect_base
+
+def test_rows_follow_the_recommender_order(banco):
+    with banco.cursor() as cur:
+        cur.execute("INSERT INTO CLIENT (USERNAME, PASSWORD_HASH) VALUES ('u1', 'x') RETURNING ID_CLIENT")
+        id_client = cur.fetchone()[0]
+        cur.execute("INSERT INTO RATING VALUES (%s, 3, 4), (%s, 7, 5)", (id_client, id_client))
+
+    ordem = [7, 1, 20, 3, 9999, 2]
+    linhas, imagens = Connect_base.games_by_ids(ordem)
+    assert [row[0] for row in linhas] == [7, 1, 20, 3, 2]    # ids sem produto ficam de fora
+    assert len(imagens) == len(linhas)
+    medias = {row[0]: row[6] for row in linhas}
+    assert medias[7] == Decimal("5.00") and medias[3] == Decimal("4.00")
+    assert medias[1] is None                                   # produto sem avaliações
+
+    linhas, _ = Connect_base.games_by_ids(list(reversed(ordem)))
+    assert [row[0] for row in linhas] == [2, 3, 20, 1, 7]
+
+def test_empty_and_unavailable(banco, monkeypatch):
+    assert Connect_base.games_by_ids([]) == ([], [])
+
+    def sem_banco():
+        raise RuntimeError("pool indisponível")
+
+    monkeypatch.setattr(Connect_base, "get_pool", sem_banco)
+    assert Connect_base.games_by_ids([1, 2]) == ([], [])
+
+def test_home_page_lists_games_in_recommendation_order(cliente, app_module, monkeypatch):
+    pedidos = []
+    original = app_module.games_by_ids
+
+    def games_by_ids(ids):
+        pedidos.append(list(ids))
+        return original(ids)
+
+    monkeypatch.setattr(app_module, "games_by_ids", games_by_ids)
+    with cliente.session_transaction() as sessao:
+        sessao['preferencias'] = {'generos': ['Ação', 'Aventura', 'RPG'], 'plataformas': ['PC'],
+                                  'modos_jogo': ['Single-player', 'Cooperativo']}
+    assert cliente.get('/Home_page').status_code == 200
+
+    sistema = app_module.modelo.atual
+    assert sistema.ids_vinculados
+    esperado = [rec['id_product'] for rec in sistema.recomendar(
+        ['Ação', 'Aventura', 'RPG'], ['PC'], ['Single-player', 'Cooperativo'], top_n=10)]
+    assert pedidos == [esperado]
@@ -0,0 +1,72 @@
+import Connect_base
+from data_base import bulk_load
+
+PREFERENCIAS = {'generos': ['Ação', 'Aventura', 'RPG'], 'plataformas': ['PC'],
+                'modos_jogo': ['Single-player', 'Mundo Aberto']}
+
+def entrar(cliente):
+    with cliente.session_transaction() as sessao:
+        sessao['preferencias'] = PREFERENCIAS
+
+def test_matching_etag_gets_304(cliente):
+    entrar(cliente)
+    primeira = cliente.get('/Home_page')
+    assert primeira.status_code == 200
+    etag = primeira.headers['ETag']
+
+    repetida = cliente.get('/Home_page', headers={'If-None-Match': etag})
+    assert repetida.status_code == 304
+    assert repetida.headers['ETag'] == etag and not repetida.data
+
+    outra = cliente.get('/Home_page', headers={'If-None-Match': '"home-outra"'})
+    assert outra.status_code == 200 and outra.headers['ETag'] == etag
+
+def test_new_data_version_invalidates_page(cliente, app_module, monkeypatch):
+    entrar(cliente)
+    etag = cliente.get('/Home_page').headers['ETag']
+    calculos = app_module.home_cache.stats()['misses']
+
+    monkeypatch.setattr(app_module, 'data_version', lambda: 2)
+    nova = cliente.get('/Home_page', headers={'If-None-Match': etag})
+    assert nova.status_code == 200
+    assert nova.headers['ETag'] != etag
+    assert app_module.home_cache.stats()['misses'] == calculos + 1
+
+def test_unreadable_version_disables_caching(cliente, app_module, monkeypatch):
+    entrar(cliente)
+    monkeypatch.setattr(app_module, 'data_version', lambda: None)
+    resposta = cliente.get('/Home_page')
+    assert resposta.status_code == 200 and 'ETag' not in resposta.headers
+
+# Versão no banco
+
+def versao(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT VERSION FROM DATA_VERSION WHERE ID = 1")
+        return cur.fetchone()[0]
+
+def test_product_changes_bump_version_and_ratings_do_not(banco, monkeypatch):
+    inicial = versao(banco)
+    with banco.cursor() as cur:
+        cur.execute("UPDATE PRODUCT SET PRICE = PRICE + 1 WHERE ID_PRODUCT = 1")
+        assert versao(banco) == inicial + 1
+        cur.execute("INSERT INTO CLIENT (USERNAME, PASSWORD_HASH) VALUES ('u1', 'x') RETURNING ID_CLIENT")
+        id_client = cur.fetchone()[0]
+        cur.execute("INSERT INTO RATING VALUES (%s, 1, 5)", (id_client,))
+        cur.execute("UPDATE RATING SET RATING = 4")
+    assert versao(banco) == inicial + 1
+
+    monkeypatch.setattr(Connect_base, "_data_version", (None, 0.0))
+    assert Connect_base.data_version() == inicial + 1
+
+def test_rating_load_bumps_version_once(banco, tmp_path):
+    with banco.cursor() as cur:
+        cur.execute("INSERT INTO CLIENT (USERNAME, PASSWORD_HASH) VALUES ('u1', 'x'), ('u2', 'x')")
+    inicial = versao(banco)
+    caminho = tmp_path / "ratings.csv"
+    caminho.write_text("USERNAME,ID_PRODUCT,RATING\nu1,1,5\nu2,1,3\nu1,2,4\n", encoding="utf-8")
+    bulk_load.main(["ratings", str(caminho), "--chunk-rows", "1"])
+    assert versao(banco) == inicial + 1
+    with banco.cursor() as cur:
+        cur.execute("SELECT RATING_COUNT, RATING_SUM FROM PRODUCT_RATING_STATS WHERE ID_PRODUCT = 1")
+        assert cur.fetchone() == (2, 8)
@@ -0,0 +1,24 @@
+from image_index import ImageIndex, DEFAULT_IMAGE
+
+def test_lookup_exact_partial_and_default(tmp_path):
+    for name in ("Hollow Knight.jpg", "The Witcher 3 Wild Hunt.png", "notes.txt"):
+        (tmp_path / name).write_bytes(b"")
+    index = ImageIndex(tmp_path)
+    assert index.lookup("hollow knight") == "Hollow Knight.jpg"
+    assert index.lookup("Witcher 3") == "The Witcher 3 Wild Hunt.png"
+    assert index.lookup("notes") == DEFAULT_IMAGE
+    assert index.lookup_many(["Hollow Knight", "Nada"]) == ["Hollow Knight.jpg", DEFAULT_IMAGE]
+
+def test_resolved_memo_is_bounded(tmp_path):
+    (tmp_path / "Stray.jpg").write_bytes(b"")
+    index = ImageIndex(tmp_path, resolved_max=10)
+    for i in range(100):
+        assert index.lookup(f"termo de busca {i}") == DEFAULT_IMAGE
+        assert len(index._resolved) <= 10
+
+def test_new_file_is_picked_up_after_directory_change(tmp_path):
+    index = ImageIndex(tmp_path, check_interval=0.0)
+    assert index.lookup("Celeste") == DEFAULT_IMAGE
+    (tmp_path / "Celeste.webp").write_bytes(b"")
+    index._mtime = None   # mtime granularity can hide a change made in the same tick
+    assert index.lookup("Celeste") == "Celeste.webp"
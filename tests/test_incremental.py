@@ -0,0 +1,65 @@
+import numpy as np
+from recomendador_tfidf import SistemaRecomendacao
+
+PERFIL = (['Horror', 'Puzzle'], ['Nintendo Switch'], ['Cooperativo'])
+NOVO = {'nome': 'Jogo Novo de Teste', 'genero': 'Horror / Puzzle', 'plataforma': 'Nintendo Switch',
+        'modo_jogo': 'Cooperativo', 'id_product': 9001, 'preco': 59.9}
+
+def nomes(recomendacoes):
+    return [r['nome'] for r in recomendacoes]
+
+def test_adicionar_remover_atualizar_reconstruir(sistema):
+    total = sistema.get_info_sistema()['total_jogos']
+    original = sistema.recomendar(*PERFIL)
+
+    com_novo = sistema.adicionar([NOVO])
+    assert com_novo.get_info_sistema()['total_jogos'] == total + 1
+    assert com_novo.indice_do_jogo(NOVO['nome']) == total
+    primeiro = com_novo.recomendar(*PERFIL)[0]
+    assert primeiro['nome'] == NOVO['nome'] and primeiro['id_product'] == 9001
+
+    # o sistema publicado antes continua igual
+    assert sistema.indice_do_jogo(NOVO['nome']) is None
+    assert sistema.recomendar(*PERFIL) == original
+    assert sistema.alteracoes == 0 and com_novo.alteracoes == 1
+
+    # sem id_product e preco, a atualização mantém os do jogo atual
+    atualizado = com_novo.atualizar([{'nome': NOVO['nome'], 'genero': 'Estratégia',
+                                      'plataforma': 'PC', 'modo_jogo': 'Single-player'}])
+    assert NOVO['nome'] not in nomes(atualizado.recomendar(*PERFIL, top_n=20))
+    linha = atualizado.indice_do_jogo(NOVO['nome'])
+    assert linha == total + 1
+    assert atualizado._ids[linha] == 9001
+    assert atualizado.catalogo.precos[linha] == NOVO['preco']
+    assert atualizado.get_info_sistema()['total_jogos'] == total + 1
+
+    removido = atualizado.remover([NOVO['nome']])
+    assert removido.indice_do_jogo(NOVO['nome']) is None
+    assert removido.get_info_sistema()['total_jogos'] == total
+    assert removido.recomendar(*PERFIL) == original
+    assert NOVO['nome'] not in nomes(removido.recomendar_lote(
+        [{'generos': ['Estratégia'], 'plataformas': ['PC'], 'modos_jogo': ['Single-player']}],
+        top_n=len(removido.catalogo))[0])
+
+    # a reconstrução volta ao mesmo modelo de um treino do zero
+    reconstruido = removido.reconstruir()
+    assert reconstruido.tfidf_matrix.shape == sistema.tfidf_matrix.shape
+    assert reconstruido.get_info_sistema() == sistema.get_info_sistema()
+    assert (reconstruido.tfidf_matrix != sistema.tfidf_matrix).nnz == 0
+    assert reconstruido.recomendar(*PERFIL) == original
+
+def test_reconstruir_igual_a_treino_do_zero(sistema):
+    removidos = sistema.catalogo.nomes.lista([0, 5, 7])
+    reconstruido = sistema.adicionar([NOVO]).remover(removidos).reconstruir()
+
+    ativos = np.ones(len(sistema.catalogo), dtype=bool)
+    ativos[[0, 5, 7]] = False
+    do_zero = SistemaRecomendacao(catalogo=sistema.catalogo.subconjunto(ativos).acrescentar(
+        [NOVO['nome']], [NOVO['genero']], [NOVO['plataforma']], [NOVO['modo_jogo']], [NOVO['preco']]))
+
+    assert reconstruido.vectorizer.termos == do_zero.vectorizer.termos
+    np.testing.assert_array_equal(reconstruido.vectorizer.idf_, do_zero.vectorizer.idf_)
+    assert (reconstruido.tfidf_matrix != do_zero.tfidf_matrix).nnz == 0
+    for nome in removidos:
+        assert reconstruido.indice_do_jogo(nome) is None
+    assert reconstruido._ids[reconstruido.indice_do_jogo(NOVO['nome'])] == 9001
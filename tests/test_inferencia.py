@@ -0,0 +1,42 @@
+import sys
+import subprocess
+from pathlib import Path
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from inferencia import VetorizadorTfidf
+from recomendador_tfidf import NGRAM_RANGE
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+PERFIS = [
+    "Ação RPG PC Single-player",
+    "rpg rpg RPG Xbox Xbox Cooperativo",
+    "Multiplataforma (dependendo da versão) Mundo Aberto",
+    "termo_que_nao_existe outro",
+    "",
+    "a b c",
+]
+
+def test_transform_igual_ao_sklearn(sistema):
+    descricoes = sistema.catalogo.descricoes()
+    sklearn = TfidfVectorizer(ngram_range=NGRAM_RANGE, min_df=1, max_df=0.95).fit(descricoes)
+    nosso = VetorizadorTfidf.de_sklearn(sklearn)
+
+    for textos in (descricoes, PERFIS):
+        esperado = sklearn.transform(textos)
+        obtido = nosso.transform(textos)
+        assert obtido.shape == esperado.shape
+        np.testing.assert_allclose(obtido.toarray(), esperado.toarray(), rtol=1e-12, atol=1e-15)
+
+def test_sem_termos_conhecidos_da_linha_vazia(sistema):
+    matriz = sistema.vectorizer.transform(["termo_que_nao_existe", ""])
+    assert matriz.nnz == 0
+    assert matriz.shape == (2, len(sistema.vectorizer.termos))
+
+def test_importar_nao_carrega_dependencias_de_treino():
+    # pandas e scikit-learn só entram quando um modelo é treinado
+    codigo = ("import sys, recomendador_tfidf, inferencia; "
+              "print(','.join(m for m in ('sklearn', 'pandas') if m in sys.modules))")
+    saida = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True,
+                           text=True, check=True).stdout
+    assert saida.strip() == ""
@@ -0,0 +1,47 @@
+import time
+import threading
+import pytest
+from password_hashing import HashingPool, HashingBusy, hash_cost
+
+@pytest.fixture
+def pool():
+    pool = HashingPool(workers=1, max_pending=1, timeout=5, rounds=5)
+    yield pool
+    pool.shutdown()
+
+def test_queue_full_fails_fast(pool):
+    ocupado = threading.Thread(target=pool._run, args=(time.sleep, 1.0))
+    ocupado.start()
+    time.sleep(0.2)
+    inicio = time.monotonic()
+    with pytest.raises(HashingBusy):
+        pool.hash_password("segredo")
+    assert time.monotonic() - inicio < 0.5
+    ocupado.join()
+    assert pool.stats()["rejected"] == 1
+    # a vaga volta quando o trabalho termina
+    assert hash_cost(pool.hash_password("segredo")) == 5
+
+def test_timeout_is_reported_as_busy():
+    pool = HashingPool(workers=1, max_pending=2, timeout=0.2, rounds=4)
+    try:
+        with pytest.raises(HashingBusy):
+            pool._run(time.sleep, 1.0)
+        assert pool.stats()["timeouts"] == 1
+    finally:
+        pool.shutdown()
+
+def test_rehash_only_when_stored_cost_is_lower(pool):
+    antigo = HashingPool(workers=1, rounds=4)
+    try:
+        hash_barato = antigo.hash_password("segredo")
+    finally:
+        antigo.shutdown()
+    assert hash_cost(hash_barato) == 4
+
+    ok, novo = pool.verify_password("segredo", hash_barato)
+    assert ok and hash_cost(novo) == 5
+    assert pool.verify_password("segredo", novo) == (True, None)
+    assert pool.verify_password("errada", hash_barato) == (False, None)
+    assert pool.verify_password("segredo", "texto puro") == (False, None)
+    assert pool.stats()["rehashed"] == 1
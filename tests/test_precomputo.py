@@ -0,0 +1,95 @@
+import json
+import shutil
+from pathlib import Path
+import numpy as np
+import pytest
+import precomputo
+from recomendador_tfidf import gerar_recomendacoes
+
+TOP_N = 10
+# primeiras, do meio e últimas combinações de gêneros
+POSTOS = [0, 1, len(precomputo.MASCARAS_GENEROS) // 2, len(precomputo.MASCARAS_GENEROS) - 1]
+
+@pytest.fixture(scope="module")
+def tabela(sistema, tmp_path_factory, monkeypatch_modulo):
+    """Tabela com as linhas de POSTOS pontuadas pelo mesmo código do construir()"""
+    destino = tmp_path_factory.mktemp("perfis")
+    tipo_indice = np.int16 if sistema.tfidf_matrix.shape[0] < np.iinfo(np.int16).max else np.int32
+    indices = np.lib.format.open_memmap(destino / "indices.npy", mode="w+", dtype=tipo_indice,
+                                        shape=(precomputo.TOTAL_PERFIS, TOP_N))
+    scores = np.lib.format.open_memmap(destino / "scores.npy", mode="w+", dtype=np.float32,
+                                       shape=(precomputo.TOTAL_PERFIS, TOP_N))
+    del indices, scores
+
+    monkeypatch_modulo.setattr(precomputo, "_sistema", sistema)
+    for posto in POSTOS:
+        precomputo._pontuar_generos(destino, posto, posto + 1, TOP_N)
+    with open(destino / "meta.json", "w", encoding="utf-8") as f:
+        json.dump({"formato": precomputo.FORMATO, "checksum": "teste", "top_n": TOP_N,
+                   "n_jogos": int(sistema.tfidf_matrix.shape[0]),
+                   "total_perfis": precomputo.TOTAL_PERFIS, "generos": precomputo.GENEROS,
+                   "plataformas": precomputo.PLATAFORMAS, "modos_jogo": precomputo.MODOS}, f)
+    return precomputo.TabelaPerfis(destino)
+
+@pytest.fixture(scope="module")
+def monkeypatch_modulo():
+    with pytest.MonkeyPatch.context() as mp:
+        yield mp
+
+def perfis():
+    for posto in POSTOS:
+        generos = precomputo._escolhas(int(precomputo.MASCARAS_GENEROS[posto]), precomputo.GENEROS)
+        for p in precomputo.MASCARAS_PLATAFORMAS[::7]:
+            for m in precomputo.MASCARAS_MODOS:
+                yield (generos, precomputo._escolhas(int(p), precomputo.PLATAFORMAS),
+                       precomputo._escolhas(int(m), precomputo.MODOS))
+
+def test_tabela_igual_a_pontuacao_na_hora(sistema, tabela):
+    for generos, plataformas, modos in perfis():
+        indices, scores = tabela.consultar(generos, plataformas, modos, TOP_N)
+        na_hora = sistema.recomendar(generos, plataformas, modos, top_n=TOP_N)
+        assert [sistema.catalogo.nomes[i] for i in indices] == [r['nome'] for r in na_hora]
+        np.testing.assert_allclose(scores, [r['score_similaridade'] for r in na_hora], rtol=1e-6)
+
+def test_gerar_recomendacoes_usa_a_tabela(sistema, tabela, monkeypatch):
+    publicado = sistema._copiar()
+    publicado.alteracoes = 0
+    publicado.versao = "teste"
+    monkeypatch.setitem(precomputo._tabelas, "teste", tabela)
+    consultas = []
+    consultar = tabela.consultar
+    monkeypatch.setattr(tabela, "consultar", lambda *a: consultas.append(a) or consultar(*a))
+
+    generos, plataformas, modos = next(perfis())
+    preferencias = {'generos': generos, 'plataformas': plataformas, 'modos_jogo': modos}
+    resultado = gerar_recomendacoes(publicado, preferencias, TOP_N)
+    assert resultado['sucesso'] and len(consultas) == 1
+    esperado = sistema.recomendar(generos, plataformas, modos, top_n=TOP_N)
+    assert [r['nome'] for r in resultado['recomendacoes']] == [r['nome'] for r in esperado]
+
+    # depois de uma alteração incremental a tabela não vale mais
+    assert precomputo.tabela_para(publicado.remover([esperado[0]['nome']])) is None
+
+def test_perfil_fora_da_ordem_canonica_nao_esta_na_tabela(tabela):
+    assert tabela.consultar(['RPG', 'Ação', 'Aventura'], ['PC'], ['Single-Player', 'Cooperativo'],
+                            TOP_N) is None
+    assert tabela.consultar(['Aventura', 'Ação', 'RPG'], ['PC'], ['Single-Player', 'Cooperativo'],
+                            TOP_N + 1) is None
+
+def test_tabela_gerada_depois_e_encontrada(sistema, tabela, tmp_path, monkeypatch):
+    monkeypatch.setattr(precomputo, "_tabelas", {})
+    monkeypatch.setattr(precomputo, "_ausentes", {})
+    publicado = sistema._copiar()
+    publicado.alteracoes = 0
+    publicado.versao = "gerada-depois"
+
+    assert precomputo.tabela_para(publicado, base=tmp_path) is None
+    shutil.copytree(Path(tabela.indices.filename).parent, precomputo.diretorio_tabela("gerada-depois", tmp_path))
+    # dentro do intervalo a ausência vale sem olhar o disco de novo
+    assert precomputo.tabela_para(publicado, base=tmp_path) is None
+
+    monkeypatch.setattr(precomputo, "RECHECAR_TABELA", 0.0)
+    encontrada = precomputo.tabela_para(publicado, base=tmp_path)
+    assert encontrada is not None and encontrada.meta["checksum"] == "teste"
+    assert precomputo.tabela_para(publicado, base=tmp_path) is encontrada
+    assert "gerada-depois" not in precomputo._ausentes
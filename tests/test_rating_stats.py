@@ -0,0 +1,63 @@
+from conftest import aplicar_schema
+from data_base import rating_stats
+
+def estatisticas(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT ID_PRODUCT, RATING_COUNT, RATING_SUM, AVERAGE_RATING "
+                    "FROM PRODUCT_RATING_STATS WHERE RATING_COUNT > 0 ORDER BY 1")
+        return {id_product: (count, total, float(media)) for id_product, count, total, media in cur.fetchall()}
+
+def clientes(conn, n):
+    with conn.cursor() as cur:
+        cur.execute("INSERT INTO CLIENT (USERNAME, PASSWORD_HASH) "
+                    "SELECT 'u' || i, 'x' FROM generate_series(1, %s) i RETURNING ID_CLIENT", (n,))
+        return [row[0] for row in cur.fetchall()]
+
+def executar(conn, query, *args):
+    with conn.cursor() as cur:
+        cur.execute(query, args)
+
+def test_triggers_keep_count_and_sum(banco):
+    a, b, c = clientes(banco, 3)
+    executar(banco, "INSERT INTO RATING VALUES (%s, 1, 5), (%s, 1, 3), (%s, 2, 4)", a, b, c)
+    assert estatisticas(banco) == {1: (2, 8, 4.0), 2: (1, 4, 4.0)}
+
+    # o upsert em lote dos loaders dispara o trigger de INSERT e o de UPDATE
+    executar(banco, "INSERT INTO RATING VALUES (%s, 1, 1), (%s, 2, 2) "
+                    "ON CONFLICT (ID_CLIENT, ID_PRODUCT) DO UPDATE SET RATING = EXCLUDED.RATING", a, a)
+    assert estatisticas(banco) == {1: (2, 4, 2.0), 2: (2, 6, 3.0)}
+
+    executar(banco, "UPDATE RATING SET ID_PRODUCT = 3 WHERE ID_CLIENT = %s AND ID_PRODUCT = 2", c)
+    assert estatisticas(banco) == {1: (2, 4, 2.0), 2: (1, 2, 2.0), 3: (1, 4, 4.0)}
+
+    executar(banco, "DELETE FROM RATING WHERE ID_PRODUCT IN (1, 3)")
+    assert estatisticas(banco) == {2: (1, 2, 2.0)}
+    assert rating_stats.verify() == []
+
+    executar(banco, "TRUNCATE RATING")
+    assert estatisticas(banco) == {}
+    assert rating_stats.verify() == []
+
+def test_migration_backfills_existing_ratings(banco):
+    a, b = clientes(banco, 2)
+    # avaliações gravadas antes de os triggers existirem
+    executar(banco, "ALTER TABLE RATING DISABLE TRIGGER USER")
+    executar(banco, "INSERT INTO RATING VALUES (%s, 1, 5), (%s, 1, 4), (%s, 7, 2)", a, b, a)
+    executar(banco, "ALTER TABLE RATING ENABLE TRIGGER USER")
+    executar(banco, "INSERT INTO PRODUCT_RATING_STATS (ID_PRODUCT, RATING_COUNT, RATING_SUM) VALUES (9, 3, 9)")
+    assert len(rating_stats.verify()) == 3
+
+    aplicar_schema(banco)
+    assert estatisticas(banco) == {1: (2, 9, 4.5), 7: (1, 2, 2.0)}
+    assert rating_stats.verify() == []
+
+    # rodar de novo não muda nada
+    aplicar_schema(banco)
+    assert estatisticas(banco) == {1: (2, 9, 4.5), 7: (1, 2, 2.0)}
+
+def test_rebuild_fixes_drift(banco):
+    a, = clientes(banco, 1)
+    executar(banco, "INSERT INTO RATING VALUES (%s, 1, 5)", a)
+    executar(banco, "UPDATE PRODUCT_RATING_STATS SET RATING_SUM = 1")
+    assert len(rating_stats.rebuild()) == 1
+    assert estatisticas(banco) == {1: (1, 5, 5.0)}
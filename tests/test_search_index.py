@@ -0,0 +1,110 @@
+import threading
+import pytest
+import search_index
+from search_index import SearchIndex, get_search_index
+
+def linha(id_product, nome, genero="Ação", plataforma="PC", modo="Single-player"):
+    return (id_product, nome, genero, plataforma, modo, 50.0)
+
+CATALOGO = [
+    linha(1, "The Hollowed Out"),
+    linha(2, "Hollow Knight", "Metroidvania / Ação"),
+    linha(3, "Knight Hollow Tales"),
+    linha(4, "Stardew Valley", "Simulação / RPG"),
+    linha(5, "Ação Total", "Ação"),
+    linha(6, "Ghost of Tsushima", "Ação / Aventura", "PlayStation"),
+]
+
+def ids(linhas):
+    return [row[0] for row in linhas]
+
+def test_exact_before_prefix_and_name_before_other_fields():
+    index = SearchIndex(CATALOGO)
+    resultados, total = index.search("hollow")
+    # exato no nome (começando pela frase) > exato no nome > prefixo no nome
+    assert ids(resultados) == [2, 3, 1] and total == 3
+
+    resultados, _ = index.search("acao")
+    assert ids(resultados)[0] == 5          # no nome vale mais que no gênero
+    assert set(ids(resultados)) == {1, 2, 3, 5, 6}
+
+def test_trigram_only_when_nothing_matches_exactly_or_by_prefix():
+    index = SearchIndex(CATALOGO)
+    resultados, _ = index.search("stardwe")
+    assert ids(resultados) == [4]
+    assert index.search("xyzw") == ([], 0)
+
+def test_more_matched_tokens_rank_first():
+    resultados, _ = SearchIndex(CATALOGO).search("hollow knight")
+    assert ids(resultados)[:2] == [2, 3]
+
+def test_pages_cover_the_ranking_without_overlap():
+    catalogo = [linha(i, f"Aventura {i}", "Aventura" if i % 3 else "Ação") for i in range(1, 46)]
+    index = SearchIndex(catalogo)
+    paginas = [index.search("aventura", page, per_page=20) for page in (1, 2, 3, 4)]
+    assert [len(p[0]) for p in paginas] == [20, 20, 5, 0]
+    assert {p[1] for p in paginas} == {45}
+    juntas = [row for p in paginas for row in p[0]]
+    assert len(set(ids(juntas))) == 45
+    assert juntas == index.search("aventura", 1, per_page=100)[0]
+
+def test_autocomplete_prefers_name_prefix():
+    sugestoes = SearchIndex(CATALOGO).autocomplete("holl")
+    assert [s["id"] for s in sugestoes] == [2, 3, 1]
+
+@pytest.fixture
+def indice_compartilhado(monkeypatch):
+    monkeypatch.setattr(search_index, "_index", None)
+    monkeypatch.setattr(search_index, "_built_at", 0.0)
+    monkeypatch.setattr(search_index, "_failed_at", None)
+    monkeypatch.setattr(search_index, "_refreshing", False)
+
+def esperar_recarga():
+    for thread in threading.enumerate():
+        if thread.name == "search-index":
+            thread.join(5)
+
+def test_reload_runs_in_background_and_swaps_the_index(indice_compartilhado):
+    cargas = []
+
+    def carregar():
+        cargas.append(1)
+        return CATALOGO[:len(cargas) + 1]
+
+    primeiro = get_search_index(carregar)
+    assert len(primeiro.rows) == 2
+    search_index.invalidate_search_index()
+    assert get_search_index(carregar) is primeiro     # ainda o antigo enquanto recarrega
+    esperar_recarga()
+    assert len(get_search_index(carregar).rows) == 3
+    assert len(cargas) == 2
+
+def test_failed_reload_keeps_old_index_and_backs_off(indice_compartilhado):
+    cargas = []
+
+    def carregar():
+        cargas.append(1)
+        if len(cargas) > 1:
+            raise RuntimeError("banco fora do ar")
+        return CATALOGO
+
+    antigo = get_search_index(carregar)
+    search_index.invalidate_search_index()
+    assert get_search_index(carregar) is antigo
+    esperar_recarga()
+    for _ in range(5):
+        assert get_search_index(carregar) is antigo
+    esperar_recarga()
+    assert len(cargas) == 2                             # sem nova consulta dentro de SEARCH_RETRY
+
+def test_first_load_failure_is_not_retried_immediately(indice_compartilhado):
+    cargas = []
+
+    def carregar():
+        cargas.append(1)
+        raise RuntimeError("banco fora do ar")
+
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            get_search_index(carregar)
+    assert len(cargas) == 1
@@ -0,0 +1,32 @@
+import numpy as np
+from recomendador_tfidf import _top_k, _top_k_lote
+
+def referencia(scores, k):
+    """Ordenação completa: score decrescente, empate pelo menor índice"""
+    return np.lexsort((np.arange(len(scores)), -scores))[:k]
+
+def test_empate_no_limite_fica_com_os_menores_indices():
+    scores = np.array([0.2, 0.5, 1.0, 0.5, 0.5, 0.5, 0.1])
+    np.testing.assert_array_equal(_top_k(scores, 3), [2, 1, 3])
+    np.testing.assert_array_equal(_top_k_lote(scores[None, :], 3)[0], [2, 1, 3])
+
+def test_igual_a_ordenacao_completa():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        n = int(rng.integers(1, 60))
+        # poucos valores distintos: muitos empates
+        scores = rng.integers(0, 4, size=n).astype(np.float64) / 4
+        scores[rng.random(n) < 0.1] = -np.inf
+        k = int(rng.integers(1, n + 2))
+        np.testing.assert_array_equal(_top_k(scores, k), referencia(scores, k))
+
+    matriz = rng.integers(0, 3, size=(50, 40)).astype(np.float64)
+    lote = _top_k_lote(matriz, 7)
+    for linha, indices in zip(matriz, lote):
+        np.testing.assert_array_equal(indices, referencia(linha, 7))
+
+def test_k_maior_que_n_e_k_zero():
+    scores = np.array([0.3, 0.9])
+    np.testing.assert_array_equal(_top_k(scores, 10), [1, 0])
+    assert _top_k(scores, 0).size == 0
+    assert _top_k_lote(scores[None, :], 0).shape == (1, 0)